@@ -1,11 +1,25 @@
 from crewai import Agent
+import os
+import sys
+
+## Shared helpers live in 'crew_common' at the top of the repository. Make it importable when running from this folder
+sys.path.append (os.path.dirname (os.path.dirname (os.path.abspath (__file__))))
+
+## 'make_llm' gives the model, going through the record / replay cache of LLM answers when 'CREW_LLM_CACHE' is set
+from crew_common.llm_cache import make_llm
 
 ## Defining an agent. Give it a role and purpose.
 ## 'llm' need to indicate LLM model to be used. By default, it considers OpenAI
-chat_bot = Agent (
-    role = 'Responder to Queries',
-    goal = 'Provide a response to {query}',
-    llm = 'groq/llama3-70b-8192',
-    verbose = True,    
-    backstory = ('A generalist having broad view about various topics, you will be able to answer to the queries, questions or statements'),
-)
\ No newline at end of file
+## The agent is made by a function : importing this file builds nothing, and every crew gets its own agent.
+def make_chat_bot ():
+    return Agent (
+        role = 'Responder to Queries',
+        goal = 'Provide a response to {query}',
+        llm = make_llm ('groq/llama3-70b-8192'),
+        verbose = True,    
+        backstory = ('A generalist having broad view about various topics, you will be able to answer to the queries, questions or statements'),
+    )
+
+## All the agents of the crew, by name
+def build_agents ():
+    return {'chat_bot' : make_chat_bot ()}
\ No newline at end of file
@@ -2,20 +2,39 @@ from crewai import Crew, Process
 import os
 
 ## Your agents and tasks
-from my_agents import chat_bot
-from my_tasks import chat_task
+from my_agents import build_agents
+from my_tasks import build_tasks
+## Every run of this script is kept in the run store ('runs.sqlite', see crew_common/run_store.py)
+from crew_common.run_store import record_run
 
-## Your Groq API key goes here ...
-## If using other cloud for LLM, provide the API key
-os.environ['GROQ_API_KEY'] = "Your API Key"
-# os.environ['OPENAI_API_KEY'] = "Your API Key"
+## Your Groq API key goes in the '.env' file (GROQ_API_KEY=...), it is read when the model is first used.
+## If using other cloud for LLM, provide the API key there too. Or set it here, without overwriting one already set :
+# os.environ.setdefault ('GROQ_API_KEY', "Your API Key")
+# os.environ.setdefault ('OPENAI_API_KEY', "Your API Key")
+
+## Input used when none is given
+DEFAULT_INPUTS = {'query' : 'What is Bangalore famously known for?'}
 
 ## Define the crew with Agent and Task. Here simple crew.
-crew = Crew (
-    agents = [chat_bot],
-    tasks = [chat_task],
-)
+def build_crew (verbose = False):
+    agents = build_agents ()
+    return Crew (
+        agents = list (agents.values ()),
+        tasks = build_tasks (agents),
+        verbose = verbose,
+    )
+
+## Run the crew and get the response. Provide input with the same parameter name as used in the agent, task definition
+def kickoff (inputs = None, crew = None):
+    crew = crew or build_crew ()
+    return crew.kickoff (inputs = inputs or DEFAULT_INPUTS)
 
-## Initiate a run for Crew and get the response. Provide input with the same parameter name as used in the agent, task definition
-## Now your first AI Agent should work and respond to your query. Try asking some other interesting question ...!
-result = crew.kickoff (inputs={'query' : 'What is Bangalore famously known for?'})
\ No newline at end of file
+## Run the crew only when this file is executed, not when it is imported (e.g. by 'run_crew.py' or the benchmarks)
+if __name__ == '__main__':
+    ## Now your first AI Agent should work and respond to your query. Try asking some other interesting question ...!
+    ## Or many of them, one per line in a file :  python run_crew.py batch chat queries.txt
+    inputs = {'query' : 'What is Bangalore famously known for?'}
+    crew = build_crew ()
+    with record_run ('chat', inputs, crew) as run:
+        result = kickoff (inputs, crew)
+        run.done (result, crew)
\ No newline at end of file
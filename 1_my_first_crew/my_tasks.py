@@ -1,12 +1,15 @@
 from crewai import Task
 
 ## Import your agents
-from my_agents import chat_bot
+from my_agents import build_agents
 
 ## Defining a Task. Provide task description and expected output. Associate the agent who will do it
 ## Parameter is in {}, which will be user input
-chat_task = Task (
-    description = ('{query}'),
-    expected_output = 'A response to {query}',
-    agent = chat_bot,
-)
\ No newline at end of file
+def build_tasks (agents = None):
+    agents = agents or build_agents ()
+    chat_task = Task (
+        description = ('{query}'),
+        expected_output = 'A response to {query}',
+        agent = agents ['chat_bot'],
+    )
+    return [chat_task]
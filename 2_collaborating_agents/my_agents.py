@@ -1,30 +1,40 @@
 from crewai import Agent
+import os
+import sys
 
-## Your environment variables need to be stored in '.env' file. That is loaded into the program
-## environment variale contains your API key
-from dotenv import load_dotenv
+## Shared helpers live in 'crew_common' at the top of the repository. Make it importable when running from this folder
+sys.path.append (os.path.dirname (os.path.dirname (os.path.abspath (__file__))))
 
-# loading env
-load_dotenv ()
+## 'make_llm' gives the model, going through the record / replay cache of LLM answers when 'CREW_LLM_CACHE' is set
+## Your environment variables need to be stored in '.env' file. It is loaded when the model is first used
+## environment variale contains your API key
+from crew_common.llm_cache import make_llm
 
 ## Here we are defining 2 agents, that are going to collaborate as a 'crew'. They both of defined role and objective
+## Each agent is made by a function : importing this file builds nothing, and every crew gets its own agents.
 
 ## Agent designed to explore and gather information about a topic. The parameter used same as while triggering
 ## Back story sets the context for the agent & goal says the objective clearly.
-explorer = Agent (
-    role = 'Data Explorer',
-    goal = 'Research, gather and provide information about the topic : {topic}',    
-    llm = 'groq/llama3-70b-8192',
-    verbose = True,    
-    backstory = ('You are an expert researcher, who can gather detailed information about a topic'),
-)
+def make_explorer ():
+    return Agent (
+        role = 'Data Explorer',
+        goal = 'Research, gather and provide information about the topic : {topic}',    
+        llm = make_llm ('groq/llama3-70b-8192'),
+        verbose = True,    
+        backstory = ('You are an expert researcher, who can gather detailed information about a topic'),
+    )
 
 ## Agent designed to synthesie and summarise the information provided.
 ## Back story sets the context for the agent & goal says the objective clearly.
-synthesiser = Agent (
-    role = 'Information Synthesiser',
-    goal = 'Summarise the information given in a synthetic manner',    
-    llm = 'groq/llama3-70b-8192',
-    verbose = True,    
-    backstory = ('You are an expert in summarising provided information in a simple, concise and synthetic way'),
-)
\ No newline at end of file
+def make_synthesiser ():
+    return Agent (
+        role = 'Information Synthesiser',
+        goal = 'Summarise the information given in a synthetic manner',    
+        llm = make_llm ('groq/llama3-70b-8192'),
+        verbose = True,    
+        backstory = ('You are an expert in summarising provided information in a simple, concise and synthetic way'),
+    )
+
+## All the agents of the crew, by name
+def build_agents ():
+    return {'explorer' : make_explorer (), 'synthesiser' : make_synthesiser ()}
\ No newline at end of file
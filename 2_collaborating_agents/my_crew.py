@@ -1,25 +1,48 @@
 from crewai import Crew, Process, Task
-from my_agents import explorer, synthesiser
-from my_tasks import explore, summarise
-from datetime import datetime
+from my_agents import build_agents
+from my_tasks import build_tasks
+from crew_common.run_store import record_run
+from crew_common.tracing import tracer, step_callback, task_callback
 
-## function to print Current time stamp
-def timestamp(Input):
-    print(datetime.now())
+## Every task, agent step, LLM call and tool call is recorded by the tracer, with its duration.
+## 'step_callback' / 'task_callback' (of the tracer) are given to the crew for the steps and tasks.
+
+## Input used when none is given
+DEFAULT_INPUTS = {'topic' : 'AI in software industry'}
 
 ## Crew has two tasks to do. Its composed of two agents.
 ## Overall objective is to perform task of gather info and summarise.
 ## Done by performing 2 tasks sequentially. Crew agents collaborate and achive the final result
-crew = Crew (
-    agents = [explorer, synthesiser],
-    tasks = [explore, summarise],
-    verbose = True,
-    Process = Process.sequential,
-    step_callback = timestamp
-)
+def build_crew (verbose = True):
+    agents = build_agents ()
+    return Crew (
+        agents = list (agents.values ()),
+        tasks = build_tasks (agents),
+        verbose = verbose,
+        Process = Process.sequential,
+        step_callback = step_callback,
+        task_callback = task_callback
+    )
+
+def kickoff (inputs = None, crew = None):
+    crew = crew or build_crew ()
+    return crew.kickoff (inputs = inputs or DEFAULT_INPUTS)
+
+## Run the crew only when this file is executed, not when it is imported (e.g. by 'run_crew.py' or the benchmarks)
+if __name__ == '__main__':
+    ## The run is kept in the run store ('runs.sqlite', see crew_common/run_store.py)
+    inputs = {'topic' : 'AI in software industry'}
+    crew = build_crew ()
+    with tracer.span ('kickoff'), record_run ('collab', inputs, crew) as run:
+        result = kickoff (inputs, crew)
+        run.done (result, crew)
+    # result = kickoff ({'topic' : 'Role of Indian IT industry in AI field'})
+    # result = kickoff ({'topic' : 'is TCS leveraging on AI for its business growth?'})
+    ## Many topics ? Put them in a file, one per line, and run them all in one go (results in 'topics.results.jsonl') :
+    ##   python run_crew.py batch collab topics.txt --concurrency 4 --rpm 30
 
-result = crew.kickoff (inputs={'topic' : 'AI in software industry'})
-# result = crew.kickoff (inputs={'topic' : 'Role of Indian IT industry in AI field'})
-# result = crew.kickoff (inputs={'topic' : 'is TCS leveraging on AI for its business growth?'})
+    #print (result)
 
-#print (result)
+    ## Time spent per task / step / LLM call, and trace files (open the .trace.json in chrome://tracing or ui.perfetto.dev)
+    print (tracer.summary ())
+    print (tracer.export ('collaborating_agents'))
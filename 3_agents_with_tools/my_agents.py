@@ -1,65 +1,73 @@
 from crewai import Agent, Task
-from crewai.tools import tool
 from datetime import datetime
+import os
+import sys
 
-## Use a web search tool from lang chain community.
-from langchain_community.tools import DuckDuckGoSearchRun
+## Shared helpers live in 'crew_common' at the top of the repository. Make it importable when running from this folder
+sys.path.append (os.path.dirname (os.path.dirname (os.path.abspath (__file__))))
 
-## Your environment variables need to be stored in '.env' file. That is loaded into the program
-## environment variale contains your API key
-from dotenv import load_dotenv
-
-# loading env
-load_dotenv ()
+## Use the shared DuckDuckGo web search tool (one client, cached results and rate limited, same tool as the investment advisor)
+## The search client itself is only imported on the first search
+from crew_common.search import search_tool
 
-## Current time and date
-Now = datetime.now ()
-Today = Now.strftime ("%d-%b-%Y")
+## 'make_llm' gives the model, going through the record / replay cache of LLM answers when 'CREW_LLM_CACHE' is set
+## Your environment variables need to be stored in '.env' file. It is loaded when the model is first used
+## environment variale contains your API key
+from crew_common.llm_cache import make_llm
 
-## Making a tool form lang chain into a typical tool in crew AI
-@tool("DuckDuckGo Search")
-def search_tool(search_query: str) :
-    """Search the internet for information on a given topic"""
-    # Call the tool
-    return DuckDuckGoSearchRun ().run (search_query)
+## Current date, taken when the agents are made (a long running process keeps the right day)
+def today ():
+    return datetime.now ().strftime ("%d-%b-%Y")
 
 ## Here we are defining 3 agents, for different purpose. Its stated in the role and goal
+## Each agent is made by a function : importing this file builds nothing, and every crew gets its own agents.
 
 ## Agent designed to gather information about a topic from internet. Agent is given search tool to get results
 ## Back story sets the context for the agent. Also Agent is set to current day scenario to make it clear context
-content_explorer = Agent (
-    role = 'data researcher',
-    goal = 'Gather and provide latest information about the topic from internet',    
-    # llm = 'groq/llama3-70b-8192',
-    llm = 'gpt-4o-mini',
-    verbose = True,    
-    backstory = ('You are an expert researcher, who can gather detailed information about a topic. \
-                  Consider you are on : '+Today),
-    tools = [search_tool],
-    cache = True,
-    max_iter = 5
-)
+def make_content_explorer ():
+    return Agent (
+        role = 'data researcher',
+        goal = 'Gather and provide latest information about the topic from internet',    
+        # llm = make_llm ('groq/llama3-70b-8192'),
+        llm = make_llm ('gpt-4o-mini'),
+        verbose = True,    
+        backstory = ('You are an expert researcher, who can gather detailed information about a topic. \
+                      Consider you are on : '+today ()),
+        tools = [search_tool],
+        cache = True,
+        max_iter = 5
+    )
 
 ## Agent designed to as a financial data analyst. It requires financial data and can make analysis out of it.
 ## Back story sets the context for the agent.
-analyst = Agent (
-    role = 'Data Analyst',
-    goal = 'Consolidate financial data, stock information and provide a summary',    
-    # llm = 'groq/llama3-70b-8192',
-    llm = 'gpt-4o-mini',
-    verbose = True,    
-    backstory = ('You are an expert in analysing financial data and stock related information to make it into a analysis summary.\
-                 Consider you are on '+Today),
-)
+def make_analyst ():
+    return Agent (
+        role = 'Data Analyst',
+        goal = 'Consolidate financial data, stock information and provide a summary',    
+        # llm = make_llm ('groq/llama3-70b-8192'),
+        llm = make_llm ('gpt-4o-mini'),
+        verbose = True,    
+        backstory = ('You are an expert in analysing financial data and stock related information to make it into a analysis summary.\
+                     Consider you are on '+today ()),
+    )
 
 ## Agent designed to be a financial expert, who can make investment recommendation
-fin_expert = Agent (
-    role = 'Financial Expert',
-    goal = 'Considering Financial analysis of a stock, make investment recommendation',    
-    # llm = 'groq/llama3-70b-8192',
-    llm = 'gpt-4o-mini',
-    verbose = True,    
-    backstory = ('You are financial advisor, who can provide investment recommendation.\
-                 Consider the financial analysis and make recommendation whether to buy a stock or not.\
-                 Consider you are on '+Today),
-)
+def make_fin_expert ():
+    return Agent (
+        role = 'Financial Expert',
+        goal = 'Considering Financial analysis of a stock, make investment recommendation',    
+        # llm = make_llm ('groq/llama3-70b-8192'),
+        llm = make_llm ('gpt-4o-mini'),
+        verbose = True,    
+        backstory = ('You are financial advisor, who can provide investment recommendation.\
+                     Consider the financial analysis and make recommendation whether to buy a stock or not.\
+                     Consider you are on '+today ()),
+    )
+
+## All the agents of the crew, by name
+def build_agents ():
+    return {
+        'content_explorer' : make_content_explorer (),
+        'analyst' : make_analyst (),
+        'fin_expert' : make_fin_expert (),
+    }
@@ -1,23 +1,54 @@
 from crewai import Crew, Process, Task
-from my_agents import content_explorer, analyst, fin_expert
-from my_tasks import get_company_financials, Anlayse, Advise
-from datetime import datetime
+from my_agents import build_agents
+from my_tasks import build_tasks
+from crew_common.run_store import record_run
+from crew_common.scheduler import kickoff_parallel
+from crew_common.task_cache import task_cache_from_env
+from crew_common.tracing import tracer, step_callback, task_callback
 
-## function to print Current time stamp
-def timestamp(Input):
-    print(datetime.now())
+## Every task, agent step, LLM call and tool call is recorded by the tracer, with its duration.
+## 'step_callback' / 'task_callback' (of the tracer) are given to the crew for the steps and tasks.
+
+## Input used when none is given
+DEFAULT_INPUTS = {'stock' : 'Tata Steel'}
+
+## Tokens of context a task gets from the task before it. Over budget, its output is cut down to the key facts
+## (numbers, dates, headlines), see crew_common/context_budget.py. 'CREW_CONTEXT_BUDGET=0' gives the full output
+CONTEXT_BUDGET = {'analyse' : 1000, 'advise' : 600}
 
 ## The Crew playes the role of financial advisor (with current data taken from internet, make analysis and recommend)
 ## Crew has is composed of agents and tasks to achive the purpose
 ## Done by performing 3 tasks sequentially. Crew agents collaborate and achive the final result
-crew = Crew (
-    agents = [content_explorer, analyst, fin_expert],
-    tasks = [get_company_financials, Anlayse, Advise],
-    verbose = True,
-    Process = Process.sequential,
-    step_callback = timestamp
-)
+def build_crew (verbose = True):
+    agents = build_agents ()
+    return Crew (
+        agents = list (agents.values ()),
+        tasks = build_tasks (agents),
+        verbose = verbose,
+        Process = Process.sequential,
+        step_callback = step_callback,
+        task_callback = task_callback
+    )
+
+## Tasks run through the scheduler (one after the other here, each needs the previous one), which can skip the tasks
+## whose inputs didn't change since the last run when 'CREW_TASK_CACHE=1' is set
+def kickoff (inputs = None, crew = None):
+    crew = crew or build_crew ()
+    return kickoff_parallel (crew, inputs = inputs or DEFAULT_INPUTS, max_workers = 1, task_cache = task_cache_from_env (),
+                             context_budget = CONTEXT_BUDGET)
+    # return crew.kickoff (inputs = inputs or DEFAULT_INPUTS)
+
+## Run the crew only when this file is executed, not when it is imported (e.g. by 'run_crew.py' or the benchmarks)
+if __name__ == '__main__':
+    ## The run is kept in the run store ('runs.sqlite', see crew_common/run_store.py), the output files are written too
+    inputs = {'stock' : 'Tata Steel'}
+    crew = build_crew ()
+    with tracer.span ('kickoff'), record_run ('research', inputs, crew, output_files = True) as run:
+        result = kickoff (inputs, crew)
+        run.done (result, crew)
 
-result = crew.kickoff (inputs={'stock' : 'Tata Steel'})
+    #print (result)
 
-#print (result)
+    ## Time spent per task / step / LLM call / tool call, and trace files (open the .trace.json in chrome://tracing or ui.perfetto.dev)
+    print (tracer.summary ())
+    print (tracer.export ('agents_with_tools'))
@@ -0,0 +1,46 @@
+import glob
+import io
+import os
+import sys
+
+import pandas as pd
+
+## Benchmark of the income statement payload sent to the LLM : full JSON (previous output of 'get_income_statements')
+## against the compact table. Runs offline on the sample frames in 'samples/income_statements', which are stored
+## in the same layout as yfinance's 'financials.to_json(orient="index")'. The samples are synthetic : made up figures
+## shaped like a bank, an IT services and a steel company, not the statements of any listed stock.
+## Add more files there to compare other stocks.
+##
+##   python bench_income_statements.py
+
+from my_statements import compact_income_statement
+
+sys.path.append (os.path.dirname (os.path.dirname (os.path.abspath (__file__))))
+from crew_common.tokens import count_tokens, token_counter_name
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples", "income_statements")
+
+def load_sample(path):
+    with open(path, encoding="utf-8") as sample:
+        frame = pd.read_json(io.StringIO(sample.read()), orient="index")
+    frame.columns = pd.to_datetime(frame.columns, unit="ms") if frame.columns.dtype.kind in "iu" else pd.to_datetime(frame.columns)
+    return frame
+
+def main():
+    print(f"Token counts : {token_counter_name()}")
+    print(f"{'Sample':<16}{'full chars':>12}{'full tokens':>13}{'compact chars':>15}{'compact tokens':>16}{'saved':>8}")
+    total_full = total_compact = 0
+    for path in sorted(glob.glob(os.path.join(SAMPLES, "*.json"))):
+        symbol = os.path.basename(path)[:-len(".json")]
+        frame = load_sample(path)
+        full = frame.to_json(orient="index")
+        compact = compact_income_statement(frame, symbol)
+        full_tokens, compact_tokens = count_tokens(full), count_tokens(compact)
+        total_full += full_tokens
+        total_compact += compact_tokens
+        print(f"{symbol:<16}{len(full):>12}{full_tokens:>13}{len(compact):>15}{compact_tokens:>16}{1 - compact_tokens / full_tokens:>8.0%}")
+    if total_full:
+        print(f"Total prompt tokens : {total_full} -> {total_compact} ({1 - total_compact / total_full:.0%} less)")
+
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,96 @@
 from crewai import Agent, Task
-from crewai.tools import tool
 from datetime import datetime
 
-## Use a web search tool from lang chain community.
-from langchain_community.tools import DuckDuckGoSearchRun
+## Use the custom tools built. Yahoo Finance is only imported when a tool first asks for data
+from my_tools import get_current_stock_price, get_company_info, get_income_statements, get_price_history, find_stock_symbol
 
-## Use the custom tools built
-from my_tools import get_current_stock_price, get_company_info, get_income_statements
+## Use the shared DuckDuckGo web search tool (one client, cached results and rate limited). 'my_tools' made 'crew_common' importable
+from crew_common.search import search_tool
 
-## Your environment variables need to be stored in '.env' file. That is loaded into the program
+## 'make_routed_llm' gives a tier of models instead of one model ('fast', 'default', 'strong'). Each call goes to the fastest healthy
+## model of the tier (OpenAI or Groq, whichever has an API key), moves on to the next one on errors / rate limits,
+## and slow calls are sent to a second model too. See crew_common/router.py to change the models of a tier.
+## Every model goes through the record / replay cache of LLM answers when 'CREW_LLM_CACHE' is set ('make_llm' gives a single model)
+## Your environment variables need to be stored in '.env' file. It is loaded when the model is first used
 ## environment variale contains your API key
-from dotenv import load_dotenv
+from crew_common.router import make_routed_llm
 
-# loading env
-load_dotenv ()
-
-## Current time and date
-Now = datetime.now ()
-Today = Now.strftime ("%d-%b-%Y")
-
-## Making a tool from lang chain into a typical tool in crew AI
-@tool("DuckDuckGo Search")
-def search_tool(search_query: str) :
-    """Search the internet for information on a given topic"""
-    # Call the tool
-    return DuckDuckGoSearchRun ().run (search_query)
+## Current date, taken when the agents are made (a long running process keeps the right day)
+def today ():
+    return datetime.now ().strftime ("%d-%b-%Y")
 
 ## Here we are defining 4 agents, for different purpose. Its stated in the role and goal
+## Each agent is made by a function : importing this file builds nothing, and every crew gets its own agents.
 
 ## Agent designed to gather news and about a company internet. Agent is given search tool to get results
 ## Back story sets the context for the agent. Also Agent is set to current day scenario to make it clear context
-news_info_explorer = Agent (
-    role = 'news and info researcher',
-    goal = 'Gather and provide latest information and news about a company from internet and sythesise',    
-    # llm = 'groq/llama3-70b-8192',
-    llm = 'gpt-4o-mini',
-    verbose = True,    
-    backstory = ('You are an expert researcher, who can gather detailed information about a company. \
-                  Consider you are on : '+Today),
-    tools = [search_tool],
-    cache = True,
-    max_iter = 5
-)
+def make_news_info_explorer ():
+    return Agent (
+        role = 'news and info researcher',
+        goal = 'Gather and provide latest information and news about a company from internet and sythesise',    
+        ## Summarising news is simple work : a small, quick model
+        llm = make_routed_llm ('fast'),
+        verbose = True,    
+        backstory = ('You are an expert researcher, who can gather detailed information about a company. \
+                      Consider you are on : '+today ()),
+        tools = [search_tool],
+        cache = True,
+        max_iter = 5
+    )
 
 ## Agent to specifically get financial data of the company.
-data_explorer = Agent (
-    role = 'data researcher',
-    goal = 'Gather and provide financial data and company information about a stock',    
-    # llm = 'groq/llama3-70b-8192',
-    llm = 'gpt-4o-mini',
-    verbose = True,    
-    backstory = ("You are an expert researcher, who can gather detailed information about a company or stock. \
-                  When you use the tools, add suffix '.NS' to symbol agrument. Consider you are on : "+Today),
-    tools = [get_company_info, get_income_statements],
-    cache = True,
-    max_iter = 5
-)
+## The crew looks the stock symbol up before kickoff (see my_symbols.py) : agents use it as given, instead of guessing it from the name.
+## When the name was ambiguous or unknown, the task says so and the agent finds the symbol with 'find_stock_symbol'.
+def make_data_explorer ():
+    return Agent (
+        role = 'data researcher',
+        goal = 'Gather and provide financial data and company information about a stock',    
+        llm = make_routed_llm ('default'),
+        verbose = True,    
+        backstory = ("You are an expert researcher, who can gather detailed information about a company or stock. \
+                      When the task gives the stock symbol (like 'HDFCBANK.NS'), use it as it is with the tools. \
+                      Otherwise find it first with the 'Find stock symbol' tool. Consider you are on : "+today ()),
+        tools = [get_company_info, get_income_statements, get_price_history, find_stock_symbol],
+        cache = True,
+        max_iter = 5
+    )
 
 ## Agent designed to as a financial data analyst. It requires financial data and can make analysis out of it.
 ## Back story sets the context for the agent.
-analyst = Agent (
-    role = 'Data Analyst',
-    goal = 'Consolidate financial data, stock information and provide a summary',    
-    # llm = 'groq/llama3-70b-8192',
-    llm = 'gpt-4o-mini',
-    verbose = True,    
-    backstory = ("You are an expert in analysing financial data of a company, stock / company related current inforamtionand make it into a analysis summary.\
-                  You are making analyis about indian companies. Use indian units for numbers (lakh, crore) accordingly.\
-                 Consider you are on "+Today),
-)
+def make_analyst ():
+    return Agent (
+        role = 'Data Analyst',
+        goal = 'Consolidate financial data, stock information and provide a summary',    
+        llm = make_routed_llm ('default'),
+        verbose = True,    
+        backstory = ("You are an expert in analysing financial data of a company, stock / company related current inforamtionand make it into a analysis summary.\
+                      You are making analyis about indian companies. Use indian units for numbers (lakh, crore) accordingly.\
+                     Consider you are on "+today ()),
+    )
 
 ## This is the expert who is going to make a call about investment.
-fin_expert = Agent (
-    role = 'Financial Expert',
-    goal = 'Considering Financial analysis of a stock, make investment recommendation',    
-    # llm = 'groq/llama3-70b-8192',
-    llm = 'gpt-4o-mini',
-    verbose = True,
-    tools = [get_current_stock_price],
-    max_iter = 5,
-    backstory = ("You are an expert financial advisor who can provide investment recommendation.\
-                 Consider the financial analysis, current information about company, current stock price \
-                 and make recommendation whether to buy a stock or not.\
-                 When you use the tools, add suffix '.NS' to symbol agrument.\
-                 Consider you are on "+Today),
-)
+def make_fin_expert ():
+    return Agent (
+        role = 'Financial Expert',
+        goal = 'Considering Financial analysis of a stock, make investment recommendation',    
+        ## The recommendation is the result that matters : the strongest model
+        llm = make_routed_llm ('strong'),
+        verbose = True,
+        tools = [get_current_stock_price, find_stock_symbol],
+        max_iter = 5,
+        backstory = ("You are an expert financial advisor who can provide investment recommendation.\
+                     Consider the financial analysis, current information about company, current stock price \
+                     and make recommendation whether to buy a stock or not.\
+                     When the task gives the stock symbol (like 'HDFCBANK.NS'), use it as it is with the tools.\
+                     Otherwise find it first with the 'Find stock symbol' tool.\
+                     Consider you are on "+today ()),
+    )
+
+## All the agents of the crew, by name
+def build_agents ():
+    return {
+        'data_explorer' : make_data_explorer (),
+        'news_info_explorer' : make_news_info_explorer (),
+        'analyst' : make_analyst (),
+        'fin_expert' : make_fin_expert (),
+    }
@@ -1,23 +1,68 @@
 from crewai import Crew, Process, Task
-from my_agents import news_info_explorer, data_explorer, analyst, fin_expert
-from my_tasks import get_company_financials, get_company_news, analyse, advise
-from datetime import datetime
+from my_agents import build_agents
+from my_tasks import build_tasks
+from my_symbols import with_symbol
+from crew_common.run_store import record_run
+from crew_common.scheduler import kickoff_parallel
+from crew_common.task_cache import task_cache_from_env
+from crew_common.tracing import tracer, step_callback, task_callback
 
-## function to print Current time stamp
-def timestamp(Input):
-    print(datetime.now())
+## Every task, agent step, LLM call and tool call is recorded by the tracer, with its duration.
+## 'step_callback' / 'task_callback' (of the tracer) are given to the crew for the steps and tasks.
+
+## Input used when none is given
+DEFAULT_INPUTS = {'stock' : 'Hdfc Bank'}
+
+## Incremental runs ('CREW_TASK_CACHE=1') : a task whose inputs didn't change reuses its last output, if not older than this (seconds).
+## Financial statements change by the quarter, news by the hour. Other tasks : 'CREW_TASK_CACHE_MAX_AGE' (6 hours).
+## 'advise' is run again anyway when the stock price it used has changed
+TASK_MAX_AGE = {'get_company_financials' : 24 * 60 * 60, 'get_company_news' : 60 * 60}
+
+## Tokens of context a task gets from the tasks before it. Over budget, their outputs are cut down to the key facts
+## (numbers, dates, headlines), duplicates out (see crew_common/context_budget.py). 'CREW_CONTEXT_BUDGET=0' gives the full outputs
+CONTEXT_BUDGET = {'analyse' : 1200, 'advise' : 600}
 
 ## Crew has 4 tasks to do. Its composed of 4 agents.
 ## Overall objective is to perform task of Making a investment advise about the stock
-## Done by performing 4 tasks sequentially. Crew agents collaborate and achive the final result
-crew = Crew (
-    agents = [data_explorer, news_info_explorer, analyst, fin_expert],
-    tasks = [get_company_financials, get_company_news, analyse, advise],
-    verbose = True,
-    Process = Process.sequential,
-    step_callback = timestamp
-)
-
-result = crew.kickoff (inputs={'stock' : 'Hdfc Bank'})
-
-#print (result)
+## Tasks are done in the order of their dependencies (context). Financial data and news are gathered in parallel,
+## analysis starts when both are ready, and advise follows. Crew agents collaborate and achive the final result
+def build_crew (verbose = True):
+    agents = build_agents ()
+    return Crew (
+        agents = list (agents.values ()),
+        tasks = build_tasks (agents),
+        verbose = verbose,
+        Process = Process.sequential,
+        step_callback = step_callback,
+        task_callback = task_callback
+    )
+
+## The stock symbol is looked up once here, in the local NSE listings, and given to the tasks as {symbol} (unless the inputs have it)
+def complete_inputs (inputs = None):
+    return with_symbol (inputs or DEFAULT_INPUTS)
+
+## Run independent tasks at the same time : the two research tasks don't wait for each other, and the news task gets no context.
+## 'crew.kickoff' (below) runs them one after the other. With older crewai releases it also gives the news task the financial data
+## (see crew_common/scheduler.py), so its result can differ
+def kickoff (inputs = None, crew = None, max_workers = 2):
+    crew = crew or build_crew ()
+    inputs = complete_inputs (inputs)
+    return kickoff_parallel (crew, inputs = inputs, max_workers = max_workers,
+                             task_cache = task_cache_from_env (), max_age = TASK_MAX_AGE, context_budget = CONTEXT_BUDGET)
+    # return crew.kickoff (inputs = inputs)
+
+## Run only when started as a script. 'my_portfolio.py' and 'run_crew.py' use the functions above
+if __name__ == '__main__':
+    ## The run is kept in the run store ('runs.sqlite', see crew_common/run_store.py) under its symbol, the output files are written too
+    inputs = complete_inputs ({'stock' : 'Hdfc Bank'})
+    crew = build_crew ()
+    with tracer.span ('kickoff'), record_run ('advisor', inputs, crew, output_files = True) as run:
+        result = kickoff (inputs, crew)
+        run.done (result, crew)
+
+    #print (result)
+
+    ## Time spent per task / step / LLM call / tool call (Yahoo, DuckDuckGo), cache hits, and trace files
+    ## (open the .trace.json in chrome://tracing or ui.perfetto.dev)
+    print (tracer.summary ())
+    print (tracer.export ('investment_advisor'))
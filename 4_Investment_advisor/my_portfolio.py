@@ -0,0 +1,159 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+## The crew and the market data cache used by the tools
+from my_crew import build_crew, kickoff
+from my_tools import CACHE_TTL, cache_key, market_cache
+## Each stock's run is kept in the run store ('runs.sqlite'), like the runs of 'run_crew.py'
+from crew_common.run_store import record_run
+## Company names or symbols -> Yahoo Finance symbols, from the local NSE listings
+from my_symbols import to_nse_symbol
+## Daily price history kept on disk, for the 'Get price history' tool
+from my_prices import sync as sync_price_history
+
+## Portfolio mode : analyse a whole watchlist of NSE stocks in one go.
+## 1. Market data for all the stocks is fetched up front, in bulk, and put in the tools' cache.
+##    The price history of all the stocks is brought up to date in the same way (a few 'yf.download' requests).
+##    When the agents later call the tools, the data is already there and no network call is made.
+## 2. One crew per stock is run on a bounded pool of workers.
+## 3. The recommendations are collected in one report.
+
+## Number of symbols per 'yf.download' request
+DOWNLOAD_CHUNK = 100
+## Prefetched prices are kept for the whole portfolio run (seconds), not the tools' 1 minute : the agents ask for them
+## minutes after the prefetch, and an expired price would be one more request per stock
+PREFETCH_PRICE_TTL = 2 * 60 * 60
+
+def _prefetch_prices(symbols):
+    ## Imported on first use, like in 'my_tools'
+    import yfinance as yf
+
+    ## One request returns the last bars of many symbols. Last close is the price. Returns the number of requests
+    requests = 0
+    for start in range(0, len(symbols), DOWNLOAD_CHUNK):
+        chunk = symbols[start:start + DOWNLOAD_CHUNK]
+        requests += 1
+        bars = yf.download(chunk, period="5d", interval="1d", group_by="ticker", progress=False, threads=True)
+        if bars is None or bars.empty:
+            continue
+        for symbol in chunk:
+            try:
+                closes = bars[symbol]["Close"].dropna()
+            except KeyError:
+                continue
+            if not closes.empty:
+                market_cache.set(cache_key("price", symbol), float(closes.iloc[-1]), ttl=PREFETCH_PRICE_TTL)
+    return requests
+
+def _prefetch_fundamentals(tickers, symbol):
+    ## Two requests per symbol (info, financials), unless already cached. Returns the number of requests
+    ## ('in' doesn't count a cache miss : the stats only count the tools' lookups)
+    ticker = tickers.tickers[symbol]
+    requests = 0
+    for kind, attribute in (("info", "info"), ("financials", "financials")):
+        key = cache_key(kind, symbol)
+        if key in market_cache:
+            continue
+        requests += 1
+        data = getattr(ticker, attribute)
+        if data is not None and len(data):
+            market_cache.set(key, data, ttl=CACHE_TTL[kind])
+    return requests
+
+def prefetch_market_data(symbols, max_workers=8):
+    """Fill the market data cache for all the symbols: prices in batched downloads, info and financials concurrently.
+
+    Args:
+        symbols (list): NSE symbols with the '.NS' suffix.
+        max_workers (int): Number of concurrent fundamentals requests.
+
+    Returns:
+        dict: Requests made to Yahoo for the prices (one per DOWNLOAD_CHUNK symbols) and the fundamentals (two per symbol).
+    """
+    import yfinance as yf
+
+    requests = {"prices": _prefetch_prices(symbols), "fundamentals": 0}
+    try:
+        sync_price_history(symbols)
+    except Exception as e:
+        print(f"Could not sync the price history: {e}")
+    ## Yahoo has no bulk endpoint for fundamentals. One 'Tickers' object shares the session, and the requests run concurrently
+    tickers = yf.Tickers(" ".join(symbols))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_prefetch_fundamentals, tickers, symbol): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            try:
+                requests["fundamentals"] += future.result()
+            except Exception as e:
+                print(f"Could not prefetch data for {futures[future]}: {e}")
+    return requests
+
+def analyse_stock(symbol):
+    ## Every stock gets its own crew, so the runs don't share task outputs
+    stock_crew = build_crew(verbose=False)
+    for task in stock_crew.tasks:
+        task.output_file = None
+    inputs = {"stock": symbol, "symbol": symbol}
+    with record_run("advisor", inputs, stock_crew) as run:
+        result = kickoff(inputs, crew=stock_crew)
+        run.done(result, stock_crew)
+    return result.raw
+
+def run_portfolio(stocks, max_workers=4, report_file="Portfolio.md"):
+    """Run the investment advisor crew for every stock of a watchlist and write one report.
+
+    Args:
+        stocks (list): Stock symbols or names, e.g. ['HDFCBANK', 'TCS.NS', 'Tata Steel'].
+        max_workers (int): Number of crews running at the same time.
+        report_file (str): Markdown file collecting all the recommendations.
+
+    Returns:
+        dict: Recommendation (or error message) per symbol.
+    """
+    resolved = {stock: to_nse_symbol(stock) for stock in stocks}
+    for stock, symbol in resolved.items():
+        if symbol is None:
+            print(f"Skipping '{stock}' : not a listed company or several match, give its symbol (e.g. TATASTEEL.NS)")
+    symbols = list(dict.fromkeys(symbol for symbol in resolved.values() if symbol))
+    started = time.time()
+    requests = prefetch_market_data(symbols)
+    print(f"Prefetched market data for {len(symbols)} stocks in {time.time() - started:.1f}s "
+          f"({requests['prices']} price requests, {requests['fundamentals']} fundamentals requests)")
+    ## Every cache miss of the tools while the crews run is one more request to Yahoo
+    misses_before = market_cache.stats()["misses"]
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(analyse_stock, symbol): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                results[symbol] = f"Error analysing {symbol}: {e}"
+
+    elapsed = time.time() - started
+    requests["tools"] = market_cache.stats()["misses"] - misses_before
+    print(f"Market data requests : {sum(requests.values())} ({requests['tools']} made by the tools while the crews ran)")
+    with open(report_file, "w", encoding="utf-8") as report:
+        report.write(f"# Portfolio recommendations - {datetime.now().strftime('%d-%b-%Y')}\n\n")
+        for symbol in symbols:
+            report.write(f"## {symbol}\n\n{results[symbol]}\n\n")
+    print(f"Analysed {len(symbols)} stocks in {elapsed:.1f}s ({len(symbols) * 60 / elapsed:.1f} stocks/minute)")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the investment advisor crew over a watchlist")
+    parser.add_argument("stocks", nargs="*", help="NSE symbols, e.g. HDFCBANK TCS INFY")
+    parser.add_argument("--watchlist", help="Text file with one symbol per line")
+    parser.add_argument("--workers", type=int, default=4, help="Number of crews running at the same time")
+    parser.add_argument("--report", default="Portfolio.md")
+    args = parser.parse_args()
+
+    stocks = list(args.stocks)
+    if args.watchlist:
+        with open(args.watchlist, encoding="utf-8") as watchlist:
+            stocks += [line.strip() for line in watchlist if line.strip() and not line.startswith("#")]
+    run_portfolio(stocks, max_workers=args.workers, report_file=args.report)
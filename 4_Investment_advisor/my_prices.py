@@ -0,0 +1,358 @@
+import mmap
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+
+## Daily price history of the stocks, kept on disk, with the trend indicators computed locally.
+## Yahoo's 'fiftyDayAverage' / 'fiftyTwoWeekLow' (in 'get_company_info') are a snapshot : no returns, volatility or drawdown.
+## Here the daily bars of each symbol are stored in a folder of their own, one binary file per column
+## (date, open, high, low, close, volume), read back as memory-mapped NumPy arrays : loading years of history is a file
+## mapping, not a download, and indicators are NumPy operations on whole columns.
+##
+## Syncing only downloads the bars after the last stored one, for many symbols in one 'yf.download' request.
+## The last stored bar is downloaded again (it may have been taken during the trading day) and replaced.
+## When Yahoo changed an older close (prices adjusted for a dividend or split), the symbol's history is loaded again in full.
+## A symbol synced less than SYNC_TTL seconds ago is not synced again.
+##
+## Kept in 'PRICE_HISTORY_PATH' (default 'price_history'). Try it : python my_prices.py HDFCBANK TCS INFY
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+## Days of history loaded for a new symbol : enough for 1 year returns and the 200 day average a year back
+HISTORY_DAYS = 2 * 366
+SYNC_TTL = 60 * 60
+## Symbols per 'yf.download' request
+DOWNLOAD_CHUNK = 100
+## Change of an already stored close (relative) taken as a price adjustment
+ADJUSTMENT_TOLERANCE = 1e-3
+
+## Trading days in the periods of the indicators
+TRADING_DAYS = 252
+RETURN_PERIODS = {"1w": 5, "1m": 21, "3m": 63, "6m": 126, "1y": 252}
+AVERAGES = (20, 50, 200)
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def store_path():
+    return os.environ.get("PRICE_HISTORY_PATH", "price_history")
+
+
+def _folder(symbol):
+    return os.path.join(store_path(), symbol.strip().upper())
+
+
+def _file(symbol, column):
+    return os.path.join(_folder(symbol), column + (".i8" if column == "date" else ".f8"))
+
+
+def _lock(symbol):
+    with _locks_lock:
+        return _locks.setdefault(symbol.strip().upper(), threading.Lock())
+
+
+def _map(path, dtype):
+    ## Read only view of a column file. Columns can differ in length after an interrupted append : see 'load'
+    ## (a plain 'mmap' under the array : much cheaper to open than 'np.memmap', and closed with the last view of it)
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    itemsize = np.dtype(dtype).itemsize
+    if size < itemsize:
+        return np.empty(0, dtype)
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return np.frombuffer(mapped, dtype=dtype, count=size // itemsize)
+
+
+def load(symbol, columns=COLUMNS):
+    """Stored daily bars of a symbol, as memory-mapped arrays (no download).
+
+    Args:
+        symbol (str): Yahoo Finance symbol.
+        columns (tuple): Columns to map, besides the dates.
+
+    Returns:
+        dict: 'date' (datetime64[D]) and the columns (float64), of the same length. Empty arrays when nothing is stored.
+    """
+    bars = {"date": _map(_file(symbol, "date"), np.int64)}
+    for column in columns:
+        bars[column] = _map(_file(symbol, column), np.float64)
+    length = min(len(values) for values in bars.values())
+    bars = {column: values[:length] for column, values in bars.items()}
+    bars["date"] = bars["date"].view("datetime64[D]")
+    return bars
+
+
+def last_synced(symbol):
+    """Time of the symbol's last sync (seconds since the epoch), 0 when never synced."""
+    try:
+        return os.path.getmtime(_file(symbol, "date"))
+    except OSError:
+        return 0.0
+
+
+## ---- writing
+
+def _frame_columns(frame):
+    ## Bars of a 'yf.download' frame : dates (days since the epoch) and the COLUMNS, rows without a close left out
+    frame = frame.rename(columns=str.lower)
+    frame = frame[frame["close"].notna()] if "close" in frame else frame.iloc[0:0]
+    dates = np.asarray(frame.index.values, dtype="datetime64[D]").astype(np.int64)
+    values = {column: np.asarray(frame[column], dtype=np.float64) if column in frame else np.full(len(frame), np.nan)
+              for column in COLUMNS}
+    return dates, values
+
+
+def _rewrite(symbol, dates, values):
+    ## Whole history of a symbol : new files, put in place of the old ones
+    os.makedirs(_folder(symbol), exist_ok=True)
+    for column, data in (("date", dates), *values.items()):
+        path = _file(symbol, column)
+        data.tofile(path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+
+def _append(symbol, dates, values, start):
+    ## Rows from 'start' on : written over the stored rows from that position, the others added at the end
+    for column, data in (("date", dates), *values.items()):
+        with open(_file(symbol, column), "r+b") as file:
+            file.seek(start * data.itemsize)
+            file.write(data.tobytes())
+            file.truncate()
+
+
+def _store(symbol, frame):
+    ## Merge downloaded bars into the stored history. Returns False when the history has to be loaded again in full
+    dates, values = _frame_columns(frame)
+    ## Copies, so that no file is still mapped while it is written (Windows doesn't allow it)
+    stored = load(symbol, ("close",))
+    stored_dates, stored_close = stored["date"].astype(np.int64), np.array(stored["close"])
+    del stored
+    if len(stored_dates) == 0:
+        _rewrite(symbol, dates, values)
+        return True
+    ## Closes already stored (except the last one, which may have been taken during the day) must not have changed
+    overlap = np.isin(dates, stored_dates[:-1])
+    if overlap.any():
+        old = stored_close[np.searchsorted(stored_dates, dates[overlap])]
+        if np.any(np.abs(values["close"][overlap] - old) > ADJUSTMENT_TOLERANCE * np.abs(old)):
+            return False
+    new = dates >= stored_dates[-1]
+    if new.any():
+        _append(symbol, dates[new], {column: data[new] for column, data in values.items()},
+                int(np.searchsorted(stored_dates, dates[new][0])))
+    return True
+
+
+def _download(symbols, start):
+    import yfinance as yf
+
+    bars = yf.download(symbols, start=str(start), interval="1d", group_by="ticker", auto_adjust=True,
+                       progress=False, threads=True)
+    frames = {}
+    if bars is None or bars.empty:
+        return frames
+    for symbol in symbols:
+        if getattr(bars.columns, "nlevels", 1) > 1:
+            if symbol in bars.columns.get_level_values(0):
+                frames[symbol] = bars[symbol]
+        elif len(symbols) == 1:
+            frames[symbol] = bars
+    return frames
+
+
+def sync(symbols, force=False):
+    """Bring the stored history of the symbols up to date, downloading only the bars they miss.
+
+    Symbols needing the same start date are downloaded together (DOWNLOAD_CHUNK at a time).
+
+    Args:
+        symbols (list): Yahoo Finance symbols ('HDFCBANK.NS').
+        force (bool): Sync even the symbols synced less than SYNC_TTL seconds ago.
+
+    Returns:
+        dict: Symbols synced, downloads made and bars stored per symbol.
+    """
+    symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols))
+    today = np.datetime64("today", "D")
+    starts = {}
+    for symbol in symbols:
+        if not force and time.time() - last_synced(symbol) < SYNC_TTL:
+            continue
+        dates = load(symbol)["date"]
+        ## From the last but one bar : the last one is replaced, the one before checks for adjusted prices
+        start = dates[-min(2, len(dates))] if len(dates) else today - np.timedelta64(HISTORY_DAYS, "D")
+        starts.setdefault(start, []).append(symbol)
+
+    report = {"synced": 0, "downloads": 0, "bars": {}}
+    reload = []
+    for start, group in sorted(starts.items()):
+        for first in range(0, len(group), DOWNLOAD_CHUNK):
+            chunk = group[first:first + DOWNLOAD_CHUNK]
+            frames = _download(chunk, start)
+            report["downloads"] += 1
+            if not frames:
+                ## Nothing at all : more likely a failed request than no new bars. Tried again on the next call
+                continue
+            for symbol in chunk:
+                with _lock(symbol):
+                    if symbol in frames and not _store(symbol, frames[symbol]):
+                        reload.append(symbol)
+                        continue
+                    _touch(symbol)
+                report["synced"] += 1
+    ## Adjusted prices : the full history again, in one download
+    if reload:
+        start = today - np.timedelta64(HISTORY_DAYS, "D")
+        frames = _download(reload, start)
+        report["downloads"] += 1
+        for symbol in reload:
+            with _lock(symbol):
+                if symbol in frames:
+                    _rewrite(symbol, *_frame_columns(frames[symbol]))
+                _touch(symbol)
+            report["synced"] += 1
+    for symbol in symbols:
+        report["bars"][symbol] = len(load(symbol)["date"])
+    return report
+
+
+def _touch(symbol):
+    ## The sync time is the date file's modification time. Symbols without data get an empty one, and are not asked again soon
+    os.makedirs(_folder(symbol), exist_ok=True)
+    path = _file(symbol, "date")
+    with open(path, "ab"):
+        pass
+    os.utime(path)
+
+
+## ---- indicators, on (days x symbols) arrays
+
+def panel(symbols, column="close", days=HISTORY_DAYS):
+    """Stored values of several symbols on a common calendar (union of their trading days), for vectorized indicators.
+
+    Returns:
+        tuple: (dates, array of shape (dates, symbols)). NaN where a symbol has no bar for a date.
+    """
+    loaded = [load(symbol, (column,)) for symbol in symbols]
+    dates = np.unique(np.concatenate([bars["date"][-days:] for bars in loaded] or [np.empty(0, "datetime64[D]")]))
+    values = np.full((len(dates), len(symbols)), np.nan)
+    for position, bars in enumerate(loaded):
+        kept = bars["date"][-days:]
+        values[np.searchsorted(dates, kept), position] = bars[column][-days:]
+    ## A day one symbol didn't trade keeps its last close
+    return dates, _fill_forward(values)
+
+
+def _fill_forward(values):
+    rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled = values[rows, np.arange(values.shape[1])]
+    return filled
+
+
+def _window_sums(values, window):
+    ## Sum of each 'window' rows ending at every row from 'window - 1' on, from cumulative sums
+    sums = np.cumsum(values, axis=0)
+    return sums[window - 1:] - np.concatenate([np.zeros((1,) + values.shape[1:]), sums[:-window]])
+
+
+def moving_average(close, window):
+    """Simple moving average along the days (axis 0). NaN where the window isn't full (first days, missing history)."""
+    average = np.full(close.shape, np.nan)
+    if len(close) >= window:
+        missing = np.isnan(close)
+        full = _window_sums(missing.astype(np.int64), window) == 0
+        average[window - 1:] = np.where(full, _window_sums(np.where(missing, 0.0, close), window) / window, np.nan)
+    return average
+
+
+def log_returns(close):
+    """Daily log returns (one row less than 'close')."""
+    return np.diff(np.log(close), axis=0)
+
+
+def volatility(close, window=TRADING_DAYS):
+    """Annualised volatility of the daily returns over the last 'window' days, per symbol."""
+    returns = log_returns(close[-(window + 1):])
+    return np.nanstd(returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS) if len(returns) > 1 else np.full(close.shape[1:], np.nan)
+
+
+def drawdown(close):
+    """Drawdown of every day : how far the close is under its highest close so far (0 at a new high, -0.25 for 25 % under)."""
+    peaks = np.fmax.accumulate(close, axis=0)
+    return close / peaks - 1
+
+
+def period_returns(close, periods=RETURN_PERIODS):
+    """Returns of the last close over each period (in trading days), per symbol. NaN when the history is shorter."""
+    last = close[-1]
+    return {name: (last / close[-1 - days] - 1) if len(close) > days else np.full(last.shape, np.nan)
+            for name, days in periods.items()}
+
+
+def indicators(symbols, sync_first=True):
+    """Trend indicators of several symbols at once, from the stored history (synced first, when due).
+
+    Returns:
+        dict: Symbol -> indicators (last close and date, returns, moving averages, volatility, drawdowns, 52 week range).
+    """
+    symbols = [symbol.strip().upper() for symbol in symbols]
+    if sync_first:
+        sync(symbols)
+    dates, close = panel(symbols)
+    result = {}
+    if len(dates) == 0:
+        return {symbol: None for symbol in symbols}
+    ## Every indicator is computed for all the symbols at once (one value per column), then split per symbol
+    last = close[-1]
+    year = close[-TRADING_DAYS:]
+    returns = {name: ratio * 100 for name, ratio in period_returns(close).items()}
+    averages = {window: moving_average(close, window)[-1] for window in AVERAGES}
+    volatilities = {"1m": volatility(close, 21) * 100, "1y": volatility(close, TRADING_DAYS) * 100}
+    drawdowns = drawdown(year)
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        ## Symbols without history in the last year : all NaN columns, dropped below
+        warnings.simplefilter("ignore", RuntimeWarning)
+        extremes = {"drawdown": {"current": drawdowns[-1] * 100, "max_1y": np.nanmin(drawdowns, axis=0) * 100},
+                    "range": {"low": np.nanmin(year, axis=0), "high": np.nanmax(year, axis=0)}}
+    for position, symbol in enumerate(symbols):
+        if np.isnan(last[position]):
+            result[symbol] = None
+            continue
+
+        def value(array, digits=2):
+            number = float(array[position])
+            return None if np.isnan(number) else round(number, digits)
+
+        result[symbol] = {
+            "date": str(dates[-1]),
+            "close": round(float(last[position]), 2),
+            "returns_pct": {name: value(ratio) for name, ratio in returns.items()},
+            "moving_averages": {f"{window}d": value(average) for window, average in averages.items()},
+            "above_moving_average": {f"{window}d": None if np.isnan(average[position]) else bool(last[position] > average[position])
+                                     for window, average in averages.items()},
+            "volatility_pct": {name: value(deviation) for name, deviation in volatilities.items()},
+            "drawdown_pct": {name: value(ratio) for name, ratio in extremes["drawdown"].items()},
+            "range_52w": {name: value(price) for name, price in extremes["range"].items()},
+        }
+    return result
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    from my_symbols import to_nse_symbol
+
+    symbols = [symbol for symbol in map(to_nse_symbol, sys.argv[1:] or ["HDFCBANK", "TCS", "INFY"]) if symbol]
+    started = time.perf_counter()
+    print(json.dumps(sync(symbols), indent=2))
+    print(f"synced in {(time.perf_counter() - started) * 1000:.1f} ms")
+    started = time.perf_counter()
+    found = indicators(symbols, sync_first=False)
+    print(f"indicators in {(time.perf_counter() - started) * 1000:.1f} ms")
+    print(json.dumps(found, indent=2))
@@ -0,0 +1,105 @@
+import math
+
+## Compact text form of the income statement returned by Yahoo Finance ('yf.Ticker(symbol).financials').
+## The full statement has ~40 line items for 4-5 years, and as JSON it costs thousands of prompt tokens.
+## The analysis only needs a few key items of the last years, so the tool sends a small table instead :
+##
+##   Income statement HDFCBANK.NS (INR crore)
+##   Item|Mar-2024|Mar-2023|Mar-2022|YoY%
+##   Total Revenue|283649.0|170754.1|157263.0|+66.1
+##   ...
+
+## Line items kept by default, in this order (names as used by Yahoo Finance)
+KEY_LINE_ITEMS = [
+    "Total Revenue",
+    "Operating Revenue",
+    "Net Interest Income",
+    "Gross Profit",
+    "Operating Expense",
+    "Operating Income",
+    "EBITDA",
+    "EBIT",
+    "Interest Expense",
+    "Pretax Income",
+    "Tax Provision",
+    "Net Income",
+    "Diluted EPS",
+    "Basic EPS",
+]
+
+## Items which are per share values or ratios, shown as they are instead of in crore / lakh
+_UNSCALED_WORDS = ("EPS", "Rate")
+
+CRORE = 10_000_000
+LAKH = 100_000
+
+def _is_unscaled(item):
+    return any(word in item for word in _UNSCALED_WORDS)
+
+def _number(value, scale):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "-"
+    return f"{value / scale:.1f}" if scale != 1 else f"{value:.2f}"
+
+def _growth(latest, previous):
+    try:
+        if previous in (None, 0) or math.isnan(latest) or math.isnan(previous):
+            return "-"
+    except TypeError:
+        return "-"
+    return f"{(latest - previous) / abs(previous) * 100:+.1f}"
+
+def compact_income_statement(financials, symbol="", periods=3, items=KEY_LINE_ITEMS, max_chars=1200, currency="INR"):
+    """Render an income statement DataFrame as a small table for the LLM prompt.
+
+    Args:
+        financials (DataFrame): Income statement as returned by yfinance (line items as rows, period end dates as columns).
+        symbol (str): Stock symbol shown in the title.
+        periods (int): Number of most recent periods kept.
+        items (list): Line items kept, in this order. None keeps all of them.
+        max_chars (int): Hard size cap. Last rows are dropped until the table fits.
+        currency (str): Currency shown in the title.
+
+    Returns:
+        str: Pipe separated table, amounts in crore (or lakh for small companies), with year on year growth of the latest period.
+    """
+    if financials is None or financials.empty:
+        return f"No income statement available for {symbol}"
+
+    frame = financials[sorted(financials.columns, reverse=True)]
+    shown = frame.columns[:periods]
+    ## Items Yahoo has no values for (e.g. 'Gross Profit' for banks) are left out
+    available = frame.index[frame[shown].notna().any(axis=1)]
+    rows = [item for item in (items or list(available)) if item in available]
+    if not rows:
+        rows = list(available)
+
+    ## One unit for the whole table : crore, unless the amounts are too small for it
+    amounts = frame.loc[[row for row in rows if not _is_unscaled(row)], shown].abs()
+    largest = amounts.max().max() if not amounts.empty else 0
+    small = largest and not math.isnan(largest) and largest < CRORE
+    scale, unit = (LAKH, "lakh") if small else (CRORE, "crore")
+
+    headers = [column.strftime("%b-%Y") if hasattr(column, "strftime") else str(column) for column in shown]
+    title = " ".join(filter(None, ["Income statement", symbol]))
+    lines = [f"{title} ({currency} {unit}, EPS per share)", "|".join(["Item"] + headers + ["YoY%"])]
+    for row in rows:
+        values = frame.loc[row]
+        row_scale = 1 if _is_unscaled(row) else scale
+        cells = [_number(values[column], row_scale) for column in shown]
+        growth = _growth(values.iloc[0], values.iloc[1]) if len(values) > 1 else "-"
+        lines.append("|".join([row] + cells + [growth]))
+
+    ## The note saying how many rows were dropped counts in 'max_chars' too
+    text = "\n".join(lines)
+    dropped = 0
+    while len(text) > max_chars and len(lines) > 2:
+        lines.pop()
+        dropped += 1
+        note = f"\n({dropped} more items cut to fit the size limit)"
+        text = "\n".join(lines) + note
+    if len(text) > max_chars:
+        ## Not even the title and headers fit : they are cut, the note is kept whole
+        note = f"\n({dropped} more items cut to fit the size limit)" if dropped else ""
+        text = "\n".join(lines)[:max(0, max_chars - len(note))] + note
+    return text
@@ -0,0 +1,218 @@
+import bisect
+import csv
+import os
+import re
+import threading
+from collections import Counter, namedtuple
+
+## Stock symbols from company names, without asking the LLM to guess them.
+## Users ask about 'Hdfc Bank' or 'tata steel', the Yahoo Finance tools need 'HDFCBANK.NS' / 'TATASTEEL.NS'.
+## Left to the agents, a wrong guess costs a tool call and an LLM round trip (of the 5 an agent has) per retry.
+## Instead the crew looks the symbol up once, before kickoff, in a local index of NSE listings, and gives it to the tasks as {symbol}.
+## No symbol is made up : for a name which is ambiguous ('Tata') or not in the listings, {symbol} tells the agents to look it up
+## with the 'Find stock symbol' tool, with the closest listed companies.
+##
+## The listings ('nse_listings.csv' : symbol, name, aliases separated by '|') are indexed when first used :
+##   - exact names, aliases and symbols ('HDFC Bank', 'HUL', 'INFY', 'INFY.NS')
+##   - prefixes ('Hindustan Aero' -> HAL)
+##   - character trigrams, for misspellings ('Hdfc Bnak', 'Reliance Industry')
+## A lookup takes microseconds (well under a millisecond for a fuzzy one). The full NSE list ('EQUITY_L.csv' from nseindia.com, columns 'SYMBOL' and 'NAME OF COMPANY')
+## can be added with 'NSE_LISTINGS_PATH' (several files separated by ':' on Linux / ';' on Windows).
+
+LISTINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nse_listings.csv")
+
+## Yahoo Finance suffix of NSE symbols
+EXCHANGE_SUFFIX = ".NS"
+
+## Words left out of names : 'HDFC Bank Limited' is found as 'hdfc bank'
+_STOP_WORDS = {"limited", "ltd", "the", "company", "co", "corporation", "corp", "inc", "pvt", "private"}
+
+## Lowest score for a fuzzy match to be taken, and what matching the start of a name adds to its trigram score.
+## A fuzzy match is not taken either when the next company is about as close, or when the query is only the start of
+## the names of several companies ('Bajaj' : Bajaj Auto, Bajaj Finance, ... ; the shortest name would score best)
+MIN_SCORE = 0.5
+PREFIX_BONUS = 0.3
+AMBIGUITY_MARGIN = 0.05
+
+
+class Listing(namedtuple("Listing", "symbol name score")):
+    """A listed company found for a query. 'score' is 1.0 for an exact match."""
+
+    @property
+    def yahoo_symbol(self):
+        return self.symbol + EXCHANGE_SUFFIX
+
+
+def normalise(text):
+    """'Dr. Reddy's Laboratories Ltd' -> 'dr reddys laboratories'."""
+    text = str(text).lower().replace("&", " and ").replace("'", "").replace(".", "")
+    return " ".join(word for word in re.split(r"[^a-z0-9]+", text) if word and word not in _STOP_WORDS)
+
+
+def _trigrams(key):
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _strip_suffix(text):
+    symbol = text.strip().upper()
+    for suffix in (EXCHANGE_SUFFIX, ".BO"):
+        if symbol.endswith(suffix):
+            return symbol[:-len(suffix)]
+    return symbol
+
+
+class SymbolIndex:
+    """Exact, prefix and trigram lookup of listed companies by name, alias or symbol.
+
+    Args:
+        listings (list): (symbol, name, aliases) of each company.
+    """
+
+    def __init__(self, listings):
+        self.names = {}
+        self._exact = {}
+        keys = {}
+        for symbol, name, aliases in listings:
+            symbol = symbol.strip().upper()
+            self.names.setdefault(symbol, name.strip())
+            for text in (name, symbol, *aliases):
+                key = normalise(text)
+                if key:
+                    self._exact.setdefault(key, symbol)
+                    keys.setdefault(key, symbol)
+        ## Sorted keys for the prefix search, and trigram -> positions of the keys having it
+        self._keys = sorted(keys)
+        self._symbols = [keys[key] for key in self._keys]
+        self._gram_counts = []
+        self._grams = {}
+        for position, key in enumerate(self._keys):
+            grams = _trigrams(key)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._grams.setdefault(gram, []).append(position)
+
+    @classmethod
+    def from_csv(cls, *paths):
+        """Index of the listings in CSV files with the columns 'symbol', 'name' and (optional) 'aliases', or NSE's 'EQUITY_L.csv'."""
+        listings = []
+        for path in paths:
+            with open(path, newline="", encoding="utf-8-sig") as file:
+                for row in csv.DictReader(file):
+                    row = {(column or "").strip().lower(): (value or "").strip() for column, value in row.items()}
+                    symbol = row.get("symbol")
+                    name = row.get("name") or row.get("name of company") or symbol
+                    if symbol:
+                        aliases = [alias for alias in row.get("aliases", "").split("|") if alias.strip()]
+                        listings.append((symbol, name, aliases))
+        return cls(listings)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _prefixed(self, query):
+        start = bisect.bisect_left(self._keys, query)
+        end = bisect.bisect_left(self._keys, query + "\uffff")
+        return range(start, end)
+
+    def candidates(self, text, limit=5):
+        """Companies matching a name, alias or symbol, best first.
+
+        Returns:
+            list: Listing (symbol, name, score) of each company, at most 'limit'.
+        """
+        symbol = _strip_suffix(text)
+        if symbol in self.names:
+            return [Listing(symbol, self.names[symbol], 1.0)]
+        query = normalise(text)
+        if not query:
+            return []
+        if query in self._exact:
+            symbol = self._exact[query]
+            return [Listing(symbol, self.names[symbol], 1.0)]
+
+        ## Dice coefficient of the trigrams : 2 * common / (trigrams of the query + trigrams of the key)
+        grams = _trigrams(query)
+        common = Counter(position for gram in grams for position in self._grams.get(gram, ()))
+        scores = {position: 2 * count / (len(grams) + self._gram_counts[position]) for position, count in common.items()}
+        if len(query) >= 3:
+            for position in self._prefixed(query):
+                scores[position] = min(0.99, scores.get(position, 0.0) + PREFIX_BONUS)
+
+        best = {}
+        for position, score in scores.items():
+            symbol = self._symbols[position]
+            best[symbol] = max(score, best.get(symbol, 0.0))
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [Listing(symbol, self.names[symbol], round(score, 3)) for symbol, score in ranked]
+
+    def resolve(self, text):
+        """Best match for a name, alias or symbol, or None when nothing is close enough or several companies are."""
+        found = self.candidates(text, limit=2)
+        if not found or found[0].score < MIN_SCORE:
+            return None
+        if found[0].score < 1.0:
+            if len(found) > 1 and found[0].score - found[1].score < AMBIGUITY_MARGIN:
+                return None
+            if len({self._symbols[position] for position in self._prefixed(normalise(text))}) > 1:
+                return None
+        return found[0]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def symbol_index():
+    """Index of the NSE listings, built on first use : 'nse_listings.csv' and the files in 'NSE_LISTINGS_PATH'."""
+    global _index
+    with _lock:
+        if _index is None:
+            extra = [path for path in os.environ.get("NSE_LISTINGS_PATH", "").split(os.pathsep) if path]
+            _index = SymbolIndex.from_csv(LISTINGS_PATH, *extra)
+        return _index
+
+
+def _given_symbol(stock):
+    ## A symbol written with its exchange suffix ('TCS.BO', 'IRCTC.NS') : taken as it is, listed or not
+    symbol = stock.strip().upper()
+    return symbol if re.fullmatch(r"[A-Z0-9&-]+\.(?:NS|BO)", symbol) else None
+
+
+def resolve_symbol(stock):
+    """'Hdfc Bank' -> 'HDFCBANK.NS', or None when the company is not in the listings or the name is ambiguous.
+    The exchange suffix given is kept ('TCS.BO' stays on BSE)."""
+    listing = symbol_index().resolve(stock)
+    if listing is None:
+        return None
+    given = _given_symbol(stock)
+    return listing.symbol + given[given.rindex("."):] if given else listing.yahoo_symbol
+
+
+def to_nse_symbol(stock):
+    """Yahoo Finance symbol of a stock of a watchlist : from the listings, else the symbol given ('TCS.BO', or 'IRCTC' ->
+    'IRCTC.NS' when no listed company is close to it). None for an ambiguous name ('Tata')."""
+    resolved = resolve_symbol(stock) or _given_symbol(stock)
+    if resolved:
+        return resolved
+    symbol = stock.strip().upper()
+    if re.fullmatch(r"[A-Z0-9&-]+", symbol) and not symbol_index().candidates(stock, limit=1):
+        return symbol + EXCHANGE_SUFFIX
+    return None
+
+
+def with_symbol(inputs):
+    """Crew inputs with 'symbol' added from 'stock', unless already given.
+
+    For an ambiguous or unknown name, 'symbol' asks the agents to find it with the 'Find stock symbol' tool instead,
+    naming the closest listed companies.
+    """
+    if inputs.get("symbol") or not inputs.get("stock"):
+        return inputs
+    symbol = resolve_symbol(inputs["stock"]) or _given_symbol(inputs["stock"])
+    if symbol is None:
+        found = [listing for listing in symbol_index().candidates(inputs["stock"], limit=3) if listing.score >= MIN_SCORE]
+        symbol = "not known, find it with the 'Find stock symbol' tool"
+        if found:
+            symbol += " (closest listed : " + ", ".join(f"{listing.yahoo_symbol} {listing.name}" for listing in found) + ")"
+    return {**inputs, "symbol": symbol}
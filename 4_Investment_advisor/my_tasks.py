@@ -1,42 +1,53 @@
 ## bring your agents here
 from crewai import Task
-from my_agents import news_info_explorer, data_explorer, analyst, fin_expert
+from my_agents import build_agents
 
 ## distinct tasks are defined here. Each task with a specific description and expected output.
-## Check the variable, which is same parameter while triggering.
+## Check the variable, which is same parameter while triggering. {symbol} is added by the crew from {stock} (see my_symbols.py).
+## Each task has a name : it shows in the traces, and the task cache can be told how long to keep each task's output.
+def build_tasks (agents = None):
+    agents = agents or build_agents ()
 
-## A task to get the financial data of the stock. expected output is defined qualitatively
-## An agent, who has relevant capability is assigned to the task
-get_company_financials = Task (
-                                description = "Get financial data like inccome statements and other fundamental ratios for stock : {stock}",
-                                expected_output = "Detailed information from income statement,  key ratios for {stock}.\
-                                                   Indicate also about current financial status and trend over the period.",
-                                agent = data_explorer
-                              )
+    ## A task to get the financial data of the stock. expected output is defined qualitatively
+    ## An agent, who has relevant capability is assigned to the task
+    get_company_financials = Task (
+                                    name = 'get_company_financials',
+                                    description = "Get financial data like inccome statements and other fundamental ratios, and the price trend for stock : {stock} (symbol : {symbol})",
+                                    expected_output = "Detailed information from income statement,  key ratios for {stock}.\
+                                                       Indicate also about current financial status and trend over the period.",
+                                    agent = agents ['data_explorer']
+                                  )
 
-## Task to get focused news about the company and business
-get_company_news = Task (
-                                description = "Get latest news and business information about company : {stock}",
-                                expected_output = "Latest news and business information about company.\
-                                                   Provide a summary also.",
-                                agent = news_info_explorer
-                              )
+    ## Task to get focused news about the company and business
+    ## It does not need the financial data, so its context is empty. This lets the crew run it at the same time as the previous task.
+    ## (With older crewai releases, 'crew.kickoff' still gives it the financial data : an empty context is taken as none given)
+    get_company_news = Task (
+                                    name = 'get_company_news',
+                                    description = "Get latest news and business information about company : {stock}",
+                                    expected_output = "Latest news and business information about company.\
+                                                       Provide a summary also.",
+                                    agent = agents ['news_info_explorer'],
+                                    context = []
+                                  )
 
-## A task make analysis from financial data and news. Expected output sets clear expectation
-analyse = Task (
-                    description = "Make thorough analysis based on given financial data and latest news of a stock",
-                    expected_output = "Comprehensive Analysis of a stock outlining financial health, stock valuation, risks and news.\
-                                        Mention currency information and number units in indian context (lakh / crore)",    
-                    agent = analyst,
-                    context = [get_company_financials, get_company_news],
-                    output_file = 'Analysis.md'
-                )
+    ## A task make analysis from financial data and news. Expected output sets clear expectation
+    analyse = Task (
+                        name = 'analyse',
+                        description = "Make thorough analysis based on given financial data and latest news of a stock",
+                        expected_output = "Comprehensive Analysis of a stock outlining financial health, stock valuation, risks and news.\
+                                            Mention currency information and number units in indian context (lakh / crore)",    
+                        agent = agents ['analyst'],
+                        context = [get_company_financials, get_company_news],
+                        output_file = 'Analysis.md'
+                    )
 
-## Advisor task
-advise = Task (
-                    description = "Make a recommendation about investing in a stock, based on analysis provided and current stock price. State the reasons.",
-                    expected_output = "Recommendation (Buy / No Buy) of a stock, with reasons clearly mentioned",    
-                    agent = fin_expert,                    
-                    context = [analyse],
-                    output_file = 'Recommendation.md'
-                )
\ No newline at end of file
+    ## Advisor task
+    advise = Task (
+                        name = 'advise',
+                        description = "Make a recommendation about investing in a stock ({symbol}), based on analysis provided and current stock price. State the reasons.",
+                        expected_output = "Recommendation (Buy / No Buy) of a stock, with reasons clearly mentioned",    
+                        agent = agents ['fin_expert'],                    
+                        context = [analyse],
+                        output_file = 'Recommendation.md'
+                    )
+    return [get_company_financials, get_company_news, analyse, advise]
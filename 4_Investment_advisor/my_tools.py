@@ -1,12 +1,99 @@
 from crewai.tools import tool
 import json
+import os
+import sys
 
-## Import Yahoo Finance APIs
-import yfinance as yf
+## Compact form of the income statement, to keep the prompt small
+from my_statements import compact_income_statement
+
+## Local index of NSE listings : company names to symbols
+from my_symbols import symbol_index
+
+## Trend indicators from the daily bars kept on disk. Imported here, with the other local modules : the example folder is
+## only importable while the crew is being loaded (see crew_common/loader.py). NumPy is already imported by crewai
+from my_prices import indicators
+
+## Shared helpers live in 'crew_common' at the top of the repository. Make it importable when running from this folder
+sys.path.append (os.path.dirname (os.path.dirname (os.path.abspath (__file__))))
+from crew_common.cache import TTLCache
+from crew_common.tracing import traced_tool, tracer
+
+## One cache behind all the Yahoo Finance tools. Same symbol asked again by another agent (or in a later run) is served from here.
+## Each kind of data gets its own time-to-live : price changes by the second, fundamentals by the hour, income statements by the quarter.
+## Set 'YF_CACHE_PATH' to a file (e.g. yf_cache.sqlite) to keep the cache across runs and share it between worker processes.
+CACHE_TTL = {
+    "price": 60,
+    "info": 6 * 60 * 60,
+    "financials": 3 * 24 * 60 * 60,
+}
+market_cache = TTLCache (maxsize = 512, path = os.environ.get ("YF_CACHE_PATH"))
+tracer.register_stats ("market_cache", market_cache.stats)
+
+def cache_key(kind: str, symbol: str) -> str:
+    return f"{kind}:{symbol.strip().upper()}"
+
+## Yahoo Finance APIs. yfinance (and pandas with it) takes a while to import, so it is imported on the first data request,
+## not when the agents are made
+def _yf():
+    import yfinance
+    return yfinance
+
+def _load_price(symbol):
+    ## 'fast_info' only fetches the latest quote, much lighter than the full 'info' payload
+    try:
+        price = _yf().Ticker(symbol).fast_info["last_price"]
+    except Exception:
+        price = None
+    if price:
+        return price
+    info = fetch_market_data(symbol, "info")
+    return info.get("regularMarketPrice", info.get("currentPrice"))
+
+def _load_info(symbol):
+    return _yf().Ticker(symbol).info
+
+def _load_financials(symbol):
+    return _yf().Ticker(symbol).financials
+
+_LOADERS = {
+    "price": _load_price,
+    "info": _load_info,
+    "financials": _load_financials,
+}
+
+def _is_empty(value):
+    if value is None or getattr(value, "empty", False) is True:
+        return True
+    return isinstance(value, dict) and not value
+
+def fetch_market_data(symbol: str, kind: str):
+    """Return Yahoo Finance data of the given kind ('price', 'info' or 'financials') for a symbol, going through the cache.
+    Agents asking for the same data at the same time wait for one request to Yahoo."""
+    loaded = []
+
+    def load():
+        loaded.append (kind)
+        return _LOADERS[kind](symbol)
+
+    ## Empty answers usually mean a failed / throttled request. Don't keep them for the whole TTL
+    data = market_cache.get_or_set (cache_key(kind, symbol), load, ttl = CACHE_TTL[kind],
+                                    cache_if = lambda value: not _is_empty(value))
+    tracer.annotate (**{f"{kind}_cache": "miss" if loaded else "hit"})
+    return data
+
+## 'compact' (default) sends a small table of key items to the LLM, 'full' sends the whole statement as JSON
+INCOME_STATEMENT_FORMAT = os.environ.get ("INCOME_STATEMENT_FORMAT", "compact")
+INCOME_STATEMENT_PERIODS = int (os.environ.get ("INCOME_STATEMENT_PERIODS", 3))
+
+def cache_stats() -> dict:
+    """Hit / miss counters of the market data cache."""
+    return market_cache.stats ()
 
 ## A function is defined, that will work as a tool and that is provided to the framework (hence to agents) as a tool with the '@tool' decorator
 ## Note the function description  (purpose, usage) in doc strigs.
+## '@traced_tool' records every call (duration, errors, retries) in the trace.
 @tool ("Get current stock price")
+@traced_tool
 def get_current_stock_price(symbol: str) -> str:
     """Use this function to get the current stock price for a given symbol.
 
@@ -17,14 +104,29 @@ def get_current_stock_price(symbol: str) -> str:
         str: The current stock price or error message.
     """
     try:
-        stock = yf.Ticker(symbol)
-        
-        current_price = stock.info.get("regularMarketPrice", stock.info.get("currentPrice"))
+        current_price = fetch_market_data(symbol, "price")
         return f"{current_price:.2f}" if current_price else f"Could not fetch current price for {symbol}"
     except Exception as e:
         return f"Error fetching current price for {symbol}: {e}"
 
+@tool ("Find stock symbol")
+@traced_tool
+def find_stock_symbol(company: str) -> str:
+    """Use this function to find the NSE stock symbol of a company from its name, e.g. 'Hdfc Bank' -> 'HDFCBANK.NS'.
+
+    Args:
+        company (str): The company name, as written by the user.
+
+    Returns:
+        str: The closest listed companies with their symbols, best match first.
+    """
+    found = symbol_index().candidates(company, limit=3)
+    if not found:
+        return f"No NSE listed company found for {company}"
+    return "\n".join(f"{listing.yahoo_symbol} : {listing.name} (match {listing.score:.2f})" for listing in found)
+
 @tool
+@traced_tool
 def get_company_info(symbol: str):
     """Use this function to get company information and current financial snapshot for a given stock symbol.
 
@@ -35,7 +137,7 @@ def get_company_info(symbol: str):
         JSON containing company profile and current financial snapshot.
     """
     try:
-        company_info_full = yf.Ticker(symbol).info
+        company_info_full = fetch_market_data(symbol, "info")
         if company_info_full is None:
             return f"Could not fetch company info for {symbol}"
 
@@ -67,7 +169,27 @@ def get_company_info(symbol: str):
     except Exception as e:
         return f"Error fetching company profile for {symbol}: {e}"
 
+## Trend of the stock, computed from the daily bars kept on disk (see my_prices.py) : only the bars since the last sync are downloaded.
+@tool ("Get price history")
+@traced_tool
+def get_price_history(symbol: str) -> str:
+    """Use this function to get the price trend of a given stock symbol : returns over 1 week to 1 year,
+    20 / 50 / 200 day moving averages, volatility, drawdown from the high and 52 week range.
+
+    Args:
+        symbol (str): The stock symbol.
+
+    Returns:
+        JSON of the price trend indicators, or error message.
+    """
+    try:
+        trend = indicators([symbol])[symbol.strip().upper()]
+        return json.dumps(trend) if trend else f"No price history found for {symbol}"
+    except Exception as e:
+        return f"Error fetching price history for {symbol}: {e}"
+
 @tool
+@traced_tool
 def get_income_statements(symbol: str):
 
     """Use this function to get income statements for a given stock symbol.
@@ -76,11 +198,12 @@ def get_income_statements(symbol: str):
     symbol (str): The stock symbol.
 
     Returns:
-    JSON containing income statements or an empty dictionary.
+    Table of key income statement items for the last years (amounts in crore / lakh, with year on year growth).
     """
     try:
-        stock = yf.Ticker(symbol)
-        financials = stock.financials
-        return financials.to_json(orient="index")
+        financials = fetch_market_data(symbol, "financials")
+        if INCOME_STATEMENT_FORMAT == "full":
+            return financials.to_json(orient="index")
+        return compact_income_statement(financials, symbol, periods=INCOME_STATEMENT_PERIODS)
     except Exception as e:
         return f"Error fetching income statements for {symbol}: {e}"
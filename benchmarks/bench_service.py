@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+## Load test of the warm crew service ('crew_common/service.py'), offline like 'run_benchmarks.py'.
+## Clients send kickoff requests over HTTP, all at once, for a few distinct stocks : requests for the same stock
+## in flight together should share one run. Reports client latency (p50 / p95), requests / second,
+## how many crew runs were actually made, and how many requests were turned down by the full queue.
+##
+##   python benchmarks/bench_service.py --requests 40 --stocks 4 --concurrency 4 --queue 32 --llm-latency 0.2
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+STOCKS = ["Hdfc Bank", "Tata Steel", "Infosys", "TCS", "Reliance", "ITC", "Wipro", "Axis Bank"]
+
+
+async def post(port, body):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode("utf-8")
+    writer.write(f"POST /kickoff HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+async def load(service, port, args):
+    server = await asyncio.start_server(service._handle_http, "127.0.0.1", port)
+    rng = random.Random(0)
+    stocks = STOCKS[:args.stocks]
+
+    async def client():
+        ## Different spelling of the same stock still coalesces
+        stock = rng.choice(stocks)
+        stock = stock.lower() if rng.random() < 0.5 else f" {stock} "
+        started = time.perf_counter()
+        status, answer = await post(port, {"crew": args.crew, "inputs": {"stock": stock}})
+        return status, answer.get("coalesced", False), time.perf_counter() - started
+
+    async with server:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client() for _ in range(args.requests)))
+        wall = time.perf_counter() - started
+    return results, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the warm crew service")
+    parser.add_argument("--crew", default="advisor", choices=["advisor", "collab"])
+    parser.add_argument("--requests", type=int, default=40, help="requests sent at the same time")
+    parser.add_argument("--stocks", type=int, default=4, help="distinct stocks asked about")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--data-latency", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=8791)
+    args = parser.parse_args()
+
+    from run_benchmarks import percentile, setup_environment
+
+    setup_environment()
+    import stub_data
+    from stub_llm import StubLLMServer
+
+    stub_data.install(yfinance_latency=args.data_latency, search_latency=args.data_latency)
+    with StubLLMServer(latency=args.llm_latency) as llm:
+        os.environ["CREW_LLM_BASE_URL"] = llm.url
+        from crew_common.service import CrewService
+
+        service = CrewService([args.crew], max_concurrency=args.concurrency, max_queue=args.queue)
+        started = time.perf_counter()
+        service.warm_up()
+        warm_up = time.perf_counter() - started
+        results, wall = asyncio.run(load(service, args.port, args))
+
+    ok = [seconds for status, _, seconds in results if status == 200]
+    report = {
+        "crew": args.crew,
+        "requests": args.requests,
+        "distinct_stocks": args.stocks,
+        "warm_up_s": round(warm_up, 3),
+        "wall_s": round(wall, 3),
+        "requests_per_s": round(len(ok) / wall, 2),
+        "latency_p50_s": round(percentile(ok, 50), 3) if ok else None,
+        "latency_p95_s": round(percentile(ok, 95), 3) if ok else None,
+        "statuses": {str(status): sum(1 for result in results if result[0] == status) for status in sorted({r[0] for r in results})},
+        "coalesced_answers": sum(1 for _, coalesced, _ in results if coalesced),
+        "crew_runs": service.counters["completed"] + service.counters["failed"],
+        "llm_requests": llm.requests,
+        "service": service.stats(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+## Check of the batch runner ('crew_common/batch.py') against a stub LLM server enforcing a requests per minute limit, offline.
+##   1. half of the topics are run, and the results file is left with a line cut in the middle (an interrupted batch)
+##   2. all the topics are run again, with a limit set above the server's : the inputs already done must be skipped,
+##      and the limiter must slow down on the server's 429s until every input is answered
+##   3. all the topics again in a new results file, with a limit under the server's : (almost) no 429 at all
+## Exits with 1 when a check fails.
+##
+##   python benchmarks/check_batch.py --topics 40 --concurrency 8 --server-rpm 200
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the batch runner against a rate limited stub LLM server")
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--server-rpm", type=float, default=200, help="requests per minute the stub server allows")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    from run_benchmarks import setup_environment
+
+    setup_environment()
+    warnings.filterwarnings("ignore")
+    from stub_llm import StubLLMServer
+    from crewai.events.event_listener import event_listener
+    from crew_common import ratelimit
+    from crew_common.batch import read_results, run_batch
+
+    ## 429s are expected in the second run : no error panels on the console
+    event_listener.verbose = event_listener.formatter.verbose = False
+
+    folder = tempfile.mkdtemp(prefix="crew-batch-")
+    topics = [f"Topic number {i} of the batch" for i in range(args.topics)]
+    half, full = os.path.join(folder, "half.txt"), os.path.join(folder, "topics.txt")
+    with open(half, "w", encoding="utf-8") as file:
+        file.write("\n".join(topics[:args.topics // 2]) + "\n")
+    ## Twice the same topic (up to case and spaces) : run once
+    with open(full, "w", encoding="utf-8") as file:
+        file.write("\n".join(topics + [f"  {topics[0].upper()} "]) + "\n")
+    results = os.path.join(folder, "results.jsonl")
+
+    report = {}
+    ## A short window, so the limit bites within seconds
+    server = StubLLMServer(latency=args.llm_latency, answer_words=20, requests_per_minute=args.server_rpm, rate_window=2.0)
+    with server:
+        os.environ["CREW_LLM_BASE_URL"] = server.url
+        started = time.perf_counter()
+        report["interrupted"] = run_batch("collab", half, results, concurrency=args.concurrency,
+                                          requests_per_minute=args.server_rpm / 2)
+        with open(results, "a", encoding="utf-8") as file:
+            file.write('{"id": "cut in the mid')
+
+        before = server.rate_limited
+        report["resumed"] = run_batch("collab", full, results, concurrency=args.concurrency,
+                                      requests_per_minute=args.server_rpm * 2)
+        report["resumed"]["server_429"] = server.rate_limited - before
+        report["resumed"]["limiter"] = ratelimit.llm_limiter_stats()
+
+        before = server.rate_limited
+        report["under_limit"] = run_batch("collab", full, os.path.join(folder, "fresh.jsonl"), concurrency=args.concurrency,
+                                          requests_per_minute=args.server_rpm * 0.8)
+        report["under_limit"]["server_429"] = server.rate_limited - before
+        report["wall_s"] = round(time.perf_counter() - started, 3)
+
+    records = read_results(results)
+    with open(results, encoding="utf-8") as file:
+        lines = [line for line in file if line.strip()]
+    checks = {
+        "every topic answered": len(records) == args.topics and all(r["status"] == "ok" for r in records.values()),
+        "no topic run twice": len(lines) == args.topics + 1,
+        "done topics skipped on resume": report["resumed"]["skipped"] == args.topics // 2 + 1,
+        "limiter slowed down on 429s": report["resumed"]["server_429"] == 0 or any(
+            stats["decreases"] > 0 for stats in report["resumed"]["limiter"].values()),
+        "under the limit, (almost) no 429": report["under_limit"]["server_429"] <= 2,
+        "fresh run complete": report["under_limit"]["done"] == args.topics and not report["under_limit"]["failed"],
+    }
+    report["checks"] = checks
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        for name in ("interrupted", "resumed", "under_limit"):
+            print(f"{name:<12}{json.dumps(report[name], default=str)}")
+        for check, ok in checks.items():
+            print(f"  [{'ok' if ok else 'FAIL'}] {check}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
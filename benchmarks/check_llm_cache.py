@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import warnings
+from datetime import timedelta
+
+## Check of the record / replay cache of LLM answers ('crew_common/llm_cache.py') : replayed runs must not need the model,
+## on later days too (the agents are told the current date).
+##   1. each crew is run with CREW_LLM_CACHE=record against a local stub LLM : its answers are stored
+##   2. the stub is stopped, the date is moved a day forward (the agents' 'today ()' and the cache's), and each crew is run
+##      again with CREW_LLM_CACHE=replay : every answer must come from the recording, with the same result
+## Exits with 1 when a check fails.
+##
+##   python benchmarks/check_llm_cache.py --crews chat research advisor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+
+def run(name):
+    from crew_common.loader import build_example_crew, example_inputs, load_example
+
+    crew = build_example_crew(name, quiet=True)
+    for task in crew.tasks:
+        task.output_file = None
+    backstories = " ".join(agent.backstory for agent in crew.agents)
+    return load_example(name).kickoff(example_inputs(name, {}), crew=crew).raw, backstories
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that recorded LLM answers replay, on later days too")
+    parser.add_argument("--crews", nargs="+", default=["chat", "research", "advisor"])
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    from run_benchmarks import setup_environment
+
+    setup_environment()
+    warnings.filterwarnings("ignore")
+    import stub_data
+    from stub_llm import StubLLMServer
+    from crew_common import llm_cache
+    from crew_common.loader import load_example
+
+    stub_data.install()
+    os.chdir(tempfile.mkdtemp(prefix="crew-llm-cache-"))
+    os.environ["CREW_LLM_CACHE_PATH"] = os.path.abspath("llm_cache.sqlite")
+
+    recorded = {}
+    os.environ["CREW_LLM_CACHE"] = "record"
+    with StubLLMServer(answer_words=20) as server:
+        os.environ["CREW_LLM_BASE_URL"] = server.url
+        for name in args.crews:
+            recorded[name] = run(name)
+        report = {"recorded_requests": server.requests}
+
+    ## The next day : the agents are told tomorrow's date, and no model answers
+    tomorrow = llm_cache._today() + timedelta(days=1)
+    llm_cache._today = lambda: tomorrow
+    for name in args.crews:
+        agents = load_example(name, "my_agents")
+        if hasattr(agents, "today"):
+            agents.today = lambda: tomorrow.strftime("%d-%b-%Y")
+    os.environ["CREW_LLM_CACHE"] = "replay"
+    replayed, errors = {}, {}
+    for name in args.crews:
+        try:
+            replayed[name] = run(name)
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+
+    dated = [name for name in args.crews if "Consider you are on" in recorded[name][1]]
+    report["crews with a date"] = dated
+    report["errors"] = errors
+    checks = {
+        "every crew replayed": not errors,
+        "same results": all(replayed[name][0] == recorded[name][0] for name in replayed),
+        "agents told the next day": all(tomorrow.strftime("%d-%b-%Y") in replayed[name][1] for name in dated if name in replayed),
+    }
+    report["checks"] = checks
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, value in report.items():
+            if name != "checks":
+                print(f"{name:<20}{value}")
+        for check, ok in checks.items():
+            print(f"  [{'ok' if ok else 'FAIL'}] {check}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
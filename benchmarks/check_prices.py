@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+## Check of the price history store of the investment advisor ('4_Investment_advisor/my_prices.py'), offline on the stub data.
+##   1. cold sync of many symbols : a few bulk downloads, then the history is on disk
+##   2. sync again : nothing downloaded (synced less than SYNC_TTL ago)
+##   3. the last bars of some symbols are removed : a forced sync only downloads from the last stored bars, and the stored
+##      history is the same as the cold one
+##   4. a stored close is changed (like Yahoo adjusting the prices for a dividend) : the history is loaded again in full
+##   5. indicators of all the symbols at once, compared with the same computations made with pandas, and timed
+##   6. the 'Get price history' tool of the advisor, loaded like the crews load it (crew_common/loader.py), gives the same
+##      indicators
+## Exits with 1 when a check fails.
+##
+##   python benchmarks/check_prices.py --symbols 200
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, round((time.perf_counter() - started) * 1000, 2)
+
+
+def pandas_indicators(close):
+    ## Same indicators as 'my_prices.indicators', the plain pandas way, for one symbol
+    import numpy as np
+    import pandas as pd
+
+    close = pd.Series(np.asarray(close))
+    year = close.tail(252)
+    return {
+        "returns_pct": {"1m": close.pct_change(21).iloc[-1] * 100, "1y": close.pct_change(252).iloc[-1] * 100},
+        "moving_averages": {f"{window}d": close.rolling(window).mean().iloc[-1] for window in (20, 50, 200)},
+        "volatility_pct": {"1y": np.log(close).diff().tail(252).std() * np.sqrt(252) * 100},
+        "drawdown_pct": {"max_1y": ((year / year.cummax()) - 1).min() * 100},
+        "range_52w": {"low": year.min(), "high": year.max()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the price history store on stub data")
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    import stub_data
+
+    stub_data.install()
+    folder = tempfile.mkdtemp(prefix="crew-prices-")
+    os.environ["PRICE_HISTORY_PATH"] = folder
+    import numpy as np
+    from crew_common.loader import load_example
+
+    ## The example's modules as its agents get them : its folder is only importable while they are loaded
+    my_prices = load_example("advisor", "my_prices")
+
+    symbols = [f"STOCK{number}.NS" for number in range(args.symbols)]
+    report, checks = {}, {}
+    try:
+        sync, report["cold_sync_ms"] = timed(my_prices.sync, symbols)
+        report["cold_downloads"] = sync["downloads"]
+        cold = {symbol: {column: np.array(values) for column, values in my_prices.load(symbol).items()} for symbol in symbols}
+        checks["cold sync in bulk downloads"] = sync["downloads"] == -(-args.symbols // my_prices.DOWNLOAD_CHUNK)
+        checks["history stored"] = all(len(bars["date"]) > 252 for bars in cold.values())
+
+        sync, report["warm_sync_ms"] = timed(my_prices.sync, symbols)
+        checks["nothing downloaded when synced recently"] = sync["downloads"] == 0
+
+        ## Last 10 bars of a few symbols removed, in every column
+        shortened = symbols[:5]
+        for symbol in shortened:
+            count = len(cold[symbol]["date"])
+            for column in ("date",) + my_prices.COLUMNS:
+                with open(my_prices._file(symbol, column), "r+b") as file:
+                    file.truncate((count - 10) * 8)
+        before = stub_data.calls["yfinance"]
+        sync, report["incremental_sync_ms"] = timed(my_prices.sync, shortened, force=True)
+        checks["incremental sync : one download"] = sync["downloads"] == 1 and stub_data.calls["yfinance"] - before == 1
+        checks["incremental sync : same history as cold"] = all(
+            np.array_equal(cold[symbol][column], my_prices.load(symbol)[column]) for symbol in shortened for column in cold[symbol])
+
+        ## Adjusted prices : an older close changed (the one before the last, downloaded again by every sync)
+        adjusted = symbols[5]
+        position = len(cold[adjusted]["close"]) - 2
+        with open(my_prices._file(adjusted, "close"), "r+b") as file:
+            file.seek(position * 8)
+            file.write(np.float64(cold[adjusted]["close"][position] * 2).tobytes())
+        sync = my_prices.sync([adjusted], force=True)
+        checks["adjusted prices loaded again"] = sync["downloads"] == 2 and np.array_equal(
+            cold[adjusted]["close"], my_prices.load(adjusted)["close"])
+
+        _, report["load_all_ms"] = timed(lambda: [my_prices.load(symbol)["close"][-1] for symbol in symbols])
+        found, report["indicators_ms"] = timed(my_prices.indicators, symbols, sync_first=False)
+        differences = []
+        for symbol in symbols[:20]:
+            expected = pandas_indicators(cold[symbol]["close"])
+            for group, values in expected.items():
+                for name, value in values.items():
+                    differences.append(abs(found[symbol][group][name] - round(float(value), 2)))
+        report["max_difference"] = max(differences)
+        checks["indicators match pandas"] = report["max_difference"] <= 0.011
+
+        tool = load_example("advisor", "my_tools").get_price_history
+        output = tool.run(symbol=symbols[0])
+        report["tool_output"] = output[:60]
+        checks["tool of the advisor gives the indicators"] = output == json.dumps(found[symbols[0]])
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    report["checks"] = checks
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        for name, value in report.items():
+            if name != "checks":
+                print(f"{name:<22}{value}")
+        for check, ok in checks.items():
+            print(f"  [{'ok' if ok else 'FAIL'}] {check}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
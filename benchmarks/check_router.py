@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+## Check of the model router ('crew_common/router.py') against local stub LLM servers with injected latency and failures :
+##   fast    : quick, but rate limits part of the requests (429) and now and then answers very slowly
+##   steady  : slower, never fails
+##   broken  : answers every request with HTTP 500
+## Every call must get an answer, the broken backend must be left aside after its first failures, rate limits must fail over,
+## and hedging must keep the slow answers of 'fast' out of the tail latency. Then a call is made while every thread of the
+## router's pool is busy : the time it waits for a thread must not count as a slow answer (no hedge). Exits with 1 when a check fails.
+##
+##   python benchmarks/check_router.py --calls 80 --concurrency 4
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+MESSAGES = [{"role": "user", "content": "Summarise the latest news about HDFC Bank."}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the model router against stub LLM servers")
+    parser.add_argument("--calls", type=int, default=80)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--fast-latency", type=float, default=0.05)
+    parser.add_argument("--steady-latency", type=float, default=0.3)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.15, help="share of 429 answers of the fast backend")
+    parser.add_argument("--slow-rate", type=float, default=0.1, help="share of very slow answers of the fast backend")
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    parser.add_argument("--hedge-after", type=float, default=1.0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    os.environ.pop("CREW_LLM_BASE_URL", None)
+    os.environ["CREW_LLM_CACHE"] = "passthrough"
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    warnings.filterwarnings("ignore")
+    from stub_llm import StubLLMServer
+    from crewai.events.event_listener import event_listener
+    from crew_common import router as router_module
+    from crew_common.router import RoutedLLM, backend_health, backend_llm
+
+    ## The injected failures are expected : no error panels on the console
+    event_listener.verbose = event_listener.formatter.verbose = False
+
+    fast = StubLLMServer(latency=args.fast_latency, rate_limit_rate=args.rate_limit_rate,
+                         slow_rate=args.slow_rate, slow_latency=args.slow_latency, answer_words=20, seed=1)
+    steady = StubLLMServer(latency=args.steady_latency, answer_words=20, seed=2)
+    broken = StubLLMServer(error_rate=1.0, seed=3)
+    with broken, fast, steady:
+        ## Preferred first : the broken one, so the router has to learn to avoid it
+        backends = [backend_llm(name, base_url=server.url) for name, server in
+                    (("broken", broken), ("fast", fast), ("steady", steady))]
+        router = RoutedLLM(model="router/check", backends=backends, hedge_after=args.hedge_after, tier="check")
+
+        def one_call_with(routed):
+            started = time.perf_counter()
+            try:
+                routed.call(MESSAGES)
+                return True, time.perf_counter() - started
+            except Exception as e:
+                return f"{type(e).__name__}: {e}", time.perf_counter() - started
+
+        def one_call(_):
+            return one_call_with(router)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(one_call, range(args.calls)))
+        wall = time.perf_counter() - started
+        ## Calls which lost a hedge are still running : let them finish before the servers go
+        time.sleep(args.slow_latency)
+
+        ## Every thread of the pool busy for a while : the next call waits for one, then answers before its hedge delay
+        queued = [backend_llm(name, base_url=steady.url) for name in ("queued", "queued-2")]
+        queued_router = RoutedLLM(model="router/queued", backends=queued, hedge_after=args.steady_latency * 2, tier="check")
+        pool = router_module._executor()
+        busy = [pool.submit(time.sleep, args.steady_latency * 4) for _ in range(pool._max_workers)]
+        queued_ok, queued_seconds = one_call_with(queued_router)
+        for future in busy:
+            future.result()
+
+    latencies = sorted(seconds for ok, seconds in results if ok is True)
+    failures = [ok for ok, _ in results if ok is not True]
+    health = {name: backend_health(llm).stats() for name, llm in zip(("broken", "fast", "steady"), backends)}
+    requests = {"broken": broken.requests, "fast": fast.requests, "steady": steady.requests}
+    report = {
+        "calls": args.calls,
+        "answered": len(latencies),
+        "failures": failures[:5],
+        "wall_s": round(wall, 3),
+        "latency_p50_s": round(latencies[len(latencies) // 2], 3) if latencies else None,
+        "latency_p95_s": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 3) if latencies else None,
+        "server_requests": requests,
+        "backends": health,
+        "queued_call_s": round(queued_seconds, 3),
+    }
+    queued_hedges = sum(backend_health(llm).stats()["hedges"] for llm in queued)
+    checks = {
+        "every call answered": not failures,
+        "broken backend left aside": requests["broken"] <= max(3, args.calls // 10),
+        "rate limits failed over": fast.rate_limited == 0 or health["fast"]["failovers"] > 0,
+        "slow answers hedged": fast.requests == 0 or args.slow_rate == 0 or health["fast"]["hedges"] > 0,
+        "p95 under the slow answers": bool(latencies) and report["latency_p95_s"] < args.slow_latency,
+        "fast backend used most": requests["fast"] >= requests["steady"],
+        "waiting for a thread is not hedged": queued_ok is True and queued_hedges == 0,
+    }
+    report["checks"] = checks
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['answered']}/{args.calls} calls answered in {report['wall_s']}s, "
+              f"p50 {report['latency_p50_s']}s, p95 {report['latency_p95_s']}s")
+        print(f"server requests : {requests}")
+        for name, stats in health.items():
+            print(f"  {name:<8}{json.dumps(stats)}")
+        for check, ok in checks.items():
+            print(f"  [{'ok' if ok else 'FAIL'}] {check}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+## Check of streamed runs ('crew_common/streaming.py') : the investment advisor against a local stub LLM writing its answers
+## a few words at a time.
+##   1. the first chunk comes long before the end of the run (time to first byte)
+##   2. events in order : the chunks of a task, then its "task" event, once per task, and "done" last
+##   3. 'Recommendation.md' is written while the final answer arrives, and ends up with the task's output
+##   4. run again with the record / replay cache : the cached answers are streamed too, at once
+## Exits with 1 when a check fails.
+##
+##   python benchmarks/check_streaming.py --latency 0.3 --chunk-delay 0.02
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+OUTPUT_FILE = "Recommendation.md"
+
+
+def streamed_run(inputs):
+    from crew_common.loader import build_example_crew, example_inputs, load_example
+    from crew_common.streaming import stream_kickoff
+
+    example = load_example("advisor")
+    crew = build_example_crew("advisor", quiet=True)
+    last_task = crew.tasks[-1].name
+    events, sizes = [], []
+    started = time.perf_counter()
+    stream = stream_kickoff(example.kickoff, crew, example_inputs("advisor", inputs))
+    for event in stream:
+        events.append(event)
+        if event.kind == "chunk" and event.task == last_task and os.path.exists(OUTPUT_FILE):
+            sizes.append(os.path.getsize(OUTPUT_FILE))
+    return {"stream": stream, "events": events, "sizes": sizes, "seconds": time.perf_counter() - started,
+            "tasks": [task.name for task in crew.tasks]}
+
+
+def in_order(run):
+    ## No chunk of a task after its "task" event, one "task" event per task, "done" last
+    finished = []
+    for event in run["events"][:-1]:
+        if event.kind == "done" or event.task in finished:
+            return False
+        if event.kind == "task":
+            finished.append(event.task)
+    return run["events"][-1].kind == "done" and sorted(finished) == sorted(run["tasks"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check streamed runs against a stub LLM")
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--chunk-delay", type=float, default=0.02)
+    parser.add_argument("--answer-words", type=int, default=120)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    from run_benchmarks import setup_environment
+
+    setup_environment()
+    warnings.filterwarnings("ignore")
+    import stub_data
+    from stub_llm import StubLLMServer
+
+    stub_data.install()
+    ## Output files and the model answers cache in a folder of their own
+    os.chdir(tempfile.mkdtemp(prefix="crew-stream-"))
+    os.environ["CREW_LLM_CACHE"] = "record"
+    os.environ["CREW_LLM_CACHE_PATH"] = os.path.abspath("llm_cache.sqlite")
+    inputs = {"stock": "Hdfc Bank"}
+    with StubLLMServer(latency=args.latency, answer_words=args.answer_words, chunk_delay=args.chunk_delay) as server:
+        os.environ["CREW_LLM_BASE_URL"] = server.url
+        first = streamed_run(inputs)
+        with open(OUTPUT_FILE, encoding="utf-8") as file:
+            written = file.read()
+        cached = streamed_run(inputs)
+
+    result = first["stream"].result
+    report = {
+        "seconds": round(first["seconds"], 3),
+        "first_chunk_s": round(first["stream"].first_chunk_seconds, 3),
+        "chunks": sum(event.kind == "chunk" for event in first["events"]),
+        "file_sizes_while_streaming": sorted(set(first["sizes"]))[:5],
+        "cached_seconds": round(cached["seconds"], 3),
+        "cached_first_chunk_s": round(cached["stream"].first_chunk_seconds, 3),
+    }
+    checks = {
+        "first chunk before half the run": report["first_chunk_s"] < report["seconds"] / 2,
+        "events in order": in_order(first),
+        "output file written while streaming": any(0 < size < len(written.encode("utf-8")) for size in first["sizes"]),
+        "output file is the task's output": written.strip() == result.tasks_output[-1].raw.strip(),
+        "cached answers streamed": in_order(cached) and report["cached_first_chunk_s"] < report["first_chunk_s"],
+    }
+    report["checks"] = checks
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, value in report.items():
+            if name != "checks":
+                print(f"{name:<28}{value}")
+        for check, ok in checks.items():
+            print(f"  [{'ok' if ok else 'FAIL'}] {check}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
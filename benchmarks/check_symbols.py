@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import sys
+
+## Check of the stock symbol lookup of the advisor ('4_Investment_advisor/my_symbols.py') against its NSE listings :
+##   1. names, aliases, symbols and near misses of one company resolve to its symbol
+##   2. the start of the names of several companies ('Bajaj', 'Adani', 'Tata') resolves to no symbol : none is made up
+## Exits with 1 when a check fails.
+##
+##   python benchmarks/check_symbols.py
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+RESOLVED = {
+    "Hdfc Bank": "HDFCBANK.NS",
+    "HDFC Bank Limited": "HDFCBANK.NS",
+    "Hdfc Bnak": "HDFCBANK.NS",
+    "Hindustan Aero": "HAL.NS",
+    "Tata Steel": "TATASTEEL.NS",
+    "Bajaj Finance": "BAJFINANCE.NS",
+    "Adani Ports": "ADANIPORTS.NS",
+    "TCS.BO": "TCS.BO",
+}
+AMBIGUOUS = ["Bajaj", "Adani", "Tata", "Bajaj Fin", "Hindustan"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the NSE symbol lookup of the investment advisor")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    from crew_common.loader import load_example
+
+    my_symbols = load_example("advisor", "my_symbols")
+    found = {stock: my_symbols.resolve_symbol(stock) for stock in [*RESOLVED, *AMBIGUOUS]}
+    checks = {
+        "names resolve to their symbol": all(found[stock] == symbol for stock, symbol in RESOLVED.items()),
+        "ambiguous names resolve to none": all(found[stock] is None for stock in AMBIGUOUS),
+        "no symbol made up for them": all(my_symbols.to_nse_symbol(stock) is None for stock in AMBIGUOUS),
+    }
+    report = {"found": found, "checks": checks}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for stock, symbol in found.items():
+            print(f"{stock:<20}{symbol}")
+        for check, ok in checks.items():
+            print(f"  [{'ok' if ok else 'FAIL'}] {check}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
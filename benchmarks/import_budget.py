@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+## Import time budget of the example crews. Workers are started often, and what they spend importing the crews
+## shows up directly in the latency of their first requests. For each example, in a fresh interpreter :
+##   - time to import its 'my_crew' after crewai is already imported (crewai itself is not ours to trim)
+##   - heavy modules which must only be imported on first use (yfinance, pandas, search client, ...)
+##   - agents, tasks or crews built by the import (the examples only build them in 'build_crew ()')
+## Also times 'python run_crew.py --help'. Exits with status 1 when something is over budget.
+##
+##   python benchmarks/import_budget.py --budget-ms 300
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## Modules the examples import lazily
+HEAVY_MODULES = ("yfinance", "pandas", "langchain", "langchain_community", "duckduckgo_search", "ddgs", "tiktoken")
+
+_PROBE = """
+import gc, json, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import crewai
+crewai_done = time.perf_counter()
+from crew_common.loader import load_example
+load_example({name!r})
+done = time.perf_counter()
+built = sum(1 for item in gc.get_objects() if isinstance(item, (crewai.Agent, crewai.Task, crewai.Crew)))
+print(json.dumps({{
+    "crewai_ms": (crewai_done - started) * 1000,
+    "import_ms": (done - crewai_done) * 1000,
+    "heavy": sorted(module for module in {heavy!r} if module in sys.modules),
+    "objects_built": built,
+}}))
+"""
+
+
+def probe(name):
+    env = dict(os.environ, CREWAI_DISABLE_TELEMETRY="true", OTEL_SDK_DISABLED="true")
+    code = _PROBE.format(root=ROOT, name=name, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=ROOT, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def probe_cli():
+    import time
+
+    started = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, "run_crew.py"), "--help"], capture_output=True, check=True, cwd=ROOT)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    from crew_common.loader import CREWS
+
+    parser = argparse.ArgumentParser(description="Check the import time budget of the example crews")
+    parser.add_argument("--budget-ms", type=float, default=300, help="max import time of an example, crewai excluded")
+    parser.add_argument("--cli-budget-ms", type=float, default=500, help="max time of 'run_crew.py --help' (whole process)")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per example, the fastest counts")
+    parser.add_argument("--json", action="store_true", help="print the measures as JSON")
+    args = parser.parse_args()
+
+    failures, report = [], {}
+    for name in CREWS:
+        runs = [probe(name) for _ in range(args.runs)]
+        best = min(runs, key=lambda run: run["import_ms"])
+        report[name] = best
+        if best["import_ms"] > args.budget_ms:
+            failures.append(f"{name} : import takes {best['import_ms']:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        if best["heavy"]:
+            failures.append(f"{name} : imports {', '.join(best['heavy'])} at import time")
+        if best["objects_built"]:
+            failures.append(f"{name} : builds {best['objects_built']} agents / tasks / crews at import time")
+    cli_ms = min(probe_cli() for _ in range(args.runs))
+    report["run_crew --help"] = {"ms": cli_ms}
+    if cli_ms > args.cli_budget_ms:
+        failures.append(f"run_crew.py --help takes {cli_ms:.0f} ms (budget {args.cli_budget_ms:.0f} ms)")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name in CREWS:
+            measure = report[name]
+            print(f"{name:<10} import {measure['import_ms']:7.1f} ms  (crewai {measure['crewai_ms']:7.1f} ms)  "
+                  f"heavy : {', '.join(measure['heavy']) or '-'}  built : {measure['objects_built']}")
+        print(f"run_crew.py --help {cli_ms:7.1f} ms")
+    for failure in failures:
+        print(f"OVER BUDGET {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, ROOT)
+    sys.exit(main())
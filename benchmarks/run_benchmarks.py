@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+## End-to-end benchmark of the four example crews, fully offline :
+##   - the LLM is the local stub server ('stub_llm.py'), reached through 'CREW_LLM_BASE_URL'
+##   - yfinance and DuckDuckGo are replaced by the stand-ins of 'stub_data.py'
+## Both add the injected latency given on the command line, so the numbers show the crews' own overhead
+## plus the effect of waiting on slow models and data sources (parallel tasks, caches, ...).
+##
+## Reported per crew : kickoff latency (p50 / p95), latency per task, tool calls and LLM calls per run,
+## peak Python memory of a run, and runs / second with N kickoffs at the same time.
+## Results go to 'benchmarks/results/<time>.json'. '--compare' prints the change against an earlier result file.
+##
+##   python benchmarks/run_benchmarks.py --runs 10 --concurrency 1 4 --llm-latency 0.2 --data-latency 0.05
+##   python benchmarks/run_benchmarks.py --crews advisor --compare benchmarks/results/20250101-120000.json
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+
+def percentile(values, q):
+    """q-th percentile with linear interpolation between the closest ranks."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _latency_stats(values):
+    if not values:
+        return {}
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "mean": round(sum(values) / len(values), 4),
+        "min": round(min(values), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def setup_environment(incremental=False, search_rate_limit=False):
+    """Offline settings for the crews. Call before anything from crewai or the examples is imported : they read them at import time."""
+    os.environ["CREW_LLM_CACHE"] = "passthrough"
+    os.environ["CREW_TRACE"] = "1"
+    os.environ.setdefault("CREW_LLM_API_KEY", "stub")
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ["CREWAI_DISABLE_TELEMETRY"] = "true"
+    os.environ["OTEL_SDK_DISABLED"] = "true"
+    os.environ["CREWAI_TRACING_ENABLED"] = "false"
+    for name in ("YF_CACHE_PATH", "SEARCH_CACHE_PATH"):
+        os.environ.pop(name, None)
+    ## Runs made through the service / batches are recorded in a file of their own, not in the repository's 'runs.sqlite'
+    os.environ["CREW_RUN_STORE"] = os.path.join(tempfile.mkdtemp(prefix="crew-runs-"), "runs.sqlite")
+    ## Stub price history : never mixed with real history kept in the example folder
+    os.environ["PRICE_HISTORY_PATH"] = tempfile.mkdtemp(prefix="crew-prices-")
+    if incremental:
+        ## Task outputs are kept between the runs (in a new file, so the first run starts empty)
+        os.environ["CREW_TASK_CACHE"] = "1"
+        os.environ["CREW_TASK_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="crew-bench-"), "task_cache.sqlite")
+    else:
+        os.environ["CREW_TASK_CACHE"] = "0"
+    if not search_rate_limit:
+        ## The stand-in doesn't need protecting from bans, don't let the limiter dominate the numbers
+        os.environ["SEARCH_RATE"] = "1000"
+
+
+class Bench:
+    def __init__(self, args):
+        from crew_common.loader import build_example_crew, load_example
+        from crew_common.search import search_cache
+        from crew_common.tracing import step_callback, task_callback, tracer
+        from crewai.events.event_listener import event_listener
+
+        self.event_listener = event_listener
+        self.args = args
+        self.load_example = load_example
+        self.build_example_crew = build_example_crew
+        self.search_cache = search_cache
+        self.tracer = tracer
+        self.step_callback = step_callback
+        self.task_callback = task_callback
+
+    def fresh_crew(self, name):
+        """New crew of the example : quiet, traced, and writing no output files."""
+        crew = self.build_example_crew(name, quiet=True)
+        crew.step_callback = self.step_callback
+        crew.task_callback = self.task_callback
+        for task in crew.tasks:
+            task.output_file = None
+        ## Console output of crewai is switched on for the whole process by any crew created with 'verbose = True'
+        self.event_listener.verbose = self.event_listener.formatter.verbose = False
+        return crew
+
+    def kickoff(self, name):
+        ## Same way of running as the example's own script
+        example = self.load_example(name)
+        return example.kickoff(dict(example.DEFAULT_INPUTS), crew=self.fresh_crew(name))
+
+    def clear_caches(self, name):
+        if self.args.warm_caches:
+            return
+        self.search_cache.clear()
+        if name == "advisor":
+            self.load_example(name, "my_tools").market_cache.clear()
+
+    def timed_kickoff(self, name, clear=True):
+        if clear:
+            self.clear_caches(name)
+        start = time.perf_counter()
+        try:
+            self.kickoff(name)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return time.perf_counter() - start, error
+
+    def sequential(self, name):
+        latencies, tasks, tool_calls, llm_calls, errors = [], {}, {}, [], []
+        for _ in range(self.args.warmup):
+            self.timed_kickoff(name)
+        for _ in range(self.args.runs):
+            self.tracer.reset()
+            elapsed, error = self.timed_kickoff(name)
+            if error:
+                errors.append(error)
+                continue
+            latencies.append(elapsed)
+            spans = self.tracer.spans()
+            for span in spans:
+                if span["cat"] == "task":
+                    tasks.setdefault(span["name"], []).append(span["duration_ms"] / 1000)
+            llm_calls.append(sum(1 for span in spans if span["cat"] == "llm"))
+            for counter, count in self.tracer.summary()["counters"].items():
+                if counter.startswith("tool_calls."):
+                    tool_calls.setdefault(counter[len("tool_calls."):], []).append(count)
+        runs = max(len(latencies), 1)
+        return {
+            "runs": len(latencies),
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "kickoff_s": _latency_stats(latencies),
+            "tasks_s": {task: _latency_stats(values) for task, values in tasks.items()},
+            ## Average per run (a tool missing from a run counts as 0 calls)
+            "tool_calls_per_run": {tool: round(sum(counts) / runs, 2) for tool, counts in tool_calls.items()},
+            "llm_calls_per_run": round(sum(llm_calls) / runs, 2),
+        }
+
+    def peak_memory(self, name):
+        """Peak Python memory of one kickoff (MB). Measured on a separate run, tracemalloc slows everything down."""
+        tracemalloc.start()
+        try:
+            self.timed_kickoff(name)
+            return round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        finally:
+            tracemalloc.stop()
+
+    def concurrent(self, name, workers):
+        runs = self.args.concurrent_runs or 2 * workers
+        self.clear_caches(name)
+        self.tracer.reset()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ## Caches are only cleared once before the batch : concurrent runs share them, like in a server
+            results = list(pool.map(lambda _: self.timed_kickoff(name, clear=False), range(runs)))
+        wall = time.perf_counter() - start
+        latencies = [elapsed for elapsed, error in results if not error]
+        return {
+            "runs": runs,
+            "errors": sum(1 for _, error in results if error),
+            "wall_s": round(wall, 4),
+            "runs_per_s": round(len(latencies) / wall, 4) if wall else None,
+            "kickoff_s": _latency_stats(latencies),
+        }
+
+    def run(self, name):
+        result = self.sequential(name)
+        if self.args.memory:
+            result["peak_python_mb"] = self.peak_memory(name)
+        result["concurrency"] = {str(workers): self.concurrent(name, workers) for workers in self.args.concurrency}
+        return result
+
+
+def compare(current, previous_path):
+    with open(previous_path, encoding="utf-8") as previous_file:
+        previous = json.load(previous_file)
+    print(f"\nCompared with {previous_path} ({previous.get('git_commit')}, {previous.get('timestamp')})")
+    for name, result in current["crews"].items():
+        before = previous.get("crews", {}).get(name)
+        if not before:
+            continue
+        for key in ("p50", "p95"):
+            new, old = result["kickoff_s"].get(key), before.get("kickoff_s", {}).get(key)
+            if new and old:
+                print(f"  {name:<10} kickoff {key} {old:8.3f}s -> {new:8.3f}s ({new / old - 1:+.1%})")
+        for workers, concurrent in result["concurrency"].items():
+            old = before.get("concurrency", {}).get(workers, {}).get("runs_per_s")
+            new = concurrent.get("runs_per_s")
+            if new and old:
+                print(f"  {name:<10} runs/s x{workers:<3}    {old:8.3f}  -> {new:8.3f}  ({new / old - 1:+.1%})")
+
+
+def print_report(report):
+    print(f"\n{'crew':<10}{'runs':>6}{'err':>5}{'p50 s':>9}{'p95 s':>9}{'llm':>6}{'tools':>7}{'mem MB':>8}  runs/s by concurrency")
+    for name, result in report["crews"].items():
+        kickoff = result["kickoff_s"]
+        throughput = "  ".join(f"x{workers}: {concurrent['runs_per_s']}" for workers, concurrent in result["concurrency"].items())
+        print(f"{name:<10}{result['runs']:>6}{result['errors']:>5}{kickoff.get('p50', float('nan')):>9.3f}"
+              f"{kickoff.get('p95', float('nan')):>9.3f}{result['llm_calls_per_run']:>6}"
+              f"{sum(result['tool_calls_per_run'].values()):>7.1f}{result.get('peak_python_mb', float('nan')):>8.1f}  {throughput}")
+        for task, stats in result["tasks_s"].items():
+            print(f"    {task[:48]:<48} p50 {stats['p50']:.3f}s  p95 {stats['p95']:.3f}s")
+        if result["first_error"]:
+            print(f"    first error : {result['first_error'][:200]}")
+    print(f"peak RSS {report['peak_rss_mb']} MB, stub LLM requests {report['stub']['llm_requests']}, "
+          f"data requests {report['stub']['data_requests']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the example crews")
+    parser.add_argument("--crews", nargs="+", default=["chat", "collab", "research", "advisor"],
+                        help="crews to run : chat, collab, research, advisor")
+    parser.add_argument("--runs", type=int, default=5, help="sequential kickoffs per crew")
+    parser.add_argument("--warmup", type=int, default=1, help="kickoffs per crew before measuring")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4], help="numbers of kickoffs at the same time")
+    parser.add_argument("--concurrent-runs", type=int, default=0, help="kickoffs per concurrency level (default 2 x concurrency)")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="seconds per LLM answer")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="extra random seconds per LLM answer")
+    parser.add_argument("--data-latency", type=float, default=0.05, help="seconds per yfinance / search request")
+    parser.add_argument("--answer-words", type=int, default=120, help="length of the stub's final answers")
+    parser.add_argument("--warm-caches", action="store_true", help="keep the market data / search caches between runs")
+    parser.add_argument("--incremental", action="store_true", help="reuse the outputs of unchanged tasks between runs (task cache)")
+    parser.add_argument("--search-rate-limit", action="store_true", help="keep the search rate limit (1 request / s by default)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the peak memory run")
+    parser.add_argument("--output", default=os.path.join(HERE, "results"), help="directory of the result files")
+    parser.add_argument("--compare", help="earlier result file to compare with")
+    args = parser.parse_args()
+
+    setup_environment(args.incremental, args.search_rate_limit)
+    import stub_data
+    from stub_llm import StubLLMServer
+
+    stub_data.install(yfinance_latency=args.data_latency, search_latency=args.data_latency)
+    with StubLLMServer(latency=args.llm_latency, jitter=args.llm_jitter, answer_words=args.answer_words) as server:
+        os.environ["CREW_LLM_BASE_URL"] = server.url
+        bench = Bench(args)
+        report = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "crews": {},
+        }
+        for name in args.crews:
+            print(f"Benchmarking {name} ...", flush=True)
+            report["crews"][name] = bench.run(name)
+        report["stub"] = {"llm_requests": server.requests, "data_requests": sum(stub_data.calls.values())}
+
+    ## ru_maxrss is in KB on Linux
+    report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as out:
+        json.dump(report, out, indent=2)
+    print_report(report)
+    print(f"Results written to {path}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import glob
+import io
+import os
+import sys
+import time
+import types
+import zlib
+
+import numpy as np
+import pandas as pd
+
+## Offline stand-ins for the data sources of the tools : 'yfinance' and the DuckDuckGo client.
+## 'install()' puts them in 'sys.modules', so it has to be called before the examples are imported.
+## The data is synthetic but stable (derived from the symbol), and every call waits for the injected latency.
+## Income statements are scaled copies of the (synthetic) samples in '4_Investment_advisor/samples/income_statements',
+## or a sample itself for its name ('SAMPLE_BANK').
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = os.path.join(ROOT, "4_Investment_advisor", "samples", "income_statements")
+
+## Seconds added to every data request, set by 'install'
+latency = {"yfinance": 0.0, "search": 0.0}
+calls = {"yfinance": 0, "search": 0}
+
+
+def _wait(source):
+    calls[source] += 1
+    if latency[source]:
+        time.sleep(latency[source])
+
+
+def _seed(symbol):
+    return zlib.crc32(symbol.upper().encode("utf-8"))
+
+
+def _load_samples():
+    samples = {}
+    for path in glob.glob(os.path.join(SAMPLES, "*.json")):
+        with open(path, encoding="utf-8") as sample:
+            frame = pd.read_json(io.StringIO(sample.read()), orient="index")
+        frame.columns = pd.to_datetime(frame.columns, unit="ms") if frame.columns.dtype.kind in "iu" else pd.to_datetime(frame.columns)
+        samples[os.path.basename(path)[:-len(".json")]] = frame
+    return samples
+
+
+_samples = None
+
+
+def _financials(symbol):
+    global _samples
+    if _samples is None:
+        _samples = _load_samples()
+    if symbol.upper() in _samples:
+        return _samples[symbol.upper()].copy()
+    if not _samples:
+        return pd.DataFrame()
+    ## Other symbols get a scaled copy of one of the samples
+    names = sorted(_samples)
+    frame = _samples[names[_seed(symbol) % len(names)]]
+    return frame * (0.5 + (_seed(symbol) % 100) / 100)
+
+
+def _price(symbol):
+    return round(100 + _seed(symbol) % 3000 + (_seed(symbol) % 97) / 100, 2)
+
+
+class Ticker:
+    """Part of 'yfinance.Ticker' used by the tools."""
+
+    def __init__(self, ticker, session=None):
+        self.ticker = ticker.upper()
+
+    @property
+    def fast_info(self):
+        _wait("yfinance")
+        return {"last_price": _price(self.ticker), "currency": "INR"}
+
+    @property
+    def info(self):
+        _wait("yfinance")
+        price = _price(self.ticker)
+        seed = _seed(self.ticker)
+        return {
+            "shortName": self.ticker.split(".")[0].title() + " Ltd",
+            "symbol": self.ticker,
+            "currentPrice": price,
+            "regularMarketPrice": price,
+            "currency": "INR",
+            "marketCap": price * (10_000_000 + seed % 1_000_000_000),
+            "sector": "Financial Services",
+            "industry": "Banks - Regional",
+            "city": "Mumbai",
+            "country": "India",
+            "trailingEps": round(price / 20, 2),
+            "trailingPE": 20.0,
+            "fiftyTwoWeekLow": round(price * 0.8, 2),
+            "fiftyTwoWeekHigh": round(price * 1.2, 2),
+            "fiftyDayAverage": round(price * 0.98, 2),
+            "twoHundredDayAverage": round(price * 0.95, 2),
+            "fullTimeEmployees": 1000 + seed % 200_000,
+            "revenueGrowth": (seed % 30) / 100,
+        }
+
+    @property
+    def financials(self):
+        _wait("yfinance")
+        return _financials(self.ticker)
+
+    def history(self, period="1mo", interval="1d", start=None, end=None, **kwargs):
+        _wait("yfinance")
+        return _bars(self.ticker, start=start, end=end)
+
+
+class Tickers:
+    def __init__(self, tickers, session=None):
+        symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.tickers = {symbol: Ticker(symbol) for symbol in self.symbols}
+
+
+## The bars of a day don't depend on the dates asked : the walk starts on this day, whatever the request
+BARS_ORIGIN = pd.Timestamp("2015-01-01")
+
+
+def _bars(symbol, days=5, start=None, end=None):
+    end = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp.today().normalize()
+    start = pd.Timestamp(start).normalize() if start is not None else end - pd.tseries.offsets.BDay(days)
+    days = np.arange(BARS_ORIGIN.to_datetime64().astype("datetime64[D]"), end.to_datetime64().astype("datetime64[D]") + 1)
+    dates = pd.DatetimeIndex(days[np.is_busday(days)].astype("datetime64[ns]"))
+    rng = np.random.default_rng(_seed(symbol))
+    close = _price(symbol) * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+    volume = rng.integers(100_000, 5_000_000, len(dates))
+    kept = dates >= start
+    close = close[kept]
+    return pd.DataFrame({
+        "Open": close * 0.995, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+        "Volume": volume[kept],
+    }, index=pd.DatetimeIndex(dates[kept], name="Date"))
+
+
+def download(tickers, period="5d", interval="1d", start=None, end=None, group_by="column", **kwargs):
+    """Daily bars of several symbols in one call, like 'yfinance.download'."""
+    _wait("yfinance")
+    symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+    days = int(period[:-1]) if isinstance(period, str) and period.endswith("d") else 5
+    frames = {symbol.upper(): _bars(symbol, days, start, end) for symbol in symbols}
+    bars = pd.concat(frames, axis=1)
+    if group_by != "ticker":
+        bars = bars.swaplevel(0, 1, axis=1).sort_index(axis=1)
+    return bars
+
+
+class DDGS:
+    """Part of the DuckDuckGo search client used by 'crew_common.search'."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def text(self, query, region=None, safesearch=None, timelimit=None, max_results=5, **kwargs):
+        _wait("search")
+        return [
+            {
+                "title": f"{query.title()} - result {n + 1}",
+                "href": f"https://news.example.com/{abs(hash(query)) % 10_000}/{n + 1}",
+                "body": f"Stub news about {query}: quarterly results in line with estimates, steady loan growth and stable margins.",
+            }
+            for n in range(max_results or 5)
+        ]
+
+
+def install(yfinance_latency=0.0, search_latency=0.0):
+    """Replace 'yfinance' and the DuckDuckGo client ('ddgs' / 'duckduckgo_search') by the stand-ins."""
+    latency["yfinance"] = yfinance_latency
+    latency["search"] = search_latency
+    yfinance = types.ModuleType("yfinance")
+    yfinance.Ticker, yfinance.Tickers, yfinance.download = Ticker, Tickers, download
+    yfinance.__stub__ = True
+    search = types.ModuleType("ddgs")
+    search.DDGS = DDGS
+    search.__stub__ = True
+    sys.modules["yfinance"] = yfinance
+    sys.modules["ddgs"] = search
+    sys.modules["duckduckgo_search"] = search
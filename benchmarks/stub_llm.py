@@ -0,0 +1,258 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+## Local stand-in for an OpenAI compatible chat completion API, for benchmarks and offline runs.
+## It answers in the text format crewai's agents expect ("Thought: ... Action: ... / Final Answer: ..."):
+## every tool listed in the prompt is used once, then a final answer of a fixed length is given.
+## Each answer is delayed by the injected latency, so the crews behave like they would with a real (slow) model.
+## Failures can be injected too : a share of the requests answered with HTTP 500, or 429 (rate limited, with 'Retry-After'),
+## and a share of very slow answers (to check failover and hedging, see 'benchmarks/check_router.py').
+## A requests per minute limit can be enforced like a provider does : requests over it get 429 (see 'benchmarks/check_batch.py').
+##
+##   python benchmarks/stub_llm.py --port 8765 --latency 0.5
+##   CREW_LLM_BASE_URL=http://127.0.0.1:8765/v1 python 4_Investment_advisor/my_crew.py
+
+## Values the stub uses for tool arguments, by argument name
+TOOL_ARGUMENTS = {
+    "symbol": "HDFCBANK.NS",
+    "search_query": "HDFC Bank latest news",
+    "query": "HDFC Bank latest news",
+    "company": "HDFC Bank",
+}
+
+_TOOL_PATTERN = re.compile(r"Tool Name: ([^\n]+)\nTool Arguments: (.*?)\nTool Description:", re.S)
+
+_WORDS = ("revenue growth margin outlook bank steady demand risk valuation deposits credit quality earnings "
+          "guidance sector market investors analysts capital ratio").split()
+
+
+def _text(content):
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def _tools(prompt):
+    tools = []
+    for name, arguments in _TOOL_PATTERN.findall(prompt):
+        try:
+            properties = json.loads(arguments).get("properties", {})
+        except ValueError:
+            properties = {}
+        tools.append((name.strip(), {arg: TOOL_ARGUMENTS.get(arg, "test") for arg in properties}))
+    return tools
+
+
+def react_answer(messages, answer_words=120, seed=0):
+    """Next answer of an agent for a chat : the next unused tool, or the final answer."""
+    prompt = "\n".join(_text(message.get("content")) for message in messages if message.get("role") != "assistant")
+    used = sum(1 for message in messages if message.get("role") == "assistant")
+    tools = _tools(prompt)
+    if used < len(tools):
+        name, arguments = tools[used]
+        return f"Thought: I need data from {name}\nAction: {name}\nAction Input: {json.dumps(arguments)}"
+    words = random.Random(seed + len(prompt)).choices(_WORDS, k=answer_words)
+    return "Thought: I now can give a great answer\nFinal Answer: " + " ".join(words)
+
+
+class StubLLMServer:
+    """OpenAI compatible chat completion server with injected latency, running in a background thread.
+
+    Args:
+        port (int): 0 picks a free port.
+        latency (float): Seconds added to every answer.
+        jitter (float): Extra random latency, up to this many seconds.
+        answer_words (int): Length of the final answers.
+        error_rate (float): Share of the requests answered with HTTP 500.
+        rate_limit_rate (float): Share of the requests answered with HTTP 429.
+        slow_rate (float): Share of the requests answered after 'slow_latency' seconds instead.
+        requests_per_minute (float): Requests allowed per minute, counted over the last 'rate_window' seconds. None : no limit.
+        chunk_delay (float): Seconds between the chunks of a streamed answer (a model writing it), after the latency.
+        seed (int): Seed of the random draws (jitter, failures), for repeatable runs.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, answer_words=120,
+                 error_rate=0.0, rate_limit_rate=0.0, slow_rate=0.0, slow_latency=5.0,
+                 requests_per_minute=None, rate_window=60.0, seed=0, chunk_delay=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.answer_words = answer_words
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.requests_per_minute = requests_per_minute
+        self.rate_window = rate_window
+        self.chunk_delay = chunk_delay
+        self._accepted = deque()
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _over_limit(self):
+        ## Sliding window of the accepted requests : over the limit, seconds until the oldest one leaves it
+        now = time.monotonic()
+        while self._accepted and self._accepted[0] <= now - self.rate_window:
+            self._accepted.popleft()
+        if len(self._accepted) >= self.requests_per_minute * self.rate_window / 60:
+            return self._accepted[0] + self.rate_window - now
+        self._accepted.append(now)
+        return None
+
+    def _draw(self):
+        ## What happens to the next request : (HTTP status, seconds to wait, or to retry after for a 429)
+        with self._lock:
+            self.requests += 1
+            if self.requests_per_minute:
+                retry_after = self._over_limit()
+                if retry_after is not None:
+                    self.rate_limited += 1
+                    return 429, retry_after
+            draw = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if draw < self.error_rate:
+                self.errors += 1
+                return 500, delay
+            if draw < self.error_rate + self.rate_limit_rate:
+                self.rate_limited += 1
+                return 429, 1.0
+            if self._random.random() < self.slow_rate:
+                return 200, self.slow_latency
+            return 200, delay
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/json", headers=None):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send(200, json.dumps({"object": "list", "data": [{"id": "stub", "object": "model"}]}))
+                else:
+                    self._send(404, json.dumps({"error": {"message": "not found"}}))
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, json.dumps({"error": {"message": "not found"}}))
+                    return
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                status, delay = stub._draw()
+                if status == 429:
+                    self._send(429, json.dumps({"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}),
+                               headers={"Retry-After": f"{delay:.2f}"})
+                    return
+                time.sleep(delay)
+                if status != 200:
+                    self._send(status, json.dumps({"error": {"message": "Injected server error", "type": "server_error"}}))
+                    return
+                messages = request.get("messages", [])
+                answer = react_answer(messages, stub.answer_words)
+                for stop in request.get("stop") or []:
+                    answer = answer.split(stop)[0]
+                prompt_tokens = sum(len(_text(message.get("content"))) for message in messages) // 4
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(answer) // 4,
+                         "total_tokens": prompt_tokens + len(answer) // 4}
+                model = request.get("model", "stub")
+                if request.get("stream"):
+                    self._stream(model, answer, usage)
+                    return
+                self._send(200, json.dumps({
+                    "id": f"stub-{stub.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                    "usage": usage,
+                }))
+
+            def _stream(self, model, answer, usage):
+                ## Server-sent events, a few words per chunk
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                base = {"id": f"stub-{stub.requests}", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+                pieces = re.findall(r"\S+\s*", answer) or [answer]
+                for start in range(0, len(pieces), 4):
+                    if start and stub.chunk_delay:
+                        self.wfile.flush()
+                        time.sleep(stub.chunk_delay)
+                    delta = {"content": "".join(pieces[start:start + 4])}
+                    chunk = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": None}])
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                last = dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}], usage=usage)
+                self.wfile.write(f"data: {json.dumps(last)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub OpenAI compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--answer-words", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with HTTP 429")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests answered after --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    parser.add_argument("--rpm", type=float, default=None, help="requests per minute allowed, more get HTTP 429")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="seconds over which --rpm is counted")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between the chunks of a streamed answer")
+    args = parser.parse_args()
+    server = StubLLMServer(args.host, args.port, args.latency, args.jitter, args.answer_words,
+                           error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                           slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                           requests_per_minute=args.rpm, rate_window=args.rate_window, chunk_delay=args.chunk_delay)
+    print(f"Stub LLM listening on {server.url} (set CREW_LLM_BASE_URL to this)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+## Helpers shared by the numbered crew examples (caching, rate limiting, ...)
+## The examples add the repository root to 'sys.path' so this package can be imported from any of them.
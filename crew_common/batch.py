@@ -0,0 +1,248 @@
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from crew_common.env import load_env
+from crew_common.loader import CREWS, build_example_crew, example_folder, example_inputs, load_example
+from crew_common.ratelimit import http_status, llm_limiter_stats, set_llm_limits
+from crew_common.run_store import record_run
+from crew_common.tracing import tracer
+
+## Runs a crew over many inputs (thousands of topics, queries, stocks ...) from a file, instead of one per process :
+##   - inputs are read as they are needed, from JSON lines ({"topic": "..."}, or a plain string), CSV (a column per input)
+##     or a text file (one value of the crew's first input per line). An "id" field / column names an input,
+##     otherwise its id is a hash of the inputs
+##   - a bounded pool of workers runs the crews, with the model calls kept under the provider's requests and tokens
+##     per minute limits by the adaptive limiter of 'crew_common/ratelimit.py' (slowing down on 429s, speeding up again)
+##   - each result is appended to the output (JSON lines) as soon as its crew finishes, so results are never all in memory
+##   - the output is also the checkpoint : run the same command again after an interruption, and the inputs already
+##     done are skipped (failed ones are run again)
+## Inputs failing with a transient error (429, 5xx, connection) are retried a few times, waiting longer each time.
+##
+##   python run_crew.py batch collab topics.txt --out topics.results.jsonl --concurrency 8 --rpm 30 --tpm 6000
+
+## Retries of an input failing with a transient error, and the wait before the first one (doubles with each retry)
+RETRIES = 2
+RETRY_DELAY = 5.0
+## Seconds between two progress lines
+PROGRESS_EVERY = 10.0
+
+
+def item_id(inputs):
+    """Id of an input : its 'id' if given, else a hash of the inputs (same up to case and spaces, same id)."""
+    if inputs.get("id") not in (None, ""):
+        return str(inputs["id"])
+    normalised = {key: re.sub(r"\s+", " ", str(value)).strip().casefold() for key, value in inputs.items()}
+    return hashlib.sha256(json.dumps(normalised, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def read_inputs(path, input_names):
+    """Inputs of a batch, one dict at a time : JSON lines ('.jsonl' / '.json'), CSV ('.csv'), else one value per line.
+
+    Args:
+        path (str): Input file.
+        input_names (tuple): Inputs of the crew. Plain values are given to the first one.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if extension == ".csv":
+            for row in csv.DictReader(file):
+                inputs = {column.strip(): value.strip() for column, value in row.items() if column and value and value.strip()}
+                if inputs:
+                    yield inputs
+            return
+        for number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if extension in (".jsonl", ".json"):
+                try:
+                    value = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}, line {number} : {e}") from None
+            else:
+                value = line
+            yield value if isinstance(value, dict) else {input_names[0]: str(value)}
+
+
+def read_results(path):
+    """Last record of each input in a results file (an input run again has several). Lines cut by an interruption are skipped."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "id" in record:
+                results[record["id"]] = record
+    return results
+
+
+class ResultWriter:
+    """Appends one JSON line per finished input, flushed at once : an interruption loses no finished result."""
+
+    def __init__(self, path):
+        self.path = path
+        ## A line cut by an interruption is ended first, so the next record gets a line of its own
+        cut = False
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                cut = file.read(1) != b"\n"
+        self._file = open(path, "a", encoding="utf-8")
+        if cut:
+            self._file.write("\n")
+
+    def write(self, record):
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_transient(error):
+    """Errors worth another try later : rate limits, server errors, timeouts and connection errors."""
+    status, _ = http_status(error)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError)) or "timeout" in type(error).__name__.lower()
+
+
+class BatchRunner:
+    """Runs a crew over a stream of inputs with a bounded pool of workers, writing the results as they finish.
+
+    Args:
+        crew (str): Crew to run ('collab', 'chat', ... see 'crew_common.loader.CREWS').
+        output (str): Results file (JSON lines), also read to skip the inputs already done.
+        concurrency (int): Crews running at the same time.
+        retries (int): Retries of an input failing with a transient error.
+        include_tasks (bool): Also write the output of every task, not only the crew's result.
+    """
+
+    def __init__(self, crew, output, concurrency=4, retries=RETRIES, include_tasks=False):
+        if crew not in CREWS:
+            raise ValueError(f"Unknown crew '{crew}', use one of {', '.join(CREWS)}")
+        self.crew = crew
+        self.output = output
+        self.concurrency = concurrency
+        self.retries = retries
+        self.include_tasks = include_tasks
+        self.counters = {"done": 0, "failed": 0, "skipped": 0, "retries": 0}
+        self._example = None
+        self._started = None
+        self._last_progress = 0.0
+
+    def _kickoff(self, inputs):
+        ## Runs in a worker thread. A new crew per input keeps runs apart, and its tasks write no output files
+        crew = build_example_crew(self.crew, quiet=True)
+        inputs = example_inputs(self.crew, inputs)
+        with tracer.span("kickoff", crew=self.crew, batch=True), record_run(self.crew, inputs, crew, output_files=False) as run:
+            result = self._example.kickoff(inputs, crew=crew)
+            run.done(result, crew)
+        return run.id, result
+
+    async def _run(self, pool, key, inputs):
+        loop = asyncio.get_running_loop()
+        record = {"id": key, "inputs": inputs}
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                run_id, result = await loop.run_in_executor(pool, self._kickoff, inputs)
+            except Exception as e:
+                if attempt < self.retries and is_transient(e):
+                    self.counters["retries"] += 1
+                    await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+                    continue
+                return {**record, "status": "error", "attempts": attempt + 1, "error": f"{type(e).__name__}: {e}"}
+            usage = getattr(result, "token_usage", None)
+            record.update(status="ok", run_id=run_id, attempts=attempt + 1, seconds=round(time.perf_counter() - started, 3),
+                          result=result.raw, token_usage=usage.model_dump() if usage is not None else None)
+            if self.include_tasks:
+                record["tasks"] = [{"name": task.name, "agent": task.agent, "output": task.raw} for task in result.tasks_output]
+            return record
+
+    def _progress(self, final=False):
+        now = time.monotonic()
+        if not final and now - self._last_progress < PROGRESS_EVERY:
+            return
+        self._last_progress = now
+        finished = self.counters["done"] + self.counters["failed"]
+        per_minute = finished / max(1e-9, now - self._started) * 60
+        limits = "; ".join(f"{provider} {stats['requests_per_minute'] or '-'} rpm, {stats['tokens_per_minute'] or '-'} tpm, "
+                           f"{stats['rate_limited']} x 429" for provider, stats in llm_limiter_stats().items())
+        print(f"[batch] {self.counters['done']} done, {self.counters['failed']} failed, {self.counters['skipped']} skipped, "
+              f"{per_minute:.1f} / min" + (f" ({limits})" if limits else ""), file=sys.stderr, flush=True)
+
+    async def run(self, inputs):
+        """Run the crew over 'inputs' (an iterable of dicts), skipping those already done in the output.
+
+        Returns:
+            dict: Counters : done, failed, skipped (done by an earlier run, or the same input twice) and retries.
+        """
+        load_env(example_folder(self.crew))
+        self._example = load_example(self.crew)
+        seen = {key for key, record in read_results(self.output).items() if record.get("status") == "ok"}
+        queue = asyncio.Queue(maxsize=2 * self.concurrency)
+        self._started = self._last_progress = time.monotonic()
+
+        async def work(pool, writer):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                record = await self._run(pool, *item)
+                writer.write(record)
+                self.counters["done" if record["status"] == "ok" else "failed"] += 1
+                self._progress()
+
+        with ResultWriter(self.output) as writer, ThreadPoolExecutor(max_workers=self.concurrency,
+                                                                      thread_name_prefix="crew-batch") as pool:
+            workers = [asyncio.ensure_future(work(pool, writer)) for _ in range(self.concurrency)]
+            try:
+                ## Inputs are read as the workers take them : at most 2 per worker wait in memory
+                for item in inputs:
+                    key = item_id(item)
+                    if key in seen:
+                        self.counters["skipped"] += 1
+                        continue
+                    seen.add(key)
+                    await queue.put((key, {name: value for name, value in item.items() if name != "id"}))
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+        self._progress(final=True)
+        return dict(self.counters)
+
+
+def run_batch(crew, input_path, output_path=None, concurrency=4, requests_per_minute=None, tokens_per_minute=None,
+              retries=RETRIES, include_tasks=False):
+    """Run a crew over the inputs of a file, see 'BatchRunner'. Without limits, those of 'CREW_LLM_RPM' / 'CREW_LLM_TPM' apply.
+
+    Returns:
+        dict: Counters of the run (done, failed, skipped, retries) and the output path.
+    """
+    if requests_per_minute or tokens_per_minute:
+        set_llm_limits(requests_per_minute, tokens_per_minute)
+    output_path = output_path or os.path.splitext(input_path)[0] + ".results.jsonl"
+    runner = BatchRunner(crew, output_path, concurrency=concurrency, retries=retries, include_tasks=include_tasks)
+    counters = asyncio.run(runner.run(read_inputs(input_path, CREWS[crew][1])))
+    return {**counters, "output": output_path}
@@ -0,0 +1,199 @@
+import contextlib
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+## A small in-memory cache with a time-to-live (TTL) per entry and a size bound (least recently used entry is dropped first).
+## Optionally the entries are also written to a SQLite file, so that a later run (or another worker process)
+## can pick them up instead of going to the network again.
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread safe TTL + LRU cache with optional persistence to disk.
+
+    Args:
+        maxsize (int): Maximum number of entries kept in memory.
+        ttl (float): Default time-to-live in seconds. None means entries never expire.
+        path (str): Optional SQLite file used to persist the entries across runs and processes.
+        disk_maxsize (int): Maximum number of entries kept in the SQLite file.
+    """
+
+    def __init__(self, maxsize=256, ttl=None, path=None, disk_maxsize=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.disk_maxsize = disk_maxsize or maxsize * 10
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        ## Key -> (lock, callers) of the keys being loaded by 'get_or_set'
+        self._loading = {}
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        if path:
+            self._init_disk()
+
+    ## ---- public API
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default when it is missing or expired."""
+        with self._lock:
+            value = self._get_memory(key)
+            if value is _MISSING and self.path:
+                value = self._get_disk(key)
+            if value is _MISSING:
+                self._stats["misses"] += 1
+                return default
+            return value
+
+    def set(self, key, value, ttl=_MISSING):
+        """Store value under key. 'ttl' overrides the default time-to-live for this entry."""
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._set_memory(key, value, expires)
+            if self.path:
+                self._set_disk(key, value, expires)
+
+    def get_or_set(self, key, loader, ttl=_MISSING, cache_if=None):
+        """Return the cached value for key, calling loader() and caching its result on a miss.
+
+        Concurrent misses on the same key call the loader once : the other callers wait for it and get its value.
+        Exceptions raised by the loader are not cached (each waiting caller then tries itself), nor are the values
+        for which cache_if(value) is false.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            key_lock, callers = self._loading.get(key, (None, 0))
+            key_lock = key_lock or threading.Lock()
+            self._loading[key] = (key_lock, callers + 1)
+        try:
+            with key_lock:
+                ## Loaded by another caller while this one was waiting
+                value = self._peek(key)
+                if value is _MISSING:
+                    value = loader()
+                    if cache_if is None or cache_if(value):
+                        self.set(key, value, ttl)
+                else:
+                    ## Served from the cache after all : a hit, not the miss counted by 'get'
+                    with self._lock:
+                        self._stats["misses"] -= 1
+                        self._stats["hits"] += 1
+                return value
+        finally:
+            with self._lock:
+                key_lock, callers = self._loading[key]
+                if callers == 1:
+                    del self._loading[key]
+                else:
+                    self._loading[key] = (key_lock, callers - 1)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            if self.path:
+                with self._connect() as db:
+                    db.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                with self._connect() as db:
+                    db.execute("DELETE FROM cache")
+
+    def stats(self):
+        """Return hit / miss counters and the current size of the cache."""
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+            stats["size"] = len(self._entries)
+            stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+            return stats
+
+    def __contains__(self, key):
+        """'key in cache' : whether a value is cached for key. Not counted in the stats (it is not a lookup)."""
+        return self._peek(key) is not _MISSING
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _peek(self, key):
+        ## Value of key without counting a lookup or changing the LRU order, _MISSING when missing or expired
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.time()):
+                return entry[1]
+            if self.path:
+                with self._connect() as db:
+                    row = db.execute("SELECT expires, value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and (row[0] is None or row[0] > time.time()):
+                    return pickle.loads(row[1])
+            return _MISSING
+
+    ## ---- memory layer
+
+    def _get_memory(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires, value = entry
+        if expires is not None and expires <= time.time():
+            del self._entries[key]
+            self._stats["expired"] += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return value
+
+    def _set_memory(self, key, value, expires):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    ## ---- disk layer (SQLite, safe to share between processes)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _init_disk(self):
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires REAL, stored REAL, value BLOB)")
+            db.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+
+    def _get_disk(self, key):
+        with self._connect() as db:
+            row = db.execute("SELECT expires, value FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return _MISSING
+        expires, blob = row
+        if expires is not None and expires <= time.time():
+            self._stats["expired"] += 1
+            return _MISSING
+        value = pickle.loads(blob)
+        self._set_memory(key, value, expires)
+        self._stats["disk_hits"] += 1
+        return value
+
+    def _set_disk(self, key, value, expires):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)", (key, expires, time.time(), blob))
+            db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY stored DESC LIMIT -1 OFFSET ?)",
+                (self.disk_maxsize,),
+            )
@@ -0,0 +1,213 @@
+import os
+import re
+import threading
+
+from crew_common.tokens import count_tokens
+from crew_common.tracing import tracer
+
+## Token budget for the context a task gets from the tasks it depends on. crewai pastes their full outputs into the prompt,
+## so prompts grow at every stage, while the next task mostly needs the facts. Over budget, the context is shortened in steps,
+## stopping as soon as it fits :
+##   1. duplicates out : sentences already given by another context task (or earlier in the same one)
+##   2. key facts : headings, and the sentences with numbers, amounts, percentages or dates, plus the earliest other
+##      sentences while there is room
+##   3. extractive summary, when the key facts alone are over budget : the best of them (facts first, then the earliest),
+##      each output getting its share of the budget
+## Kept sentences stay in their original order.
+## Tokens before / after are added to the task's span, and the totals to the tracer's stats ('context_budget').
+##
+## Budgets are given per task name (e.g. {'analyse': 1200, 'advise': 600}), tasks without one get the full outputs.
+## 'CREW_CONTEXT_BUDGET=0' turns budgets off, a number is the budget of the tasks which have none.
+
+## Marks a shortened output for the agent
+CONDENSED_NOTE = "(Condensed : key facts of the output)"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(₹$*])")
+_HEADING = re.compile(r"^\s*(#{1,6}\s|\*\*[^*]+\*\*:?\s*$|[A-Z][^.!?]{0,80}:\s*$)")
+_FACT = re.compile(
+    r"\d|₹|\$|%|\b(lakh|crore|million|billion|rs|inr|usd|yoy|qoq|fy|q[1-4]|"
+    r"jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec|january|february|march|april|june|july|august|september|"
+    r"october|november|december|today|yesterday|announced|reported|launched|acquired)\b",
+    re.I,
+)
+## Sentences shorter than this are never taken as duplicates ('Summary:', '- Risks', ...)
+_MIN_DUPLICATE_CHARS = 12
+
+_stats = {"tasks": 0, "condensed": 0, "tokens_before": 0, "tokens_after": 0}
+_lock = threading.Lock()
+
+
+def context_stats():
+    """Tasks given a budget, how many had their context condensed, and the tokens before / after."""
+    with _lock:
+        return {**_stats, "tokens_saved": _stats["tokens_before"] - _stats["tokens_after"]}
+
+
+tracer.register_stats("context_budget", context_stats)
+
+
+def budget_for(task, budget=None):
+    """Token budget of the task's context : from 'budget' (tokens, or dict by task name), else 'CREW_CONTEXT_BUDGET', else None."""
+    setting = os.environ.get("CREW_CONTEXT_BUDGET", "").strip().lower()
+    if setting in ("0", "false", "no", "off"):
+        return None
+    if isinstance(budget, dict):
+        budget = budget.get(task.name)
+    if budget is None and setting.isdigit():
+        budget = int(setting)
+    return budget
+
+
+## ---- splitting an output into sentences
+
+def _split(raw):
+    """Lines of an output, each a list of sentences (empty for a blank line)."""
+    return [[part for part in _SENTENCE_END.split(line) if part.strip()] for line in raw.splitlines()]
+
+
+def _join(lines):
+    ## Lines left without any sentence are None, and go away. Blank lines stay, one at a time
+    text = "\n".join(" ".join(line) for line in lines if line is not None)
+    return re.sub(r"\n\s*\n+", "\n\n", text).strip()
+
+
+def _keep(line, sentences):
+    return sentences if sentences or not line else None
+
+
+def _key(sentence):
+    return " ".join(re.findall(r"[a-z0-9]+", sentence.lower()))
+
+
+def _is_heading(sentence):
+    return bool(_HEADING.match(sentence))
+
+
+def _is_fact(sentence):
+    return bool(_FACT.search(sentence))
+
+
+def deduplicate(outputs):
+    """The outputs without the sentences (and list items) already seen in them, in order."""
+    seen = set()
+    result = []
+    for lines in outputs:
+        kept = []
+        for line in lines:
+            sentences = []
+            for sentence in line or ():
+                key = _key(sentence)
+                if len(key) >= _MIN_DUPLICATE_CHARS and key in seen:
+                    continue
+                seen.add(key)
+                sentences.append(sentence)
+            kept.append(_keep(line, sentences))
+        result.append(kept)
+    return result
+
+
+def key_facts(lines):
+    """Headings and fact sentences (numbers, amounts, dates, ...) of an output."""
+    return [_keep(line, [sentence for sentence in line or () if _is_heading(sentence) or _is_fact(sentence)]) for line in lines]
+
+
+def summarise(lines, budget):
+    """The best sentences fitting in 'budget' tokens, in their original order : headings and facts first, then the earliest."""
+    sentences = [(i, j, sentence) for i, line in enumerate(lines) for j, sentence in enumerate(line or ())]
+    total = len(sentences) or 1
+
+    def score(item):
+        position, (_, _, sentence) = item
+        return 2 * _is_fact(sentence) + 1.5 * _is_heading(sentence) + 1 - position / total
+
+    chosen = set()
+    used = 0
+    for _, (i, j, sentence) in sorted(enumerate(sentences), key=score, reverse=True):
+        tokens = count_tokens(sentence) + 1
+        if used + tokens > budget:
+            continue
+        chosen.add((i, j))
+        used += tokens
+    return [_keep(line, [sentence for j, sentence in enumerate(line or ()) if (i, j) in chosen]) for i, line in enumerate(lines)]
+
+
+def _truncate(text, budget):
+    ## Last resort, for a single sentence over budget : cut at about the budget, on a word
+    if count_tokens(text) <= budget:
+        return text
+    return text[:max(0, budget * 4)].rsplit(" ", 1)[0] + " ..."
+
+
+def condense(raws, budget):
+    """Fit the outputs of the context tasks in 'budget' tokens (together).
+
+    Returns:
+        tuple: (condensed outputs, step reached : 'full', 'deduplicated', 'key_facts' or 'summary')
+    """
+    if sum(count_tokens(raw) for raw in raws) <= budget:
+        return list(raws), "full"
+    outputs = deduplicate([_split(raw) for raw in raws])
+    texts = [_join(lines) for lines in outputs]
+    if sum(count_tokens(text) for text in texts) <= budget:
+        return texts, "deduplicated"
+
+    ## Room taken by the notes telling the agent the outputs are condensed
+    budget -= (count_tokens(CONDENSED_NOTE) + 1) * len(raws)
+    facts = [key_facts(lines) for lines in outputs]
+    fact_sizes = [sum(count_tokens(sentence) + 1 for line in lines if line for sentence in line) for lines in facts]
+    if sum(fact_sizes) <= budget:
+        ## All the facts, and the room left shared in proportion to the size of the outputs
+        step, sources = "key_facts", outputs
+        sizes = [max(1, count_tokens(text)) for text in texts]
+        room = budget - sum(fact_sizes)
+        shares = [fact_size + room * size // sum(sizes) for fact_size, size in zip(fact_sizes, sizes)]
+    else:
+        ## Each output gets a share of the budget in proportion to its facts, but at least a fair part of it
+        step, sources = "summary", facts
+        shares = [max(budget // (2 * len(raws)), budget * size // sum(fact_sizes)) for size in fact_sizes]
+        scale = min(1.0, budget / sum(shares))
+        shares = [int(share * scale) for share in shares]
+    texts = []
+    for lines, share in zip(sources, shares):
+        text = _join(summarise(lines, share)) or _truncate(_join(lines), share)
+        texts.append(f"{CONDENSED_NOTE}\n{text}")
+    return texts, step
+
+
+class ContextTask:
+    """Stands in for a context task, with a condensed output. crewai only reads the 'output' of the context tasks."""
+
+    async_execution = False
+
+    def __init__(self, task, raw):
+        self.task = task
+        self.name = task.name
+        self.description = task.description
+        self.output = task.output.model_copy(update={"raw": raw})
+
+
+def apply_budget(task, context, budget=None):
+    """Context tasks for a task, condensed to fit its budget (see 'budget_for'). Unchanged when it has no budget.
+
+    Args:
+        task (Task): The task about to run.
+        context (list): The tasks it depends on, already run.
+        budget (int | dict): Tokens, or tokens by task name.
+    """
+    budget = budget_for(task, budget)
+    if budget is None or not context:
+        return context
+    raws = [dep.output.raw or "" for dep in context]
+    before = sum(count_tokens(raw) for raw in raws)
+    texts, step = condense(raws, budget)
+    after = sum(count_tokens(text) for text in texts)
+    with _lock:
+        _stats["tasks"] += 1
+        _stats["condensed"] += step != "full"
+        _stats["tokens_before"] += before
+        _stats["tokens_after"] += after
+    tracer.annotate(context_budget=budget, context_tokens=after, context_tokens_saved=before - after, context_step=step)
+    tracer.incr("context_tokens_saved", before - after)
+    if step == "full":
+        return context
+    return [ContextTask(dep, text) for dep, text in zip(context, texts)]
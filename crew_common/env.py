@@ -0,0 +1,23 @@
+import os
+import threading
+
+## API keys and other settings come from the environment or from '.env' files.
+## The files are read once, when a model is first needed (not when the examples are imported),
+## and never override a variable which is already set.
+
+_loaded = set()
+_lock = threading.Lock()
+
+
+def load_env(*directories):
+    """Load the '.env' file of each directory (default : the current directory and its parents), once per file."""
+    try:
+        from dotenv import find_dotenv, load_dotenv
+    except ImportError:
+        return
+    paths = [os.path.join(directory, ".env") for directory in directories] or [find_dotenv(usecwd=True)]
+    with _lock:
+        for path in paths:
+            if path and path not in _loaded and os.path.isfile(path):
+                load_dotenv(path, override=False)
+            _loaded.add(path)
@@ -0,0 +1,278 @@
+import contextlib
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+from typing import Any
+
+from crewai import LLM
+from crewai.llms.base_llm import BaseLLM
+
+from crew_common.cache import TTLCache
+from crew_common.env import load_env
+from crew_common.ratelimit import http_status, llm_limiter
+from crew_common.tokens import count_tokens
+from crew_common.tracing import tracer
+
+## Record / replay cache for LLM answers. Give an agent 'llm = make_llm ("gpt-4o-mini")' instead of the plain model name.
+## The cache key is a hash of the model, the messages and the generation parameters, so the same prompt always gets the same answer.
+## The current date the agents are given ('Consider you are on : 17-Oct-2026') is left out of the key : a recording made
+## one day is replayed the next ones.
+## Mode is chosen with the 'CREW_LLM_CACHE' environment variable :
+##   passthrough (default) : no cache, every prompt goes to the model
+##   record                : answer from the cache when possible, otherwise call the model and store its answer
+##   replay                : answer only from the cache, fail on a miss. No API key or network needed (offline runs, CI, benchmarks)
+## Answers are stored in a SQLite file ('CREW_LLM_CACHE_PATH', default 'llm_cache.sqlite'), least recently stored are evicted first.
+## 'CREW_LLM_BASE_URL' sends every model to an OpenAI compatible server instead (a local model, or the stub server of the benchmarks).
+## Calls to the model (not answers from the cache) keep within the provider's rate limits, when set ('crew_common/ratelimit.py').
+## In a streamed run ('crew_common/streaming.py') the model streams its answer, and an answer from the cache is sent as one chunk.
+
+MODES = ("passthrough", "record", "replay")
+
+## Answer size counted against a tokens per minute limit before the call, for models without 'max_tokens'
+EXPECTED_ANSWER_TOKENS = 500
+
+## Format of the current date in the agents' prompts (the examples' 'today ()'), masked in the cache keys. The day before
+## is masked too, for agents made before midnight and called after. Dates in other formats (tool data : '2026-10-16') are kept
+DATE_FORMATS = ("%d-%b-%Y",)
+
+
+class LLMCacheMiss(LookupError):
+    """Raised in replay mode when a prompt was never recorded."""
+
+
+def _today():
+    return date.today()
+
+
+def mask_dates(text):
+    """'text' with the current date (in DATE_FORMATS, or the day before) replaced by '<today>'."""
+    today = _today()
+    for days in (-1, 0):
+        for date_format in DATE_FORMATS:
+            text = text.replace((today + timedelta(days)).strftime(date_format), "<today>")
+    return text
+
+
+_stores = {}
+
+
+def get_store(path=None):
+    """Shared response store for a cache file."""
+    path = path or os.environ.get("CREW_LLM_CACHE_PATH", "llm_cache.sqlite")
+    if path not in _stores:
+        _stores[path] = TTLCache(
+            maxsize=int(os.environ.get("CREW_LLM_CACHE_SIZE", 1000)),
+            disk_maxsize=int(os.environ.get("CREW_LLM_CACHE_DISK_SIZE", 20000)),
+            path=path,
+        )
+    return _stores[path]
+
+
+@contextlib.contextmanager
+def _stop_words(llm, stop):
+    ## crewai applies the agent's stop words to the LLM object it holds (the wrapper). Pass them on to the wrapped LLM
+    try:
+        from crewai.llms.base_llm import call_stop_override
+    except ImportError:
+        call_stop_override = None
+    if call_stop_override is not None:
+        with call_stop_override(llm, stop):
+            yield
+        return
+    previous, llm.stop = llm.stop, stop
+    try:
+        yield
+    finally:
+        llm.stop = previous
+
+
+@contextlib.contextmanager
+def _stream(llm, stream):
+    ## Same for streaming, which crewai turns on for the LLM objects of a streamed run's agents : the wrappers
+    try:
+        from crewai.llms.base_llm import call_stream_override
+    except ImportError:
+        call_stream_override = None
+    if not stream or call_stream_override is None:
+        yield
+        return
+    with call_stream_override(llm, True):
+        yield
+
+
+class WrappedLLM(BaseLLM):
+    """Base for LLMs which hand the actual call over to other LLMs (cache, router, ...).
+
+    Function calling is reported as unsupported, so crewai uses its text (ReAct) prompt for tools.
+    The prompt then only depends on the task and not on the model behind the wrapper.
+    """
+
+    def _forward(self, llm, messages, **kwargs):
+        with _stop_words(llm, list(getattr(self, "stop_sequences", self.stop) or [])), _stream(llm, self.streaming()):
+            return llm.call(messages, **kwargs)
+
+    def streaming(self) -> bool:
+        """Whether this call streams (the LLM's 'stream', or turned on for a streamed run)."""
+        effective = getattr(self, "_effective_stream", None)
+        return bool(effective() if effective is not None else self.stream)
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+
+class CachedLLM(WrappedLLM):
+    """LLM which answers from a record / replay cache before calling the model."""
+
+    mode: str = "record"
+    cache_path: str | None = None
+    ## Environment variable holding the API key for 'base_url' (default 'CREW_LLM_API_KEY')
+    api_key_env: str | None = None
+    inner: Any = None
+
+    def _get_inner(self):
+        if self.inner is None:
+            ## API keys from '.env', read on the first real call
+            load_env()
+            base_url = self.base_url or os.environ.get("CREW_LLM_BASE_URL")
+            params = dict(self.additional_params)
+            if self._limiter() is not None:
+                ## Within rate limits every 429 goes to the limiter, instead of being retried by the provider's SDK
+                params.setdefault("max_retries", 0)
+            if base_url:
+                ## Same model name without its provider prefix ('groq/llama3-70b-8192' -> 'llama3-70b-8192')
+                self.inner = LLM(model=self.model.split("/", 1)[-1], provider="openai", base_url=base_url,
+                                 api_key=self.api_key or os.environ.get(self.api_key_env or "CREW_LLM_API_KEY") or "none",
+                                 temperature=self.temperature, **params)
+            else:
+                self.inner = LLM(model=self.model, temperature=self.temperature, **params)
+        return self.inner
+
+    def _limiter(self):
+        ## Rate limits are per provider : the API endpoint, else the model's prefix ('groq/...', no prefix is OpenAI)
+        base_url = self.base_url or os.environ.get("CREW_LLM_BASE_URL")
+        return llm_limiter(base_url or (self.model.split("/", 1)[0] if "/" in self.model else "openai"))
+
+    def supports_function_calling(self) -> bool:
+        ## Without the cache, the agents call their tools like with the model itself (native tool calls when it has them).
+        ## Recorded prompts keep the text prompt, so recordings don't depend on the model's support
+        if self.mode == "passthrough":
+            return self._get_inner().supports_function_calling()
+        return False
+
+    def cache_key(self, messages, tools=None, response_model=None) -> str:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "max_tokens": self.max_tokens,
+            "seed": self.seed,
+            "stop": sorted(getattr(self, "stop_sequences", self.stop) or []),
+            "tools": tools,
+            "response_model": getattr(response_model, "__name__", None),
+        }
+        encoded = mask_dates(json.dumps(payload, sort_keys=True, default=str)).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None, response_model=None):
+        kwargs = dict(tools=tools, callbacks=callbacks, available_functions=available_functions,
+                      from_task=from_task, from_agent=from_agent, response_model=response_model)
+        ## Token counts in the span : 'prompt_tokens' / 'completion_tokens' as reported by the provider for a call to the model,
+        ## '..._est' counted from the text ('count_tokens' : an estimate without tiktoken), for cached answers too
+        with tracer.span("llm call", "llm", model=self.model, mode=self.mode) as attrs:
+            if tracer.enabled:
+                attrs["prompt_tokens_est"] = count_tokens(
+                    messages if isinstance(messages, str) else json.dumps(messages, default=str))
+                used = self.inner.get_token_usage_summary() if self.inner is not None else None
+            answer = self._cached_call(messages, kwargs, attrs)
+            if tracer.enabled:
+                attrs["completion_tokens_est"] = count_tokens(answer)
+                if self.inner is not None:
+                    usage = self.inner.get_token_usage_summary()
+                    if used is not None:
+                        usage = usage.delta_since(used)
+                    if usage.successful_requests:
+                        attrs["prompt_tokens"] = usage.prompt_tokens
+                        attrs["completion_tokens"] = usage.completion_tokens
+            return answer
+
+    def _cached_call(self, messages, kwargs, attrs):
+        if self.mode == "passthrough":
+            return self._call_model(messages, kwargs, attrs)
+
+        store = get_store(self.cache_path)
+        key = self.cache_key(messages, kwargs["tools"], kwargs["response_model"])
+        answer = store.get(key)
+        attrs["cache"] = "miss" if answer is None else "hit"
+        tracer.incr(f"llm_cache.{attrs['cache']}")
+        if answer is not None:
+            if self.streaming():
+                self._stream_answer(answer, kwargs)
+            return answer
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"No recorded answer of {self.model} for this prompt (key {key[:12]})")
+
+        answer = self._call_model(messages, kwargs, attrs)
+        ## Only plain text answers are stored, tool call results are not
+        if isinstance(answer, str):
+            store.set(key, answer)
+        return answer
+
+    def _stream_answer(self, answer, kwargs):
+        ## A recorded answer, streamed in one chunk like a model's would be in many
+        try:
+            from crewai.llms.base_llm import llm_call_context
+        except ImportError:
+            return
+        with llm_call_context():
+            self._emit_stream_chunk_event(chunk=answer, from_task=kwargs["from_task"], from_agent=kwargs["from_agent"])
+
+    def _call_model(self, messages, kwargs, attrs):
+        limiter = self._limiter()
+        if limiter is None:
+            return self._forward(self._get_inner(), messages, **kwargs)
+        prompt_tokens = attrs.get("prompt_tokens_est") or count_tokens(
+            messages if isinstance(messages, str) else json.dumps(messages, default=str))
+        estimated = prompt_tokens + (self.max_tokens or EXPECTED_ANSWER_TOKENS)
+        limiter.acquire(estimated)
+        try:
+            answer = self._forward(self._get_inner(), messages, **kwargs)
+        except Exception as e:
+            status, retry_after = http_status(e)
+            if status == 429:
+                limiter.rate_limited(retry_after)
+            limiter.settle(estimated, 0)
+            raise
+        limiter.success()
+        limiter.settle(estimated, prompt_tokens + count_tokens(answer if isinstance(answer, str) else str(answer)))
+        return answer
+
+    def get_context_window_size(self) -> int:
+        try:
+            return self._get_inner().get_context_window_size()
+        except Exception:
+            return super().get_context_window_size()
+
+    def get_token_usage_summary(self):
+        ## Usage of the real calls. Answers from the cache cost no tokens
+        if self.inner is not None:
+            return self.inner.get_token_usage_summary()
+        return super().get_token_usage_summary()
+
+
+def make_llm(model: str, mode=None, **params):
+    """LLM setting for an agent, going through the record / replay cache when it is enabled.
+
+    Args:
+        model (str): Model name, e.g. 'gpt-4o-mini' or 'groq/llama3-70b-8192'.
+        mode (str): 'passthrough', 'record' or 'replay'. Defaults to the 'CREW_LLM_CACHE' environment variable.
+        params: Other LLM parameters (temperature, ...).
+
+    Returns:
+        CachedLLM: Also records the LLM calls in the trace, in every mode.
+    """
+    mode = (mode or os.environ.get("CREW_LLM_CACHE") or "passthrough").lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM cache mode '{mode}', use one of {', '.join(MODES)}")
+    return CachedLLM(model=model, mode=mode, **params)
@@ -0,0 +1,75 @@
+import importlib
+import os
+import sys
+import threading
+
+## The examples are folders of plain scripts ('my_agents.py', 'my_tasks.py', ...) importing each other by name.
+## Several of them in one process would share those module names, so each example is imported on its own :
+## its folder goes first on 'sys.path', and its 'my_*' modules are taken out of 'sys.modules' again afterwards.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## Short name -> (folder, names of the inputs). Each example's 'my_crew' has 'DEFAULT_INPUTS', 'build_crew ()' and 'kickoff (inputs)',
+## and can have 'complete_inputs (inputs)' adding inputs worked out from the others (the advisor's stock symbol)
+CREWS = {
+    "chat": ("1_my_first_crew", ("query",)),
+    "collab": ("2_collaborating_agents", ("topic",)),
+    "research": ("3_agents_with_tools", ("stock",)),
+    "advisor": ("4_Investment_advisor", ("stock", "symbol")),
+}
+
+## Folder path -> its 'my_*' modules, once imported
+_examples = {}
+_lock = threading.Lock()
+
+
+def _example_modules():
+    return [name for name in sys.modules if name.startswith("my_")]
+
+
+def load_example(name, module="my_crew"):
+    """Import a module of an example ('chat', 'advisor', ... or the folder name) without clashing with the other examples.
+
+    Returns:
+        module: The imported module. Modules are loaded once per process and shared by the example's other modules
+        (e.g. 'load_example ("advisor", "my_tools")' is the 'my_tools' its agents use).
+    """
+    path = example_folder(name)
+    with _lock:
+        modules = _examples.setdefault(path, {})
+        if module not in modules:
+            saved = {name: sys.modules.pop(name) for name in _example_modules()}
+            sys.modules.update(modules)
+            sys.path.insert(0, path)
+            try:
+                importlib.import_module(module)
+            finally:
+                sys.path.remove(path)
+                for name in _example_modules():
+                    modules[name] = sys.modules.pop(name)
+                sys.modules.update(saved)
+        return modules[module]
+
+
+def build_example_crew(name, quiet=False):
+    """New crew of an example ('build_crew ()' of its 'my_crew'). 'quiet' also turns off the logs of its agents."""
+    example = load_example(name)
+    if not quiet:
+        return example.build_crew()
+    crew = example.build_crew(verbose=False)
+    for agent in crew.agents:
+        agent.verbose = False
+    return crew
+
+
+def example_inputs(name, inputs=None):
+    """Inputs a run of the example gets : its defaults updated by 'inputs', completed by its 'complete_inputs ()' if any."""
+    example = load_example(name)
+    inputs = {**example.DEFAULT_INPUTS, **(inputs or {})}
+    complete = getattr(example, "complete_inputs", None)
+    return complete(inputs) if complete is not None else inputs
+
+
+def example_folder(name):
+    """Full path of an example's folder."""
+    return os.path.join(ROOT, CREWS[name][0] if name in CREWS else name)
@@ -0,0 +1,246 @@
+import os
+import threading
+import time
+
+from crew_common.tracing import tracer
+
+## Token bucket rate limiter. The bucket refills at 'rate' tokens per second, up to 'capacity' tokens.
+## Each request takes a token, and waits when the bucket is empty. This allows short bursts but keeps
+## the average request rate under the limit, even when many crews (threads) share the same service.
+##
+## Model providers limit requests per minute and tokens per minute. 'AdaptiveLimiter' keeps LLM calls under both, and
+## adapts when the provider answers 429 anyway (limits shared with other programs, lower than configured, ...) :
+## the rates are halved and calls wait for the 'Retry-After', then the rates grow back a little with each call that
+## goes through (additive increase, multiplicative decrease, like TCP). One limiter per provider (API endpoint), used by
+## every 'make_llm' model once limits are set with 'set_llm_limits' or 'CREW_LLM_RPM' / 'CREW_LLM_TPM'.
+
+## Seconds of calls a limiter lets through at once. Its buckets start empty : the provider's window may still hold the calls
+## of a run just before (another limiter), so over any window the calls stay within the rate (and one burst after a pause)
+BURST_SECONDS = 1.0
+## On a 429 the rates are multiplied by DECREASE (not below MIN_SCALE of the limits), once per DECREASE_INTERVAL seconds
+## (calls in flight together all get one). Each call that goes through adds INCREASE of the limits back
+DECREASE = 0.5
+MIN_SCALE = 0.05
+DECREASE_INTERVAL = 1.0
+INCREASE = 0.02
+## Pause after a 429 without 'Retry-After' (seconds)
+DEFAULT_PAUSE = 1.0
+
+
+class TokenBucket:
+    """Thread safe token bucket.
+
+    Args:
+        rate (float): Tokens added per second (average requests per second allowed).
+        capacity (float): Maximum number of tokens in the bucket (size of a burst). Defaults to 'rate', at least 1.
+        tokens (float): Tokens in the bucket at the start. Defaults to 'capacity' (full).
+    """
+
+    def __init__(self, rate, capacity=None, tokens=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity if tokens is None else float(tokens)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if they are available right now. Returns True when they were taken."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """Wait until tokens are available and take them.
+
+        Args:
+            tokens (float): Number of tokens to take. More than 'capacity' is allowed and simply waits longer.
+            timeout (float): Maximum number of seconds to wait. None waits as long as needed.
+
+        Returns:
+            bool: True when the tokens were taken, False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                needed = min(tokens, self.capacity)
+                if self._tokens >= needed:
+                    ## Requests bigger than the bucket go negative, later requests pay back the difference
+                    self._tokens -= tokens
+                    return True
+                wait = (needed - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def set_rate(self, rate, capacity=None):
+        """Change the refill rate (and optionally the capacity) of the bucket."""
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+            if capacity is not None:
+                self.capacity = float(capacity)
+                self._tokens = min(self._tokens, self.capacity)
+
+    def charge(self, tokens):
+        """Take tokens without waiting : the bucket may go negative, and later requests wait longer.
+        Negative tokens are given back (up to 'capacity')."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - tokens)
+
+
+def http_status(error):
+    """HTTP status of an error (or of its causes), and the 'Retry-After' seconds when the server sent one.
+
+    Returns:
+        tuple: (status or None, seconds or None)
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        status = getattr(error, "status_code", None)
+        response = getattr(error, "response", None)
+        if isinstance(status, int):
+            retry_after = None
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (AttributeError, TypeError, ValueError):
+                pass
+            return status, retry_after
+        error = error.__cause__ or error.__context__
+    return None, None
+
+
+class AdaptiveLimiter:
+    """Requests per minute and tokens per minute limits of a model provider, lowered on 429 and raised back slowly.
+
+    Args:
+        requests_per_minute (float): None for no request limit.
+        tokens_per_minute (float): None for no token limit.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.scale = 1.0
+        self._requests = self._bucket(requests_per_minute)
+        self._tokens = self._bucket(tokens_per_minute)
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self.counters = {"calls": 0, "tokens": 0, "rate_limited": 0, "decreases": 0, "waited_s": 0.0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(per_minute):
+        if not per_minute:
+            return None
+        rate = per_minute / 60
+        return TokenBucket(rate, capacity=max(1.0, rate * BURST_SECONDS), tokens=0)
+
+    def _set_scale(self, scale):
+        self.scale = scale
+        for bucket, per_minute in ((self._requests, self.requests_per_minute), (self._tokens, self.tokens_per_minute)):
+            if bucket is not None:
+                rate = per_minute / 60 * scale
+                bucket.set_rate(rate, capacity=max(1.0, rate * BURST_SECONDS))
+
+    def acquire(self, tokens=0):
+        """Wait until a call of about 'tokens' tokens (prompt and answer) is within the limits."""
+        started = time.monotonic()
+        pause = self._paused_until - started
+        if pause > 0:
+            time.sleep(pause)
+        if self._requests is not None:
+            self._requests.acquire()
+        if self._tokens is not None and tokens:
+            self._tokens.acquire(tokens)
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters["tokens"] += tokens
+            self.counters["waited_s"] += time.monotonic() - started
+
+    def settle(self, estimated, actual):
+        """Correct the tokens taken for a call once its actual size is known."""
+        if self._tokens is not None:
+            self._tokens.charge(actual - estimated)
+        with self._lock:
+            self.counters["tokens"] += actual - estimated
+
+    def success(self):
+        with self._lock:
+            if self.scale < 1.0:
+                self._set_scale(min(1.0, self.scale + INCREASE))
+
+    def rate_limited(self, retry_after=None):
+        """The provider answered 429 : pause every call for 'retry_after' seconds and lower the rates."""
+        now = time.monotonic()
+        with self._lock:
+            self.counters["rate_limited"] += 1
+            self._paused_until = max(self._paused_until, now + (DEFAULT_PAUSE if retry_after is None else retry_after))
+            if now - self._last_decrease >= DECREASE_INTERVAL:
+                self._last_decrease = now
+                self.counters["decreases"] += 1
+                self._set_scale(max(MIN_SCALE, self.scale * DECREASE))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests_per_minute": self.requests_per_minute and round(self.requests_per_minute * self.scale, 1),
+                "tokens_per_minute": self.tokens_per_minute and round(self.tokens_per_minute * self.scale),
+                "scale": round(self.scale, 3),
+                **self.counters,
+                "waited_s": round(self.counters["waited_s"], 3),
+            }
+
+
+## Limits of every provider (None : not set yet, read from the environment on first use), and the limiter of each one
+_limits = None
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_limit(name):
+    value = os.environ.get(name, "").strip()
+    return float(value) if value else None
+
+
+def set_llm_limits(requests_per_minute=None, tokens_per_minute=None):
+    """Requests and tokens per minute allowed to each model provider from now on (None : no limit).
+    Limiters already handed out keep their limits, so set them before building the crews."""
+    global _limits
+    with _limiters_lock:
+        _limits = (requests_per_minute, tokens_per_minute)
+        _limiters.clear()
+
+
+def llm_limiter(provider):
+    """Shared limiter of a provider ('openai', 'groq', or the API endpoint), or None when no limits are set.
+    Limits come from 'set_llm_limits', else 'CREW_LLM_RPM' / 'CREW_LLM_TPM'."""
+    global _limits
+    with _limiters_lock:
+        if _limits is None:
+            _limits = (_env_limit("CREW_LLM_RPM"), _env_limit("CREW_LLM_TPM"))
+        if not any(_limits):
+            return None
+        if provider not in _limiters:
+            _limiters[provider] = AdaptiveLimiter(*_limits)
+        return _limiters[provider]
+
+
+def llm_limiter_stats():
+    """Current limits, calls, 429s and waiting time of each provider's limiter."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {provider: limiter.stats() for provider, limiter in limiters.items()}
+
+
+tracer.register_stats("rate_limits", llm_limiter_stats)
@@ -0,0 +1,340 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any
+
+from crewai.types.usage_metrics import UsageMetrics
+
+from crew_common.env import load_env
+from crew_common.llm_cache import LLMCacheMiss, WrappedLLM, make_llm
+from crew_common.ratelimit import http_status
+from crew_common.tracing import tracer
+
+## Model router : an agent gets 'llm = make_routed_llm ("fast")' instead of a fixed model name, and every call goes to
+## the best of several backends (models / providers) of that tier :
+##   - the fastest healthy one, by the median latency of its last calls (backends never used yet, or not for a while, are tried first)
+##   - a backend answering 429 or 5xx (or not reachable) is left aside for a while ('Retry-After', or a growing cooldown),
+##     and the call moves on to the next backend at once. Other errors (401 / 403 : wrong API key, 400 : bad request) are
+##     raised as they are : a configuration problem is not hidden by another backend answering
+##   - a call slower than the backend's usual 95th percentile latency is hedged : the same call is sent to the next backend,
+##     and the first answer wins (the other one is dropped). Costs an extra call now and then, cuts the slow tail.
+##     Streamed calls ('crew_common/streaming.py') are not hedged : their first words already come early
+## Latency, errors and rate limits of each backend are kept for the whole process, in the tracer's stats ('router').
+##
+## Tiers are lists of models, best first. Change one with 'CREW_LLM_TIER_<NAME>', e.g. CREW_LLM_TIER_FAST="gpt-4o-mini,groq/llama-3.1-8b-instant".
+## Models of a provider without an API key ('OPENAI_API_KEY', 'GROQ_API_KEY') are skipped. 'CREW_LLM_BASE_URL' sends all of them
+## to one OpenAI compatible server, like for 'make_llm'. 'CREW_LLM_HEDGE_AFTER' sets the hedging delay in seconds (0 : no hedging).
+
+TIERS = {
+    "fast": ("groq/llama-3.1-8b-instant", "gpt-4o-mini"),
+    "default": ("gpt-4o-mini", "groq/llama-3.3-70b-versatile"),
+    "strong": ("gpt-4o", "groq/llama-3.3-70b-versatile"),
+}
+
+## Provider prefix -> (OpenAI compatible endpoint, API key variable). Groq needs no extra client this way
+PROVIDERS = {
+    "openai": (None, "OPENAI_API_KEY"),
+    "groq": ("https://api.groq.com/openai/v1", "GROQ_API_KEY"),
+}
+
+## Calls kept per backend for its error rate and latency percentiles
+WINDOW = 50
+## Seconds without a call after which a backend's latency is measured again
+PROBE_AFTER = 30.0
+## Error rate over the window above which a backend is only used when no other one is left
+MAX_ERROR_RATE = 0.5
+## Cooldown after a failure : doubles with each failure in a row, up to the maximum (seconds)
+COOLDOWN = 2.0
+MAX_COOLDOWN = 60.0
+## Hedging delay : the backend's p95 latency once it has enough calls (at least MIN_HEDGE_AFTER), DEFAULT_HEDGE_AFTER before
+MIN_HEDGE_AFTER = 1.0
+DEFAULT_HEDGE_AFTER = 15.0
+_MIN_SAMPLES = 5
+
+
+def _provider(model):
+    return model.split("/", 1)[0] if "/" in model else "openai"
+
+
+def _should_fail_over(error):
+    """408, 429, 5xx, timeouts and connection errors are the backend's problem : another backend may answer.
+    Others (401 / 403 : a wrong API key, 400 / 404 : a wrong model or request) are raised, not hidden by a failover."""
+    status, _ = http_status(error)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError, LLMCacheMiss)) or "timeout" in type(error).__name__.lower()
+
+
+class BackendHealth:
+    """Rolling latency and error counts of one backend, shared by every router using it."""
+
+    def __init__(self, name):
+        self.name = name
+        self.last_call = 0.0
+        self._calls = deque(maxlen=WINDOW)
+        self._failures_in_row = 0
+        self.cooldown_until = 0.0
+        self.counters = {"calls": 0, "errors": 0, "rate_limited": 0, "hedges": 0, "failovers": 0}
+        self._lock = threading.Lock()
+
+    def success(self, seconds, measured=True):
+        ## 'measured' False : the call also set up the client (first call), its time says nothing about the backend
+        with self._lock:
+            self.counters["calls"] += 1
+            self.last_call = time.monotonic()
+            self._calls.append((True, seconds if measured else None))
+            self._failures_in_row = 0
+            self.cooldown_until = 0.0
+
+    def failure(self, error, seconds):
+        status, retry_after = http_status(error)
+        with self._lock:
+            self.counters["calls"] += 1
+            self.last_call = time.monotonic()
+            self.counters["rate_limited" if status == 429 else "errors"] += 1
+            self._calls.append((False, seconds))
+            self._failures_in_row += 1
+            cooldown = retry_after if retry_after is not None else COOLDOWN * 2 ** (self._failures_in_row - 1)
+            self.cooldown_until = time.monotonic() + min(MAX_COOLDOWN, cooldown)
+
+    def count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def error_rate(self):
+        with self._lock:
+            calls = list(self._calls)
+        return sum(1 for ok, _ in calls if not ok) / len(calls) if calls else 0.0
+
+    def percentile(self, q, min_samples=1):
+        """Latency percentile (0 - 1) of the last successful calls, None with fewer than 'min_samples' of them."""
+        with self._lock:
+            latencies = sorted(seconds for ok, seconds in self._calls if ok and seconds is not None)
+        if len(latencies) < min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def p95(self):
+        return self.percentile(0.95, _MIN_SAMPLES)
+
+    def expected_latency(self):
+        """Latency to rank the backend by (median, not thrown off by a few slow answers) : None when unknown or
+        out of date, the backend is then tried first."""
+        if time.monotonic() - self.last_call > PROBE_AFTER:
+            return None
+        return self.percentile(0.5)
+
+    def healthy(self):
+        return time.monotonic() >= self.cooldown_until and self.error_rate() <= MAX_ERROR_RATE
+
+    def stats(self):
+        p50, p95 = self.percentile(0.5), self.p95()
+        return {
+            **self.counters,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_rate(), 3),
+            "cooling_down_s": round(max(0.0, self.cooldown_until - time.monotonic()), 1),
+        }
+
+
+_health = {}
+_health_lock = threading.Lock()
+_pool = None
+
+
+def backend_health(llm):
+    """Health of a backend LLM (by model and endpoint)."""
+    name = f"{llm.model}@{llm.base_url}" if llm.base_url else llm.model
+    with _health_lock:
+        if name not in _health:
+            _health[name] = BackendHealth(name)
+        return _health[name]
+
+
+def router_stats():
+    """Calls, errors, rate limits, hedges, failovers and latency of every backend used so far."""
+    with _health_lock:
+        backends = list(_health.values())
+    return {health.name: health.stats() for health in backends}
+
+
+tracer.register_stats("router", router_stats)
+
+
+def _executor():
+    ## Hedged calls need a thread each. One pool for the process
+    global _pool
+    with _health_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-route")
+        return _pool
+
+
+def _available(llm):
+    ## A backend can be used when its provider's API key is set (or all calls go to 'CREW_LLM_BASE_URL')
+    if os.environ.get("CREW_LLM_BASE_URL") or llm.api_key:
+        return True
+    key_variable = getattr(llm, "api_key_env", None)
+    if key_variable is None:
+        if llm.base_url:
+            return True
+        key_variable = PROVIDERS.get(_provider(llm.model), (None, None))[1]
+    return key_variable is None or bool(os.environ.get(key_variable))
+
+
+class RoutedLLM(WrappedLLM):
+    """LLM sending each call to the fastest healthy of its backends, with failover and hedging.
+
+    Args:
+        backends (list): LLMs to route to (see 'backend_llm'), preferred first.
+        hedge_after (float): Seconds after which a slow call is sent to a second backend as well. 0 : no hedging.
+            Default : 'CREW_LLM_HEDGE_AFTER', else the backend's p95 latency.
+        tier (str): Name of the tier, for the traces.
+    """
+
+    backends: list[Any] = []
+    hedge_after: float | None = None
+    tier: str | None = None
+
+    def _ranked(self):
+        ## Healthy backends by latency (unknown latency first, so each gets tried), then the others by end of cooldown
+        load_env()
+        candidates = [llm for llm in self.backends if _available(llm)] or list(self.backends)
+        healths = [(llm, backend_health(llm)) for llm in candidates]
+        healthy = [(index, pair) for index, pair in enumerate(healths) if pair[1].healthy()]
+        others = [(index, pair) for index, pair in enumerate(healths) if not pair[1].healthy()]
+        healthy.sort(key=lambda item: (item[1][1].expected_latency() or 0.0, item[0]))
+        others.sort(key=lambda item: (item[1][1].cooldown_until, item[0]))
+        return [pair for _, pair in healthy + others]
+
+    def _hedge_delay(self, health):
+        setting = self.hedge_after if self.hedge_after is not None else os.environ.get("CREW_LLM_HEDGE_AFTER")
+        if setting is not None and setting != "":
+            return float(setting) or None
+        p95 = health.p95()
+        return max(MIN_HEDGE_AFTER, p95) if p95 is not None else DEFAULT_HEDGE_AFTER
+
+    def _attempt(self, llm, health, messages, kwargs, started_event=None):
+        if started_event is not None:
+            started_event.set()
+        cold = getattr(llm, "inner", True) is None
+        started = time.perf_counter()
+        try:
+            answer = self._forward(llm, messages, **kwargs)
+        except LLMCacheMiss:
+            ## Not the backend's fault : another one may have the answer recorded
+            raise
+        except Exception as e:
+            ## A configuration error says nothing about the backend's health
+            if _should_fail_over(e):
+                health.failure(e, time.perf_counter() - started)
+            raise
+        health.success(time.perf_counter() - started, measured=not cold)
+        return answer
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None, response_model=None):
+        kwargs = dict(tools=tools, callbacks=callbacks, available_functions=available_functions,
+                      from_task=from_task, from_agent=from_agent, response_model=response_model)
+        queue = self._ranked()
+        with tracer.span("llm route", "route", tier=self.tier) as attrs:
+            running = {}
+            hedged = False
+            error = None
+
+            def launch():
+                llm, health = queue.pop(0)
+                started = threading.Event()
+                ## Each attempt runs with a copy of the caller's context (crewai's stop words and event scope are context variables)
+                future = _executor().submit(contextvars.copy_context().run, self._attempt, llm, health, messages, kwargs, started)
+                running[future] = (llm, health, started)
+                attrs.setdefault("attempts", []).append(llm.model)
+
+            launch()
+            ## A streamed call is never hedged : the chunks of both answers would be mixed up
+            hedging = not self.streaming()
+            while running:
+                _, first_health, first_started = next(iter(running.values()))
+                delay = self._hedge_delay(first_health) if hedging and queue and not hedged and len(running) == 1 else None
+                if delay is not None and not first_started.is_set():
+                    ## The hedge clock starts with the call to the backend, not while the attempt waits for a thread of the pool
+                    queued = time.perf_counter()
+                    first_started.wait()
+                    attrs["queued_ms"] = round((time.perf_counter() - queued) * 1000, 3)
+                done, _ = wait(running, timeout=delay, return_when=FIRST_COMPLETED)
+                if not done:
+                    ## Slow call : ask the next backend too, first answer wins
+                    hedged = True
+                    first_health.count("hedges")
+                    attrs["hedged"] = True
+                    launch()
+                    continue
+                for future in done:
+                    llm, health, _ = running.pop(future)
+                    try:
+                        answer = future.result()
+                    except Exception as e:
+                        if not _should_fail_over(e):
+                            raise
+                        error = e
+                        if queue and not running:
+                            health.count("failovers")
+                            launch()
+                        continue
+                    attrs["backend"] = llm.model
+                    return answer
+            raise error
+
+    def get_context_window_size(self) -> int:
+        sizes = []
+        for llm in self.backends:
+            try:
+                sizes.append(llm.get_context_window_size())
+            except Exception:
+                pass
+        return min(sizes) if sizes else super().get_context_window_size()
+
+    def get_token_usage_summary(self):
+        usage = UsageMetrics()
+        for llm in self.backends:
+            usage.add_usage_metrics(llm.get_token_usage_summary())
+        return usage
+
+
+def backend_llm(model, **params):
+    """LLM for one backend of a router : record / replay cache and tracing like 'make_llm', no retries of its own
+    (the router moves on to another backend instead), and the provider's OpenAI compatible endpoint ('groq/...')."""
+    params.setdefault("max_retries", 0)
+    endpoint, key_variable = PROVIDERS.get(_provider(model), (None, None))
+    if endpoint and "base_url" not in params and not os.environ.get("CREW_LLM_BASE_URL"):
+        params.update(base_url=endpoint, api_key_env=key_variable)
+    return make_llm(model, **params)
+
+
+def tier_models(tier):
+    """Models of a tier, best first : 'CREW_LLM_TIER_<TIER>' (comma separated) or TIERS."""
+    setting = os.environ.get(f"CREW_LLM_TIER_{tier.upper()}")
+    if setting:
+        return [model.strip() for model in setting.split(",") if model.strip()]
+    if tier not in TIERS:
+        raise ValueError(f"Unknown model tier '{tier}', use one of {', '.join(TIERS)} or set CREW_LLM_TIER_{tier.upper()}")
+    return list(TIERS[tier])
+
+
+def make_routed_llm(tier="default", hedge_after=None, **params):
+    """LLM setting for an agent : the models of a tier behind a router.
+
+    Args:
+        tier (str): 'fast', 'default', 'strong' (see TIERS), or any tier set with 'CREW_LLM_TIER_<NAME>'.
+        hedge_after (float): Seconds before a slow call is hedged, 0 for no hedging. Default : from the backend's latency.
+        params: Other LLM parameters (temperature, ...), for every backend.
+
+    Returns:
+        RoutedLLM
+    """
+    backends = [backend_llm(model, **params) for model in tier_models(tier)]
+    return RoutedLLM(model=f"router/{tier}", backends=backends, hedge_after=hedge_after, tier=tier,
+                     temperature=params.get("temperature"))
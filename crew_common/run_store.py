@@ -0,0 +1,313 @@
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from crew_common.tracing import tracer
+
+## Run store : every kickoff made through 'run_crew.py', the service, a batch, the portfolio or the examples' 'my_crew.py'
+## is recorded in a SQLite file ('CREW_RUN_STORE', default 'runs.sqlite', '0' turns it off) : inputs, result, the output
+## and timing of each task, and the tool calls each task made, with their results. Output files like 'Analysis.md' /
+## 'Recommendation.md' are overwritten by the next run (or by a run at the same time), the store keeps every run.
+## Runs are indexed by stock symbol, subject (the stock, topic or query), crew and start time, so earlier analyses
+## are read back at once, without running the crew (or any LLM call) again :
+##   python run_crew.py show --symbol HDFCBANK.NS --task advise    latest recommendation for HDFC Bank
+##   python run_crew.py show --today                               all the runs of today
+##   python run_crew.py show <run id> --save reports               a run, its task outputs written to their files
+## The file uses a WAL journal : readers don't wait for writers, and many threads / processes can record at the same time
+## (each run is written in one short transaction, when it ends).
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS runs (
+        id TEXT PRIMARY KEY, crew TEXT NOT NULL, symbol TEXT, subject TEXT, started REAL NOT NULL, seconds REAL,
+        status TEXT NOT NULL, inputs TEXT, result TEXT, error TEXT, token_usage TEXT)""",
+    "CREATE INDEX IF NOT EXISTS runs_by_symbol ON runs (symbol, started)",
+    "CREATE INDEX IF NOT EXISTS runs_by_subject ON runs (subject, started)",
+    "CREATE INDEX IF NOT EXISTS runs_by_crew ON runs (crew, started)",
+    "CREATE INDEX IF NOT EXISTS runs_by_start ON runs (started)",
+    """CREATE TABLE IF NOT EXISTS task_outputs (
+        run_id TEXT NOT NULL, position INTEGER NOT NULL, name TEXT, agent TEXT, output_file TEXT, raw TEXT,
+        started REAL, seconds REAL, PRIMARY KEY (run_id, position))""",
+    """CREATE TABLE IF NOT EXISTS tool_calls (
+        run_id TEXT NOT NULL, position INTEGER NOT NULL, task TEXT, tool TEXT, arguments TEXT, output TEXT,
+        PRIMARY KEY (run_id, position))""",
+)
+
+## Shape of the stock symbols runs are indexed by ('HDFCBANK.NS', 'TCS.BO'). Other values ('Tata Steel') are kept as the subject
+_SYMBOL = re.compile(r"[A-Z0-9&-]+\.(?:NS|BO)")
+
+## Columns of a run in the lists (the result and the task outputs come with 'RunStore.get')
+_RUN_COLUMNS = "id, crew, symbol, subject, started, seconds, status, inputs, error"
+
+
+def normalise_subject(text):
+    """'  Hdfc   Bank ' -> 'hdfc bank'."""
+    return re.sub(r"\s+", " ", str(text)).strip().casefold()
+
+
+def start_of_day(day=None):
+    """Time (seconds since the epoch) of the local midnight starting 'day' (a date or 'YYYY-MM-DD', default today)."""
+    if isinstance(day, str):
+        day = datetime.strptime(day, "%Y-%m-%d")
+    day = day or datetime.now()
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+class Run:
+    """A kickoff being recorded : give it the crew's result with 'done'.
+
+    Args:
+        crew (str): Crew name ('advisor', 'collab', ...).
+        inputs (dict): Inputs of the run, as the tasks get them.
+        output_files (list): Output file of each task ('Analysis.md', ... or None), for 'RunStore.export'.
+    """
+
+    def __init__(self, crew, inputs, output_files=()):
+        self.id = uuid.uuid4().hex
+        self.crew = crew
+        self.inputs = dict(inputs or {})
+        self.output_files = list(output_files)
+        self.started = time.time()
+        self.seconds = None
+        self.result = None
+        self.tasks = None
+        self.error = None
+
+    def done(self, result, crew=None):
+        """Record the crew's result (CrewOutput). With the crew, the start and duration of each task are recorded too."""
+        self.result = result
+        self.tasks = list(crew.tasks) if crew is not None else None
+
+    @property
+    def symbol(self):
+        symbol = str(self.inputs.get("symbol") or "").strip().upper()
+        return symbol if _SYMBOL.fullmatch(symbol) else None
+
+    @property
+    def subject(self):
+        ## The stock, topic or query : the first input of the crew
+        for value in self.inputs.values():
+            return normalise_subject(value)
+        return None
+
+
+class RunStore:
+    """Recorded runs in a SQLite file, safe to share between threads and processes.
+
+    Args:
+        path (str): SQLite file.
+    """
+
+    def __init__(self, path="runs.sqlite"):
+        self.path = path
+        with self._connect() as db:
+            for statement in _SCHEMA:
+                db.execute(statement)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            ## Safe with WAL : a crash can lose the last runs, but never corrupts the file
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    ## ---- recording
+
+    def save(self, run, tool_calls=()):
+        """Write a finished (or failed) run, its task outputs and its tool calls, in one transaction."""
+        result = run.result
+        usage = getattr(result, "token_usage", None)
+        task_rows = []
+        for position, output in enumerate(getattr(result, "tasks_output", None) or []):
+            task = run.tasks[position] if run.tasks and position < len(run.tasks) else None
+            started = getattr(task, "start_time", None)
+            ended = getattr(task, "end_time", None)
+            output_file = run.output_files[position] if position < len(run.output_files) else None
+            task_rows.append((
+                run.id, position, output.name, output.agent, output_file, output.raw,
+                started.timestamp() if started else None,
+                round((ended - started).total_seconds(), 3) if started and ended else None,
+            ))
+        tool_rows = [
+            (run.id, position, call.get("task"), call["tool"],
+             json.dumps({"args": call["args"], "kwargs": call["kwargs"]}, default=str), call["output"])
+            for position, call in enumerate(tool_calls)
+        ]
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run.id, run.crew, run.symbol, run.subject, run.started, run.seconds,
+                 "error" if run.error else "ok", json.dumps(run.inputs, default=str),
+                 getattr(result, "raw", None), run.error, json.dumps(usage.model_dump()) if usage is not None else None),
+            )
+            db.executemany("INSERT INTO task_outputs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", task_rows)
+            db.executemany("INSERT INTO tool_calls VALUES (?, ?, ?, ?, ?, ?)", tool_rows)
+
+    @contextlib.contextmanager
+    def record(self, crew, inputs, output_files=()):
+        """Record the kickoff made in the block, with the tool calls made in it. Failed runs are recorded too.
+
+        Yields:
+            Run: Give it the result with 'run.done (result, crew)'.
+        """
+        run = Run(crew, inputs, output_files)
+        started = time.perf_counter()
+        with tracer.record_tool_calls() as tool_calls:
+            try:
+                yield run
+            except BaseException as e:
+                run.error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                run.seconds = round(time.perf_counter() - started, 3)
+                try:
+                    self.save(run, tool_calls)
+                except sqlite3.Error as e:
+                    ## The run itself went fine : its result is not lost for a store that can't be written
+                    print(f"Run {run.id} not recorded in {self.path} : {e}", file=sys.stderr)
+                    tracer.incr("run_store.errors")
+
+    ## ---- queries
+
+    @staticmethod
+    def _filters(crew=None, symbol=None, subject=None, since=None, until=None, status=None):
+        clauses, values = [], []
+        for column, value in (("crew", crew), ("symbol", symbol and symbol.strip().upper()),
+                              ("subject", subject and normalise_subject(subject)), ("status", status)):
+            if value:
+                clauses.append(f"runs.{column} = ?")
+                values.append(value)
+        if since is not None:
+            clauses.append("runs.started >= ?")
+            values.append(since)
+        if until is not None:
+            clauses.append("runs.started < ?")
+            values.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", values
+
+    @staticmethod
+    def _run_dict(row):
+        run = dict(row)
+        run["inputs"] = json.loads(run["inputs"] or "{}")
+        if run.get("token_usage") is not None:
+            run["token_usage"] = json.loads(run["token_usage"])
+        return run
+
+    def runs(self, crew=None, symbol=None, subject=None, since=None, until=None, status=None, limit=50):
+        """Recorded runs, latest first, without their outputs.
+
+        Args:
+            crew (str): Only runs of this crew.
+            symbol (str): Only runs for this stock symbol ('HDFCBANK.NS').
+            subject (str): Only runs for this stock, topic or query (up to case and spaces).
+            since (float): Only runs started at or after this time (seconds since the epoch, see 'start_of_day').
+            until (float): Only runs started before this time.
+            status (str): 'ok' or 'error'.
+            limit (int): At most this many runs.
+        """
+        where, values = self._filters(crew, symbol, subject, since, until, status)
+        with self._connect() as db:
+            rows = db.execute(f"SELECT {_RUN_COLUMNS} FROM runs{where} ORDER BY started DESC LIMIT ?",
+                              (*values, limit)).fetchall()
+        return [self._run_dict(row) for row in rows]
+
+    def get(self, run_id):
+        """A run with its result, task outputs and tool calls, or None. A unique start of the id is enough."""
+        with self._connect() as db:
+            rows = db.execute("SELECT * FROM runs WHERE id >= ? AND id < ? LIMIT 2", (run_id, run_id + "\uffff")).fetchall()
+            if len(rows) != 1:
+                return None
+            run = self._run_dict(rows[0])
+            run["tasks"] = [dict(row) for row in db.execute(
+                "SELECT name, agent, output_file, raw, started, seconds FROM task_outputs WHERE run_id = ? ORDER BY position",
+                (run["id"],))]
+            run["tool_calls"] = [dict(row) for row in db.execute(
+                "SELECT task, tool, arguments, output FROM tool_calls WHERE run_id = ? ORDER BY position", (run["id"],))]
+        for call in run["tool_calls"]:
+            call["arguments"] = json.loads(call["arguments"])
+        return run
+
+    def latest_output(self, task, crew=None, symbol=None, subject=None, since=None):
+        """Latest output of a task (e.g. 'advise' : the latest recommendation) among the successful runs, or None.
+
+        Returns:
+            dict: run_id, crew, symbol, subject, started, name, raw.
+        """
+        where, values = self._filters(crew, symbol, subject, since, None, "ok")
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT runs.id AS run_id, runs.crew, runs.symbol, runs.subject, runs.started, task_outputs.name, "
+                f"task_outputs.raw FROM runs JOIN task_outputs ON task_outputs.run_id = runs.id{where} "
+                f"{'AND' if where else 'WHERE'} task_outputs.name = ? ORDER BY runs.started DESC LIMIT 1",
+                (*values, task),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def export(self, run_id, directory="."):
+        """Write the outputs of a run's tasks to their output files ('Analysis.md', ...) in a directory.
+
+        Returns:
+            list: Paths written.
+        """
+        run = self.get(run_id)
+        if run is None:
+            raise KeyError(run_id)
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for task in run["tasks"]:
+            if task["output_file"]:
+                path = os.path.join(directory, os.path.basename(task["output_file"]))
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(task["raw"] or "")
+                paths.append(path)
+        return paths
+
+
+_stores = {}
+
+
+def run_store_from_env():
+    """Run store set up by 'CREW_RUN_STORE' (path, default 'runs.sqlite'), or None when it is turned off ('0')."""
+    path = os.environ.get("CREW_RUN_STORE", "runs.sqlite").strip()
+    if path.lower() in ("0", "", "false", "no", "off"):
+        return None
+    if path not in _stores:
+        _stores[path] = RunStore(path)
+    return _stores[path]
+
+
+@contextlib.contextmanager
+def record_run(name, inputs, crew=None, output_files=None):
+    """Record the kickoff made in the block in the run store of 'CREW_RUN_STORE' (nothing is recorded when it is off).
+
+    Args:
+        name (str): Crew name ('advisor', ...).
+        inputs (dict): Inputs of the run.
+        crew (Crew): The crew about to run, for the output files of its tasks.
+        output_files (bool): Let the tasks write their output files. Default : only when the run is not recorded,
+            as the store keeps the outputs (and files are overwritten by the next run, or by a run at the same time).
+
+    Yields:
+        Run: Give it the result with 'run.done (result, crew)'.
+    """
+    store = run_store_from_env()
+    files = [task.output_file for task in crew.tasks] if crew is not None else []
+    if not (store is None if output_files is None else output_files):
+        for task in crew.tasks if crew is not None else ():
+            task.output_file = None
+    if store is None:
+        yield Run(name, inputs, files)
+        return
+    with store.record(name, inputs, files) as run:
+        yield run
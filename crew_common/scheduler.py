@@ -0,0 +1,129 @@
+import contextvars
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from crewai import Crew
+from crewai.crews.crew_output import CrewOutput
+from crewai.types.usage_metrics import UsageMetrics
+
+from crew_common.context_budget import apply_budget
+from crew_common.task_cache import task_fingerprint
+from crew_common.tracing import tracer
+
+## Parallel scheduler for a crew. The 'context' list of each task says which tasks it needs, which gives a dependency graph (DAG).
+## A task is started as soon as all the tasks it depends on are finished, so independent tasks run at the same time.
+## A task without 'context' gets the output of all the tasks before it (same as Process.sequential), so it waits for all of them.
+## Give a task 'context = []' to say that it does not need anything and can start right away : it always gets no context here.
+## 'crew.kickoff' only does the same with recent crewai releases, older ones take an empty list as no 'context' given
+## (all the outputs before it). The results of the two can then differ.
+## With a task cache ('crew_common.task_cache'), a task whose inputs are unchanged since a previous run reuses that run's output.
+## With context budgets ('crew_common.context_budget'), a task gets the outputs of its context tasks condensed to its budget.
+
+
+def task_dependencies(tasks):
+    """Return, for each task (by position), the list of tasks whose output it needs."""
+    position = {id(task): index for index, task in enumerate(tasks)}
+    dependencies = []
+    for index, task in enumerate(tasks):
+        if isinstance(task.context, list):
+            dependencies.append([t for t in task.context if id(t) in position])
+        else:
+            dependencies.append(list(tasks[:index]))
+    return dependencies
+
+
+def _run_task(crew, task, context, inputs, agent_lock, task_cache=None, max_age=None, context_budget=None):
+    ## Each task runs as a one-task crew. Its context tasks already carry their output, so the
+    ## prompt the agent gets is the same as in a sequential run (unless it is condensed to a budget).
+    with agent_lock, tracer.span(task.name or task.description[:60], "task", agent=task.agent.role) as attrs:
+        context = apply_budget(task, context, context_budget)
+        key = None
+        if task_cache is not None:
+            key = task_fingerprint(task, inputs, [dep.output.raw for dep in context])
+            output = task_cache.get(task, key, max_age)
+            attrs["task_cache"] = "miss" if output is None else "hit"
+            if output is not None:
+                task.interpolate_inputs_and_add_conversation_history(inputs or {})
+                task.output = output
+                ## Like a task that ran : its callback (a streamed run's, see 'crew_common.streaming'), then its file
+                if task.callback:
+                    task.callback(output)
+                if task.output_file:
+                    task._save_file(output.raw)
+                return UsageMetrics()
+
+        original_context = task.context
+        task.context = context
+        try:
+            single = Crew(
+                agents=[task.agent],
+                tasks=[task],
+                verbose=crew.verbose,
+                max_rpm=crew.max_rpm,
+                step_callback=crew.step_callback,
+                task_callback=crew.task_callback,
+            )
+            with tracer.record_tool_calls() as tool_calls:
+                usage = single.kickoff(inputs=inputs).token_usage
+            ## The same calls are in the list of the whole run (run store), where they need their task
+            for call in tool_calls:
+                call["task"] = task.name
+            if key is not None:
+                task_cache.set(key, task.output, tool_calls)
+            return usage
+        finally:
+            task.context = original_context
+
+
+def kickoff_parallel(crew, inputs=None, max_workers=4, task_cache=None, max_age=None, context_budget=None):
+    """Run the tasks of a crew following their dependencies, independent tasks in parallel.
+
+    Args:
+        crew (Crew): The crew to run. Its tasks are executed in place, like 'crew.kickoff'.
+        inputs (dict): Inputs used to fill the '{...}' placeholders of agents and tasks.
+        max_workers (int): Maximum number of tasks running at the same time.
+        task_cache (TaskCache): Reuse the stored output of tasks whose inputs didn't change (incremental run).
+        max_age (int | dict): How old (seconds) a reused output can be, for all tasks or by task name. Default : the cache's.
+        context_budget (int | dict): Tokens of context a task can get from its context tasks, for all tasks or by task name.
+
+    Returns:
+        CrewOutput: Output of the last task, with the outputs of all tasks in 'tasks_output'.
+    """
+    tasks = list(crew.tasks)
+    position = {id(task): index for index, task in enumerate(tasks)}
+    dependencies = task_dependencies(tasks)
+    ## Two tasks handled by the same agent are never run at the same time
+    agent_locks = {id(task.agent): threading.Lock() for task in tasks}
+
+    usage = UsageMetrics()
+    pending = list(range(len(tasks)))
+    finished = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew-task") as pool:
+        while pending or running:
+            ready = [i for i in pending if all(position[id(dep)] in finished for dep in dependencies[i])]
+            for i in ready:
+                pending.remove(i)
+                ## In the caller's context : its tool call recording (run store) sees the calls of every task
+                future = pool.submit(contextvars.copy_context().run, _run_task, crew, tasks[i], dependencies[i], inputs,
+                                     agent_locks[id(tasks[i].agent)], task_cache, max_age, context_budget)
+                running[future] = i
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                try:
+                    usage.add_usage_metrics(future.result())
+                except Exception:
+                    ## Don't start anything else, let the running tasks finish and report the failure
+                    pending.clear()
+                    raise
+                finished.add(i)
+
+    last = tasks[-1].output
+    return CrewOutput(
+        raw=last.raw,
+        pydantic=last.pydantic,
+        json_dict=last.json_dict,
+        tasks_output=[task.output for task in tasks],
+        token_usage=usage,
+    )
@@ -0,0 +1,119 @@
+import os
+import re
+import threading
+from datetime import date
+
+from crewai.tools import tool
+
+from crew_common.cache import TTLCache
+from crew_common.ratelimit import TokenBucket
+from crew_common.tracing import traced_tool, tracer
+
+## Web search tool shared by the examples. Compared to calling 'DuckDuckGoSearchRun ().run (query)' on every use :
+## - One DuckDuckGo client (and its HTTP session) per thread is created on first use and reused for its searches.
+##   Searches of different threads run at the same time, the token bucket below keeps them under the limit.
+## - Agents often ask nearly the same thing again ('HDFC Bank news today' / 'hdfc bank  latest news').
+##   Queries are normalised, and the result of a recent identical query is returned from a cache.
+## - A token bucket keeps the request rate under DuckDuckGo's throttling limit, even with several crews running.
+
+## Search settings, same as langchain's DuckDuckGoSearchRun
+MAX_RESULTS = 5
+REGION = "wt-wt"
+TIME_LIMIT = "y"
+
+search_cache = TTLCache(
+    maxsize=int(os.environ.get("SEARCH_CACHE_SIZE", 512)),
+    ttl=float(os.environ.get("SEARCH_CACHE_TTL", 6 * 60 * 60)),
+    path=os.environ.get("SEARCH_CACHE_PATH"),
+)
+## On average one search per second, with bursts of up to 3
+search_limiter = TokenBucket(rate=float(os.environ.get("SEARCH_RATE", 1.0)), capacity=3)
+tracer.register_stats("search_cache", search_cache.stats)
+
+_clients = threading.local()
+
+## Whole month names only ('decline', 'market' or 'mayor' are not months)
+_MONTH = (r"(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?"
+          r"|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b")
+_MONTH_NUMBERS = {name: number for number, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+## Full dates : '17 Oct 2026', 'October 17, 2026', '2026-10-17', '17/10/2026'
+_DATES = [
+    re.compile(r"\b(?P<day>\d{1,2})(?:st|nd|rd|th)?[-/ ,]+" + _MONTH + r"[-/ ,]+(?P<year>\d{4}|\d{2})\b"),
+    re.compile(r"\b" + _MONTH + r"[-/ ,]+(?P<day>\d{1,2})(?:st|nd|rd|th)?[-/ ,]+(?P<year>\d{4})\b"),
+    re.compile(r"\b(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\b"),
+    re.compile(r"\b(?P<day>\d{1,2})/(?P<month>\d{1,2})/(?P<year>\d{4}|\d{2})\b"),
+]
+## A full date this close to today is the agent writing down today's date, not the period it asks about
+RECENT_DAYS = 7
+_NOISE_WORDS = re.compile(r"\b(?:as of|as on|today|todays|now|currently|current|latest|recent|recently)\b")
+
+
+def _is_recent(match, today):
+    year = int(match["year"])
+    if year < 100:
+        year += 2000
+    day, month = int(match["day"]), match["month"]
+    if month.isdigit():
+        ## '05/10/2026' : day first, or month first
+        days_months = [(day, int(month)), (int(month), day)]
+    else:
+        days_months = [(day, _MONTH_NUMBERS[month[:3]])]
+    for day, month in days_months:
+        try:
+            if abs((date(year, month, day) - today).days) <= RECENT_DAYS:
+                return True
+        except ValueError:
+            pass
+    return False
+
+
+def normalise_query(query: str) -> str:
+    """Key used to recognise near identical queries: lower case, no punctuation or extra spaces, no 'latest / today'
+    words and no date of the last few days. Word order and other dates ('TCS results March 2024') are kept."""
+    text = query.lower()
+    today = date.today()
+    for pattern in _DATES:
+        text = pattern.sub(lambda match: " " if _is_recent(match, today) else match.group(0), text)
+    text = _NOISE_WORDS.sub(" ", text)
+    words = re.sub(r"[^\w.&]+", " ", text).split()
+    return " ".join(word for word in (word.strip(".") for word in words) if word)
+
+
+def _get_client():
+    client = getattr(_clients, "client", None)
+    if client is None:
+        try:
+            from ddgs import DDGS
+        except ImportError:
+            from duckduckgo_search import DDGS
+        client = _clients.client = DDGS()
+    return client
+
+
+def _search(query: str) -> str:
+    search_limiter.acquire()
+    results = _get_client().text(query, region=REGION, safesearch="moderate", timelimit=TIME_LIMIT,
+                                 max_results=MAX_RESULTS)
+    return " ".join(result["body"] for result in results or [])
+
+
+def cached_search(query: str) -> str:
+    """Search DuckDuckGo, going through the shared cache and rate limiter."""
+    key = normalise_query(query) or query
+    result = search_cache.get(key)
+    tracer.annotate(cache="miss" if result is None else "hit")
+    if result is None:
+        result = _search(query)
+        if not result:
+            return "No good DuckDuckGo Search Result was found"
+        search_cache.set(key, result)
+    return result
+
+
+## Making the search into a typical tool in crew AI
+@tool("DuckDuckGo Search")
+@traced_tool
+def search_tool(search_query: str):
+    """Search the internet for information on a given topic"""
+    return cached_search(search_query)
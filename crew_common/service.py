@@ -0,0 +1,365 @@
+import asyncio
+import json
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from crew_common.env import load_env
+from crew_common.loader import CREWS, build_example_crew, example_folder, example_inputs, load_example
+from crew_common.run_store import record_run
+from crew_common.streaming import stream_kickoff
+from crew_common.tracing import tracer
+
+## Long running service for the example crews, so a request doesn't pay for starting Python, importing crewai,
+## reading '.env' and setting up the model clients. Crews are kicked off in a bounded pool of worker threads;
+## requests beyond that wait in a queue, and requests beyond the queue are turned down (HTTP 503).
+## Identical requests in flight at the same time (same crew, same inputs up to case and spaces) share one run,
+## and its result goes to all of them.
+##
+## HTTP :
+##   POST /kickoff  {"crew": "advisor", "inputs": {"stock": "Hdfc Bank"}}
+##                  with "stream": true, the answer is JSON lines sent as they come : "start", the agents' answers in chunks,
+##                  each task's output when it is done, and last the same answer as without (see 'CrewService.stream')
+##   GET  /stats    request, coalescing, queue and latency counters
+##   GET  /health
+## JSON lines on stdin / stdout : one request per line (same body as POST /kickoff, plus an optional "id"),
+## one answer per line when the request completes (answers can come in another order than the requests).
+##
+##   python run_crew.py serve --http 127.0.0.1:8080 --crews advisor collab --concurrency 4 --queue 32
+
+DEFAULT_CREWS = ("advisor", "collab")
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ServiceBusy(RuntimeError):
+    """Raised when all the workers are busy and the queue is full."""
+
+
+def request_key(crew, inputs):
+    """Requests with the same key are answered by the same run ('Hdfc Bank' and ' hdfc  bank' are the same)."""
+    normalised = {key: re.sub(r"\s+", " ", str(value)).strip().casefold() for key, value in inputs.items()}
+    return crew + ":" + json.dumps(normalised, sort_keys=True)
+
+
+class CrewService:
+    """Runs kickoff requests for a set of warm crews.
+
+    Args:
+        crews (list): Crews served ('advisor', 'collab', ... see 'crew_common.loader.CREWS').
+        max_concurrency (int): Crews running at the same time.
+        max_queue (int): Requests waiting for a worker, beyond which new requests are turned down.
+    """
+
+    def __init__(self, crews=DEFAULT_CREWS, max_concurrency=4, max_queue=32):
+        unknown = [name for name in crews if name not in CREWS]
+        if unknown:
+            raise ValueError(f"Unknown crews : {', '.join(unknown)}")
+        self.crews = list(crews)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._examples = {}
+        self._inflight = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="crew-service")
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._admitted = 0
+        self._running = 0
+        self._latencies = deque(maxlen=1000)
+        self.counters = {"requests": 0, "coalesced": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def warm_up(self):
+        """Import the crews and set up everything a first run would : '.env', model clients, ..."""
+        for name in self.crews:
+            load_env(example_folder(name))
+            example = load_example(name)
+            crew = build_example_crew(name, quiet=True)
+            for agent in crew.agents:
+                ## Imports the model provider's SDK and checks its settings (of every model behind a router)
+                for llm in getattr(agent.llm, "backends", None) or [agent.llm]:
+                    getattr(llm, "_get_inner", lambda: None)()
+            self._examples[name] = example
+
+    ## ---- running
+
+    def _kickoff(self, name, inputs, crew=None):
+        ## Runs in a worker thread (or a streamed run's). A new crew per run (building one takes milliseconds once warm) keeps runs apart
+        example = self._examples[name]
+        crew = crew or build_example_crew(name, quiet=True)
+        started = time.perf_counter()
+        with tracer.span("kickoff", crew=name, service=True), record_run(name, inputs, crew, output_files=False) as run:
+            result = example.kickoff(inputs, crew=crew)
+            run.done(result, crew)
+        return {
+            "run_id": run.id,
+            "crew": name,
+            "inputs": inputs,
+            "seconds": round(time.perf_counter() - started, 3),
+            "result": result.raw,
+            "tasks": [{"name": task.name, "agent": task.agent, "output": task.raw} for task in result.tasks_output],
+        }
+
+    async def _execute(self, name, inputs, key):
+        loop = asyncio.get_running_loop()
+        try:
+            async with self._slots:
+                self._running += 1
+                try:
+                    result = await loop.run_in_executor(self._pool, self._kickoff, name, inputs)
+                finally:
+                    self._running -= 1
+            self.counters["completed"] += 1
+            self._latencies.append(result["seconds"])
+            return result
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            self._admitted -= 1
+            del self._inflight[key]
+
+    def _admit(self):
+        if self._admitted >= self.max_concurrency + self.max_queue:
+            self.counters["rejected"] += 1
+            raise ServiceBusy(f"{self._admitted} requests running or queued")
+        self._admitted += 1
+
+    async def submit(self, name, inputs=None):
+        """Run a crew (or join an identical run in flight) and return its result.
+
+        Raises:
+            KeyError: The crew is not served.
+            ServiceBusy: The queue is full.
+        """
+        if name not in self._examples:
+            raise KeyError(name)
+        inputs = example_inputs(name, inputs)
+        key = request_key(name, inputs)
+        self.counters["requests"] += 1
+        run = self._inflight.get(key)
+        coalesced = run is not None
+        if coalesced:
+            self.counters["coalesced"] += 1
+        else:
+            self._admit()
+            ## The run is a task of its own : a caller going away doesn't cancel it for the others
+            run = self._inflight[key] = asyncio.ensure_future(self._execute(name, inputs, key))
+        result = await asyncio.shield(run)
+        return dict(result, coalesced=coalesced)
+
+    async def stream(self, name, inputs=None):
+        """Run a crew, streaming its answers (see 'crew_common.streaming'). Streamed runs are not shared with other requests.
+
+        Nothing happens before the first event is asked for : the request is admitted then, and leaves the queue when the
+        iteration ends or the iterator is closed.
+
+        Yields:
+            dict: {"event": "start", "crew", "inputs"} once admitted, {"event": "chunk", "task", "agent", "text"} as the
+            agents' answers come, {"event": "task", "task", "agent", "output"} when a task is done, and last
+            {"event": "done", ...} with the same answer as 'submit' and the seconds to the first chunk.
+
+        Raises:
+            KeyError: The crew is not served.
+            ServiceBusy: The queue is full.
+        """
+        if name not in self._examples:
+            raise KeyError(name)
+        inputs = example_inputs(name, inputs)
+        self.counters["requests"] += 1
+        self._admit()
+        loop = asyncio.get_running_loop()
+        try:
+            yield {"event": "start", "crew": name, "inputs": inputs}
+            async with self._slots:
+                self._running += 1
+                try:
+                    crew = await loop.run_in_executor(self._pool, build_example_crew, name, True)
+                    stream = stream_kickoff(lambda inputs, crew: self._kickoff(name, inputs, crew), crew, inputs,
+                                            output_files=False)
+                    async for event in stream:
+                        if event.kind == "chunk":
+                            yield {"event": "chunk", "task": event.task, "agent": event.agent, "text": event.text}
+                        elif event.kind == "task":
+                            yield {"event": "task", "task": event.task, "agent": event.agent, "output": event.text}
+                        else:
+                            result = dict(event.output, first_chunk_seconds=round(stream.first_chunk_seconds or 0, 3))
+                finally:
+                    self._running -= 1
+            self.counters["completed"] += 1
+            self._latencies.append(result["seconds"])
+            yield {"event": "done", **result}
+        except Exception:
+            self.counters["failed"] += 1
+            raise
+        finally:
+            self._admitted -= 1
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else None
+
+        return {
+            **self.counters,
+            "running": self._running,
+            "queued": self._admitted - self._running,
+            "in_flight_keys": len(self._inflight),
+            "latency_p50_s": percentile(0.50),
+            "latency_p95_s": percentile(0.95),
+            "crews": self.crews,
+        }
+
+    async def handle(self, request):
+        """Answer a kickoff request given as a dict ({"crew": ..., "inputs": {...}}, and "stream": true to stream it).
+
+        Returns:
+            tuple: (HTTP status, answer). The answer of a streamed request is an async iterator of dicts (see 'stream').
+        """
+        name = request.get("crew")
+        inputs = request.get("inputs") or {}
+        if name not in self._examples:
+            return 400, {"error": f"Unknown crew '{name}', served : {', '.join(self.crews)}"}
+        if not isinstance(inputs, dict):
+            return 400, {"error": "'inputs' must be an object"}
+        try:
+            if request.get("stream"):
+                ## Admitted or refused on the first event, before the response starts
+                events = self.stream(name, inputs)
+                return 200, _chain(await events.__anext__(), events)
+            return 200, await self.submit(name, inputs)
+        except ServiceBusy as e:
+            return 503, {"error": f"Busy, try again later ({e})"}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    ## ---- HTTP
+
+    async def _route(self, method, path, body):
+        path = path.split("?", 1)[0].rstrip("/")
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok", "crews": self.crews}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method == "POST" and path == "/kickoff":
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError as e:
+                return 400, {"error": f"Invalid JSON : {e}"}
+            return await self.handle(request if isinstance(request, dict) else {})
+        return 404, {"error": f"No route for {method} {path}"}
+
+    async def _handle_http(self, reader, writer):
+        try:
+            method, path, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length") or 0))
+            status, answer = await self._route(method.upper(), path, body)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, answer = 400, {"error": f"Bad request : {e}"}
+        if hasattr(answer, "__aiter__"):
+            await self._send_stream(writer, answer)
+            return
+        data = json.dumps(answer, default=str).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n")
+        try:
+            writer.write(head.encode("latin-1") + data)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _send_stream(self, writer, events):
+        ## JSON lines, each sent at once. The response ends with the connection (no length known in advance)
+        connected = True
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nCache-Control: no-cache\r\n"
+                         b"Connection: close\r\n\r\n")
+            async for event in _or_error(events):
+                if not connected:
+                    ## The client went away : the run goes on (it is recorded), its events are dropped
+                    continue
+                try:
+                    writer.write(json.dumps(event, default=str).encode("utf-8") + b"\n")
+                    await writer.drain()
+                except ConnectionError:
+                    connected = False
+        finally:
+            writer.close()
+
+    async def serve_http(self, host="127.0.0.1", port=8080):
+        server = await asyncio.start_server(self._handle_http, host, port)
+        print(f"Serving {', '.join(self.crews)} on http://{host}:{port}", file=sys.stderr, flush=True)
+        async with server:
+            await server.serve_forever()
+
+    ## ---- JSON lines
+
+    async def _answer_line(self, line, out):
+        try:
+            request = json.loads(line)
+            status, answer = await self.handle(request if isinstance(request, dict) else {})
+        except ValueError as e:
+            request, status, answer = {}, 400, {"error": f"Invalid JSON : {e}"}
+        if hasattr(answer, "__aiter__"):
+            ## A streamed request gets a line per event, with its id
+            async for event in _or_error(answer):
+                out.write(json.dumps({"id": request.get("id"), "status": status, **event}, default=str) + "\n")
+                out.flush()
+            return
+        out.write(json.dumps({"id": request.get("id"), "status": status, **answer}, default=str) + "\n")
+        out.flush()
+
+    async def serve_stdio(self):
+        ## Answers are the only thing written to stdout : anything else printed (crewai logs, ...) goes to stderr
+        out, sys.stdout = sys.stdout, sys.stderr
+        loop = asyncio.get_running_loop()
+        pending = set()
+        try:
+            while True:
+                line = await loop.run_in_executor(None, sys.stdin.readline)
+                if not line:
+                    break
+                if line.strip():
+                    answer = asyncio.ensure_future(self._answer_line(line, out))
+                    pending.add(answer)
+                    answer.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            sys.stdout = out
+
+
+async def _chain(first, events):
+    yield first
+    async for event in events:
+        yield event
+
+
+async def _or_error(events):
+    ## Events of a streamed run, ending with an "error" event if it fails (the response has started, no other status can be sent)
+    try:
+        async for event in events:
+            yield event
+    except Exception as e:
+        yield {"event": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+def serve(crews=DEFAULT_CREWS, host="127.0.0.1", port=8080, stdio=False, max_concurrency=4, max_queue=32):
+    """Warm up the crews and serve requests over HTTP (or JSON lines on stdin / stdout) until interrupted."""
+    service = CrewService(crews, max_concurrency=max_concurrency, max_queue=max_queue)
+    service.warm_up()
+    try:
+        asyncio.run(service.serve_stdio() if stdio else service.serve_http(host, port))
+    except KeyboardInterrupt:
+        pass
+    return service
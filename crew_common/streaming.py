@@ -0,0 +1,261 @@
+import asyncio
+import contextlib
+import contextvars
+import queue
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from crewai.events.event_bus import crewai_event_bus
+from crewai.events.types.llm_events import LLMCallType, LLMStreamChunkEvent
+
+## Streamed runs : the model's answers are handed out piece by piece as they arrive, instead of the crew's result once
+## every task is done. The first words show after the first model call, not after the whole run.
+##
+##   stream = stream_kickoff (example.kickoff, crew, inputs)
+##   for event in stream :                  ## or 'async for event in stream', in asyncio code
+##       if event.kind == "chunk" : print (event.text, end = "", flush = True)
+##   stream.result                          ## what the kickoff returned
+##
+## Events : "chunk" (a piece of a task's model answer, with the agent's thoughts and tool calls, as it arrives),
+## "task" (a task finished : its output, while the next tasks run) and "done" (the kickoff's result), in that order for each task.
+## Only the streamed run's model calls stream : crewai's 'stream' is turned on for its agents' LLMs in the run's context,
+## and passed on by the record / replay cache and the router (see 'WrappedLLM'). An answer from the cache comes as one chunk,
+## and a streamed call isn't hedged (two answers would be mixed up).
+## The output file of a task ('Recommendation.md') is written as its final answer arrives, a line at a time, then replaced
+## by crewai with the task's output when it finishes.
+
+## 'call' : id of the model call a chunk is part of (an agent makes one per step), 'output' : the task's or the kickoff's
+StreamEvent = namedtuple("StreamEvent", "kind task agent call text output")
+
+## Text after which an agent's answer is its final answer, the part written to the task's output file
+FINAL_ANSWER = "Final Answer:"
+## An output file being written is flushed at the end of each line, or after this many characters without one
+FLUSH_CHARS = 256
+
+## Task id -> the stream of the run it belongs to. Chunk events come from any thread : they find their run by their task
+_streams = {}
+_streams_lock = threading.Lock()
+_subscribed = False
+
+
+def _on_chunk(_, event):
+    stream = _streams.get(event.task_id)
+    if stream is not None and event.chunk and event.call_type != LLMCallType.TOOL_CALL:
+        stream._chunk(event)
+
+
+def _subscribe():
+    ## One handler for the whole process, registered on the first streamed run
+    global _subscribed
+    with _streams_lock:
+        if not _subscribed:
+            crewai_event_bus.on(LLMStreamChunkEvent)(_on_chunk)
+            _subscribed = True
+
+
+def _task_name(task):
+    ## Same as the traces' : tasks without a name go by the start of their description
+    return task.name or task.description[:60]
+
+
+@contextlib.contextmanager
+def _streaming(agents):
+    ## Streaming on for these LLMs, in this context only (the scheduler's task threads get a copy of it)
+    try:
+        from crewai.llms.base_llm import BaseLLM, call_stream_override
+    except ImportError:
+        yield
+        return
+    with contextlib.ExitStack() as stack:
+        for llm in {id(agent.llm): agent.llm for agent in agents}.values():
+            if isinstance(llm, BaseLLM):
+                stack.enter_context(call_stream_override(llm, True))
+        yield
+
+
+class OutputFileWriter:
+    """Writes the final answer of a task to its output file while it arrives, in buffered appends (see FLUSH_CHARS).
+
+    The agent's thoughts and tool calls before 'Final Answer:' are left out. A new final answer (crewai asking the model
+    again) starts the file over.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._call = None
+        self._answer = ""
+        self._writing = False
+        self._empty = True
+        self._unflushed = 0
+
+    def write(self, call_id, text):
+        if call_id != self._call:
+            ## Another model call of the task
+            self._call, self._answer, self._writing = call_id, "", False
+        if not self._writing:
+            self._answer += text
+            if FINAL_ANSWER not in self._answer:
+                return
+            text = self._answer.split(FINAL_ANSWER, 1)[1]
+            self._writing = True
+            self._open()
+        if self._empty:
+            text = text.lstrip()
+        if text:
+            self._file.write(text)
+            self._empty = False
+            self._unflushed += len(text)
+            if "\n" in text or self._unflushed >= FLUSH_CHARS:
+                self._file.flush()
+                self._unflushed = 0
+
+    def _open(self):
+        if self._file is None:
+            path = Path(self.path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, "w", encoding="utf-8")
+        else:
+            self._file.seek(0)
+            self._file.truncate()
+        self._empty = True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CrewStream:
+    """Events of a streamed kickoff, see 'stream_kickoff'. Iterate it once, with 'for' or 'async for'.
+
+    Attributes:
+        result: What the kickoff returned, once the "done" event is out.
+        first_chunk_seconds (float): Seconds from the start of the run to its first chunk (time to first byte).
+    """
+
+    def __init__(self, kickoff, crew, inputs=None, output_files=True):
+        self.kickoff = kickoff
+        self.crew = crew
+        self.inputs = inputs
+        self.output_files = output_files
+        self.result = None
+        self.first_chunk_seconds = None
+        self._tasks = {str(task.id): task for task in crew.tasks}
+        self._writers = {}
+        self._put = None
+        self._started = None
+        self._lock = threading.Lock()
+
+    def _chunk(self, event):
+        with self._lock:
+            if self.first_chunk_seconds is None:
+                self.first_chunk_seconds = time.perf_counter() - self._started
+            task = self._tasks[event.task_id]
+            ## Only the file the task will have at the end (crewai writes it, unless the run store took it away)
+            if self.output_files and task.output_file:
+                if event.task_id not in self._writers:
+                    self._writers[event.task_id] = OutputFileWriter(task.output_file)
+                self._writers[event.task_id].write(event.call_id, event.chunk)
+        self._put(StreamEvent("chunk", _task_name(task), event.agent_role, event.call_id, event.chunk, None))
+
+    def _task_callback(self, task, previous):
+        def callback(output):
+            ## Called when the task is done, before crewai writes its output file : the file being written is closed first
+            with self._lock:
+                writer = self._writers.pop(str(task.id), None)
+            if writer is not None:
+                writer.close()
+            self._put(StreamEvent("task", _task_name(task), output.agent, None, output.raw, output))
+            if previous is not None:
+                return previous(output)
+
+        return callback
+
+    def _run(self):
+        ## Runs in a thread of its own, for the whole kickoff
+        callbacks = [(task, task.callback) for task in self._tasks.values()]
+        for task, previous in callbacks:
+            task.callback = self._task_callback(task, previous)
+        with _streams_lock:
+            _streams.update({task_id: self for task_id in self._tasks})
+        try:
+            with _streaming(self.crew.agents):
+                self.result = self.kickoff(self.inputs, crew=self.crew)
+            self._put(StreamEvent("done", None, None, None, getattr(self.result, "raw", None), self.result))
+        except Exception as e:
+            self._put(e)
+        finally:
+            with _streams_lock:
+                for task_id in self._tasks:
+                    _streams.pop(task_id, None)
+            for task, previous in callbacks:
+                task.callback = previous
+            for writer in self._writers.values():
+                writer.close()
+            self._put(None)
+
+    def _start(self, put):
+        if self._started is not None:
+            raise RuntimeError("A stream can only be iterated once")
+        _subscribe()
+        self._put = put
+        self._started = time.perf_counter()
+        ## The run gets the caller's context (tracer spans, tool call recording of the run store, ...)
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,), name="crew-stream", daemon=True)
+        thread.start()
+        return thread
+
+    def __iter__(self):
+        items = queue.Queue()
+        thread = self._start(items.put)
+        item = False
+        try:
+            while True:
+                item = items.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            ## A consumer going away early doesn't stop the run : its result is still recorded
+            if item is None:
+                thread.join()
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+
+        def put(item):
+            try:
+                loop.call_soon_threadsafe(items.put_nowait, item)
+            except RuntimeError:
+                ## The loop is closed : nobody is listening any more
+                pass
+
+        self._start(put)
+        while True:
+            item = await items.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+def stream_kickoff(kickoff, crew, inputs=None, output_files=True):
+    """Run a crew and stream its model answers as they arrive (see the events above).
+
+    Args:
+        kickoff (callable): Runs the crew : 'kickoff (inputs, crew = crew)', like the 'kickoff' of each example's 'my_crew'.
+        crew (Crew): The crew it runs. A new one for each run (its tasks are how chunks find their run).
+        inputs (dict): Inputs of the run.
+        output_files (bool): Write the tasks' output files as their final answers arrive.
+
+    Returns:
+        CrewStream: Iterate it (or 'async for') to run the crew and get the events.
+    """
+    return CrewStream(kickoff, crew, inputs, output_files=output_files)
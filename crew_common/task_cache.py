@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import time
+
+from crewai.tasks.task_output import TaskOutput
+
+from crew_common.cache import TTLCache
+from crew_common.tracing import tool_function, tracer
+
+## Incremental re-runs : the output of a task is stored under a hash of everything that goes into it
+##   - the task (description and expected output, before the inputs are filled in)
+##   - its agent (role, goal, backstory, model, tools)
+##   - the crew inputs ({stock}, ...)
+##   - the outputs of the tasks it depends on (its 'context')
+## When the same task comes again with the same hash, and the stored output is fresh enough, it is reused and the task is skipped.
+## A change anywhere upstream changes the hash of every task downstream, so only those are run again.
+##
+## The tools a task used are part of what it depends on too : their calls are stored with the output, and run again
+## (from the tools' own caches, usually) before the output is reused. A new stock price makes 'advise' run again.
+##
+## Enable with 'CREW_TASK_CACHE=1'. Outputs are kept in 'CREW_TASK_CACHE_PATH' (default 'task_cache.sqlite'),
+## reused for 'CREW_TASK_CACHE_MAX_AGE' seconds (default 6 hours) unless a task has its own maximum age.
+
+DEFAULT_MAX_AGE = 6 * 60 * 60
+## Stored outputs are deleted after a week, whatever their maximum age
+RETENTION = 7 * 24 * 60 * 60
+
+
+def _agent_config(agent):
+    if agent is None:
+        return None
+    llm = getattr(agent, "llm", None)
+    return {
+        "role": getattr(agent, "_original_role", None) or agent.role,
+        "goal": getattr(agent, "_original_goal", None) or agent.goal,
+        "backstory": getattr(agent, "_original_backstory", None) or agent.backstory,
+        "model": getattr(llm, "model", None) or str(llm),
+        "temperature": getattr(llm, "temperature", None),
+        "tools": sorted(tool.name for tool in agent.tools or []),
+    }
+
+
+def task_fingerprint(task, inputs=None, context_outputs=()):
+    """Hash of a task, its agent, the crew inputs and the outputs of its context tasks."""
+    payload = {
+        "description": getattr(task, "_original_description", None) or task.description,
+        "expected_output": getattr(task, "_original_expected_output", None) or task.expected_output,
+        "output_format": [getattr(task.output_json, "__name__", None), getattr(task.output_pydantic, "__name__", None)],
+        "agent": _agent_config(task.agent),
+        "inputs": inputs or {},
+        "context": list(context_outputs),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class TaskCache:
+    """Stored task outputs, by fingerprint.
+
+    Args:
+        path (str): SQLite file keeping the outputs across runs. None keeps them in memory only.
+        max_age (int | dict): Seconds a stored output can be reused. A dict gives it per task name,
+            with the key 'default' (or DEFAULT_MAX_AGE) for the other tasks.
+        check_tools (bool): Run the recorded tool calls again, and reuse the output only when their results are unchanged.
+    """
+
+    def __init__(self, path=None, max_age=DEFAULT_MAX_AGE, check_tools=True, maxsize=256):
+        self.store = TTLCache(maxsize=maxsize, ttl=RETENTION, path=path)
+        self.max_age = max_age
+        self.check_tools = check_tools
+        self.skipped = 0
+        self.stale = 0
+
+    def max_age_for(self, task, max_age=None):
+        """Seconds the output of this task can be reused : from 'max_age' (seconds or dict by task name) if it has the task, else the cache's."""
+        if isinstance(max_age, dict):
+            max_age = max_age.get(task.name)
+        if max_age is not None:
+            return max_age
+        if isinstance(self.max_age, dict):
+            return self.max_age.get(task.name, self.max_age.get("default", DEFAULT_MAX_AGE))
+        return self.max_age
+
+    def _tools_unchanged(self, tool_calls):
+        for call in tool_calls:
+            function = tool_function(call["tool"])
+            if function is None:
+                return False
+            try:
+                if str(function(*call["args"], **call["kwargs"])) != call["output"]:
+                    return False
+            except Exception:
+                return False
+        return True
+
+    def get(self, task, key, max_age=None):
+        """Stored output of the task for this fingerprint, or None when there is none, it is too old or its tool results changed.
+
+        Args:
+            max_age (int | dict): Overrides the cache's maximum age, e.g. per task name.
+        """
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        fresh = time.time() - entry["stored"] <= self.max_age_for(task, max_age)
+        if not fresh or (self.check_tools and not self._tools_unchanged(entry["tool_calls"])):
+            self.stale += 1
+            return None
+        self.skipped += 1
+        output = dict(entry["output"])
+        if output.get("pydantic") is not None and task.output_pydantic is not None:
+            output["pydantic"] = task.output_pydantic.model_validate(output["pydantic"])
+        else:
+            output["pydantic"] = None
+        return TaskOutput(**output)
+
+    def set(self, key, output, tool_calls=()):
+        data = output.model_dump(exclude={"messages"})
+        self.store.set(key, {"stored": time.time(), "output": data, "tool_calls": list(tool_calls)})
+
+    def stats(self):
+        return {"skipped": self.skipped, "stale": self.stale, **self.store.stats()}
+
+
+_caches = {}
+
+
+def task_cache_from_env():
+    """Task cache set up by the 'CREW_TASK_CACHE*' environment variables, or None when incremental runs are off."""
+    if os.environ.get("CREW_TASK_CACHE", "0").lower() in ("0", "", "false", "no", "off"):
+        return None
+    path = os.environ.get("CREW_TASK_CACHE_PATH", "task_cache.sqlite")
+    if path not in _caches:
+        _caches[path] = TaskCache(path=path, max_age=int(os.environ.get("CREW_TASK_CACHE_MAX_AGE", DEFAULT_MAX_AGE)))
+        tracer.register_stats("task_cache", _caches[path].stats)
+    return _caches[path]
@@ -0,0 +1,30 @@
+## Token counting used to measure prompt sizes.
+## Uses OpenAI's 'tiktoken' when it is installed, otherwise a rough estimate of 4 characters per token.
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text) -> int:
+    """Number of tokens in a text (exact with tiktoken, estimated otherwise)."""
+    text = text if isinstance(text, str) else str(text)
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def token_counter_name() -> str:
+    """Which counting method 'count_tokens' uses, for reports."""
+    return "tiktoken o200k_base" if _get_encoding() else "estimate (4 chars / token)"
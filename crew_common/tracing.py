@@ -0,0 +1,292 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+## Lightweight tracing of a crew run : one span per kickoff, task, agent step, LLM call and tool call,
+## with durations and attributes (tokens, cache hits, retries, ...). Spans are kept in memory and exported to
+##   <name>.jsonl       one span per line, easy to load in pandas / jq
+##   <name>.trace.json  Chrome trace events, open in chrome://tracing or https://ui.perfetto.dev
+## Recording a span is a clock read and a list append, so tracing is on by default ('CREW_TRACE=0' turns it off).
+
+
+class _Span:
+    __slots__ = ("name", "cat", "start", "end", "thread", "parent", "attrs")
+
+    def __init__(self, name, cat, start, thread, parent, attrs):
+        self.name = name
+        self.cat = cat
+        self.start = start
+        self.end = None
+        self.thread = thread
+        self.parent = parent
+        self.attrs = attrs
+
+    def to_dict(self, origin_ns, origin_epoch):
+        return {
+            "name": self.name,
+            "cat": self.cat,
+            "start": round(origin_epoch + (self.start - origin_ns) / 1e9, 6),
+            "duration_ms": round(((self.end or self.start) - self.start) / 1e6, 3),
+            "thread": self.thread,
+            "parent": self.parent,
+            "attrs": self.attrs,
+        }
+
+
+class Tracer:
+    """Collects spans of crew runs.
+
+    Args:
+        enabled (bool): When False every call is a no-op.
+        max_spans (int): Only the most recent spans are kept, so a long running process doesn't grow without limit.
+    """
+
+    def __init__(self, enabled=True, max_spans=100_000):
+        self.enabled = enabled
+        self._spans = deque(maxlen=max_spans)
+        self._counters = {}
+        self._stats_sources = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin_ns = time.perf_counter_ns()
+        self._origin_epoch = time.time()
+        ## Start of the first span since the last task callback. Tasks of a sequential crew run one after the other,
+        ## but not always on the same thread, so this mark is shared by all threads
+        self._task_start = None
+
+    ## ---- recording
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name, cat, start, end, attrs):
+        stack = self._stack()
+        span = _Span(name, cat, start, threading.get_ident(), stack[-1].name if stack else None, attrs)
+        span.end = end
+        with self._lock:
+            self._spans.append(span)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name, cat="crew", **attrs):
+        """Time the enclosed block. Attributes can be added later with 'annotate'."""
+        if not self.enabled:
+            yield attrs
+            return
+        stack = self._stack()
+        span = _Span(name, cat, time.perf_counter_ns(), threading.get_ident(), stack[-1].name if stack else None, attrs)
+        stack.append(span)
+        ## Agent steps are reported when they end. They start with the first span (usually the LLM call) after the previous step
+        if getattr(self._local, "step_start", None) is None:
+            self._local.step_start = span.start
+        if self._task_start is None:
+            self._task_start = span.start
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.end = time.perf_counter_ns()
+            stack.pop()
+            with self._lock:
+                self._spans.append(span)
+
+    def annotate(self, **attrs):
+        """Add attributes to the innermost open span of the current thread."""
+        if self.enabled:
+            stack = self._stack()
+            if stack:
+                stack[-1].attrs.update(attrs)
+
+    def incr(self, counter, amount=1):
+        if self.enabled:
+            with self._lock:
+                self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    @contextlib.contextmanager
+    def record_tool_calls(self):
+        """Collect the calls of traced tools made in the block : name, arguments and result of each.
+
+        Works even when tracing is off (used to check the tool results a cached task depended on, and by the run store).
+        A context variable is used, as crewai may run the tools on another thread (with a copy of the context).
+        Blocks can be nested (a run, and each of its tasks) : a call is in the list of every block it was made in.
+        """
+        calls = []
+        token = _tool_calls.set(_tool_calls.get() + (calls,))
+        try:
+            yield calls
+        finally:
+            _tool_calls.reset(token)
+
+    def register_stats(self, name, stats_function):
+        """Include the result of stats_function() (e.g. a cache's hit / miss counters) in the summary."""
+        self._stats_sources[name] = stats_function
+
+    ## ---- crewai callbacks
+
+    def step_callback(self, step):
+        """Use as 'step_callback' of a crew : records one span per agent step (thought, tool use or final answer)."""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        attrs = {"type": type(step).__name__}
+        tool = getattr(step, "tool", None)
+        if tool:
+            attrs["tool"] = tool
+        start = getattr(self._local, "step_start", None) or now
+        self._local.step_start = None
+        self._record("agent step", "step", start, now, attrs)
+        self.incr("agent_steps")
+
+    def task_callback(self, output):
+        """Use as 'task_callback' of a crew : records one span per task (unless the task already runs inside a 'task' span).
+
+        The task is taken to start with the first span recorded after the previous task, which is right for sequential crews.
+        """
+        if not self.enabled:
+            return
+        attrs = {"agent": getattr(output, "agent", None), "output_chars": len(getattr(output, "raw", "") or "")}
+        stack = self._stack()
+        if stack and stack[-1].cat == "task":
+            stack[-1].attrs.update(attrs)
+            return
+        now = time.perf_counter_ns()
+        start, self._task_start = self._task_start or now, None
+        name = getattr(output, "name", None) or (getattr(output, "description", "") or "task")[:60]
+        self._record(name, "task", start, now, attrs)
+
+    ## ---- results
+
+    def spans(self):
+        with self._lock:
+            return [span.to_dict(self._origin_ns, self._origin_epoch) for span in self._spans]
+
+    def summary(self):
+        """Count and total time per span category, counters and registered stats."""
+        categories = {}
+        for span in self.spans():
+            category = categories.setdefault(span["cat"], {"count": 0, "total_ms": 0.0})
+            category["count"] += 1
+            category["total_ms"] = round(category["total_ms"] + span["duration_ms"], 3)
+        with self._lock:
+            counters = dict(self._counters)
+        stats = {name: function() for name, function in self._stats_sources.items()}
+        return {"spans": categories, "counters": counters, "stats": stats}
+
+    def export_jsonl(self, path):
+        with open(path, "w", encoding="utf-8") as out:
+            for span in self.spans():
+                out.write(json.dumps(span, default=str) + "\n")
+
+    def export_chrome(self, path):
+        pid = os.getpid()
+        events = []
+        for span in self.spans():
+            events.append({
+                "name": span["name"],
+                "cat": span["cat"],
+                "ph": "X",
+                "ts": round(span["start"] * 1e6),
+                "dur": round(span["duration_ms"] * 1e3),
+                "pid": pid,
+                "tid": span["thread"],
+                "args": span["attrs"],
+            })
+        with open(path, "w", encoding="utf-8") as out:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, out, default=str)
+
+    def export(self, name, directory=None):
+        """Write '<name>-<time>.jsonl' and '<name>-<time>.trace.json' to directory ('CREW_TRACE_DIR', default 'traces').
+
+        Returns:
+            tuple: Paths of the two files, or None when tracing is off.
+        """
+        if not self.enabled:
+            return None
+        directory = directory or os.environ.get("CREW_TRACE_DIR", "traces")
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        self.export_jsonl(base + ".jsonl")
+        self.export_chrome(base + ".trace.json")
+        return base + ".jsonl", base + ".trace.json"
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._task_start = None
+
+
+## One tracer for the whole process
+tracer = Tracer(enabled=os.environ.get("CREW_TRACE", "1") != "0")
+
+
+## Callbacks to give to the crews. Plain functions : crewai warns about bound methods (they can't be serialized) on every crew built
+def step_callback(step):
+    """'step_callback' of a crew, see 'Tracer.step_callback'."""
+    tracer.step_callback(step)
+
+
+def task_callback(output):
+    """'task_callback' of a crew, see 'Tracer.task_callback'."""
+    tracer.task_callback(output)
+
+
+## Tool name -> undecorated function, of every traced tool
+_tool_functions = {}
+## Lists collecting the tool calls, one per 'Tracer.record_tool_calls' block the call is made in
+_tool_calls = contextvars.ContextVar("tool_calls", default=())
+
+
+def tool_function(name):
+    """The function behind a traced tool, to call it outside of an agent (None when unknown)."""
+    return _tool_functions.get(name)
+
+
+def traced_tool(function):
+    """Decorator for tool functions (put it under '@tool') : one 'tool' span per call.
+
+    A call of the same tool right after it returned an error, on the same thread, is counted as a retry.
+    """
+    name = function.__name__
+    _tool_functions[name] = function
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        result = _traced_call(function, name, args, kwargs)
+        collectors = _tool_calls.get()
+        if collectors:
+            call = {"tool": name, "args": list(args), "kwargs": kwargs, "output": str(result)}
+            for calls in collectors:
+                calls.append(call)
+        return result
+
+    return wrapper
+
+
+def _traced_call(function, name, args, kwargs):
+    if not tracer.enabled:
+        return function(*args, **kwargs)
+    failed = getattr(tracer._local, "failed_tools", None)
+    if failed is None:
+        failed = tracer._local.failed_tools = set()
+    retry = name in failed
+    if retry:
+        tracer.incr("tool_retries")
+    tracer.incr(f"tool_calls.{name}")
+    with tracer.span(name, "tool", input=str(args or kwargs)[:200], retry=retry) as attrs:
+        result = function(*args, **kwargs)
+        error = isinstance(result, str) and result.startswith(("Error", "Could not"))
+        attrs.update(output_chars=len(str(result)), error=error)
+    (failed.add if error else failed.discard)(name)
+    return result
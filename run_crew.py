@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from crew_common.loader import CREWS, build_example_crew, example_folder, example_inputs, load_example
+
+## One entry point for all the example crews :
+##   python run_crew.py list
+##   python run_crew.py advisor --stock "Hdfc Bank"
+##   python run_crew.py chat --query "What is Bangalore famously known for?" --json
+##   python run_crew.py research --stock "Tata Steel" --trace
+##   python run_crew.py advisor --stock "Tata Steel" --stream                 (the answers as they come, see crew_common/streaming.py)
+##   python run_crew.py serve --http 127.0.0.1:8080 --crews advisor collab    (warm service, see crew_common/service.py)
+##   python run_crew.py batch collab topics.txt --concurrency 8 --rpm 30       (many inputs, see crew_common/batch.py)
+##   python run_crew.py show --symbol HDFCBANK.NS --task advise                (earlier runs, see crew_common/run_store.py)
+## Only the chosen example is imported (and crewai with it), so '--help' and 'list' answer at once.
+## Inputs not given on the command line take the example's default. Runs are recorded in the run store ('runs.sqlite'),
+## their task outputs can be written to files with 'show <run id> --save <folder>'. With the store off ('CREW_RUN_STORE=0'),
+## the output files of the tasks go to the current folder.
+
+
+def _add_crew_commands(commands):
+    for name, (folder, inputs) in CREWS.items():
+        command = commands.add_parser(name, help=f"run the crew of {folder}")
+        for key in inputs:
+            command.add_argument(f"--{key}", help=f"'{key}' input of the crew (default : the example's own)")
+        command.add_argument("--json", action="store_true", help="print the result and the task outputs as JSON")
+        command.add_argument("--quiet", action="store_true", help="no agent / task logs")
+        command.add_argument("--trace", action="store_true", help="print the trace summary and write the trace files")
+        command.add_argument("--incremental", action="store_true",
+                             help="reuse the outputs of tasks whose inputs didn't change since an earlier run (research, advisor)")
+        command.add_argument("--stream", action="store_true",
+                             help="print the agents' answers as they come (no logs), and write the task output files as they go")
+
+
+def _add_serve_command(commands):
+    command = commands.add_parser("serve", help="keep crews warm and answer kickoff requests (HTTP or JSON lines)")
+    command.add_argument("--http", default="127.0.0.1:8080", help="host:port to listen on (default 127.0.0.1:8080)")
+    command.add_argument("--stdio", action="store_true", help="read JSON line requests on stdin, answer on stdout")
+    command.add_argument("--crews", nargs="+", default=["advisor", "collab"], choices=list(CREWS), help="crews to serve")
+    command.add_argument("--concurrency", type=int, default=4, help="crews running at the same time")
+    command.add_argument("--queue", type=int, default=32, help="requests waiting for a worker before new ones are turned down")
+    command.add_argument("--incremental", action="store_true", help="reuse the outputs of unchanged tasks (task cache)")
+
+
+def _add_batch_command(commands):
+    command = commands.add_parser("batch", help="run a crew over the inputs of a file (JSON lines, CSV or one per line)")
+    command.add_argument("crew", choices=list(CREWS), help="crew to run")
+    command.add_argument("inputs", help="input file : .jsonl / .json, .csv, or a value of the crew's first input per line")
+    command.add_argument("--out", help="results file, JSON lines, also used to resume (default <inputs>.results.jsonl)")
+    command.add_argument("--concurrency", type=int, default=4, help="crews running at the same time")
+    command.add_argument("--rpm", type=float, help="LLM requests per minute allowed per provider (default CREW_LLM_RPM)")
+    command.add_argument("--tpm", type=float, help="LLM tokens per minute allowed per provider (default CREW_LLM_TPM)")
+    command.add_argument("--retries", type=int, default=2, help="retries of an input failing with a 429 / 5xx / connection error")
+    command.add_argument("--tasks", action="store_true", help="also write the output of every task")
+    command.add_argument("--incremental", action="store_true", help="reuse the outputs of unchanged tasks (task cache)")
+
+
+def _batch(args):
+    from crew_common.batch import run_batch
+
+    if args.incremental:
+        os.environ["CREW_TASK_CACHE"] = "1"
+    summary = run_batch(args.crew, args.inputs, args.out, concurrency=args.concurrency, requests_per_minute=args.rpm,
+                        tokens_per_minute=args.tpm, retries=args.retries, include_tasks=args.tasks)
+    print(json.dumps(summary))
+    return 1 if summary["failed"] else 0
+
+
+def _add_show_command(commands):
+    command = commands.add_parser("show", help="show recorded runs, a run, or the latest output of a task (no crew is run)")
+    command.add_argument("run_id", nargs="?", help="run to show (the start of its id is enough)")
+    command.add_argument("--crew", choices=list(CREWS), help="only runs of this crew")
+    command.add_argument("--symbol", help="only runs for this stock symbol, e.g. HDFCBANK.NS")
+    command.add_argument("--stock", help="only runs for this stock / topic / query")
+    command.add_argument("--today", action="store_true", help="only runs started today")
+    command.add_argument("--since", help="only runs started on or after this day (YYYY-MM-DD)")
+    command.add_argument("--task", help="latest output of this task (e.g. 'advise', 'analyse')")
+    command.add_argument("--limit", type=int, default=20, help="runs listed at most")
+    command.add_argument("--save", metavar="FOLDER", help="write the run's task outputs to their files in this folder")
+    command.add_argument("--json", action="store_true", help="print as JSON")
+
+
+def _show(args):
+    from datetime import datetime
+
+    from crew_common.run_store import run_store_from_env, start_of_day
+
+    store = run_store_from_env()
+    if store is None:
+        print("The run store is off (CREW_RUN_STORE=0)", file=sys.stderr)
+        return 1
+    since = start_of_day() if args.today else start_of_day(args.since) if args.since else None
+    if args.run_id:
+        found = store.get(args.run_id)
+        if found and args.save:
+            for path in store.export(found["id"], args.save):
+                print(f"wrote {path}", file=sys.stderr)
+    elif args.task:
+        found = store.latest_output(args.task, crew=args.crew, symbol=args.symbol, subject=args.stock, since=since)
+    else:
+        found = store.runs(crew=args.crew, symbol=args.symbol, subject=args.stock, since=since, limit=args.limit)
+    if not found and not isinstance(found, list):
+        print("No such run" if args.run_id else f"No recorded output of '{args.task}'", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(found, indent=2, default=str))
+    elif args.run_id or args.task:
+        when = datetime.fromtimestamp(found["started"]).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"# {found.get('crew')} run {found.get('id') or found.get('run_id')} of {when}, {found.get('symbol') or found.get('subject')}")
+        for task in found.get("tasks") or [found]:
+            print(f"\n## {task['name']}\n{task['raw']}")
+    else:
+        for run in found:
+            when = datetime.fromtimestamp(run["started"]).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"{run['id'][:12]}  {when}  {run['crew']:<9}{run['status']:<7}{run['seconds'] or 0:>8.1f}s  "
+                  f"{run['symbol'] or '':<14}{run['subject'] or ''}")
+    return 0
+
+
+def _serve(args):
+    from crew_common.service import serve
+
+    if args.incremental:
+        os.environ["CREW_TASK_CACHE"] = "1"
+    host, _, port = args.http.rpartition(":")
+    serve(args.crews, host=host or "127.0.0.1", port=int(port), stdio=args.stdio,
+          max_concurrency=args.concurrency, max_queue=args.queue)
+    return 0
+
+
+def run_crew(name, inputs=None, quiet=False, on_event=None):
+    """Run an example crew with its default inputs updated by 'inputs', recorded in the run store.
+
+    Args:
+        on_event (callable): Stream the run : called with each event of 'crew_common.streaming' (chunks of the answers
+            as they come, each task's output as it finishes). The task output files are then written as they go.
+
+    Returns:
+        tuple: (CrewOutput, inputs used, seconds, run id)
+    """
+    from crew_common.env import load_env
+
+    ## API keys from the example's '.env', then from the current folder's
+    load_env(example_folder(name))
+    example = load_example(name)
+    inputs = example_inputs(name, {key: value for key, value in (inputs or {}).items() if value is not None})
+    crew = build_example_crew(name, quiet=quiet)
+    from crew_common.run_store import record_run
+    from crew_common.tracing import tracer
+
+    started = time.perf_counter()
+    ## Recorded runs write no output files : the outputs are in the store. A streamed run writes them, to follow them
+    with tracer.span("kickoff", crew=name), record_run(name, inputs, crew, output_files=True if on_event else None) as run:
+        if on_event is None:
+            result = example.kickoff(inputs, crew=crew)
+        else:
+            from crew_common.streaming import stream_kickoff
+
+            stream = stream_kickoff(example.kickoff, crew, inputs)
+            for event in stream:
+                on_event(event)
+            result = stream.result
+        run.done(result, crew)
+    return result, inputs, time.perf_counter() - started, run.id
+
+
+def _stream_printer(out):
+    ## The answers of a streamed run as they come, under the name of their task (tasks running together take turns),
+    ## each step of an agent (model call) on a line of its own
+    current = {"task": None, "call": None}
+
+    def on_event(event):
+        if event.kind == "chunk":
+            if event.task != current["task"]:
+                out.write(f"\n\n## {event.task} ({event.agent})\n")
+            elif event.call != current["call"]:
+                out.write("\n")
+            current.update(task=event.task, call=event.call)
+            out.write(event.text)
+        elif event.kind == "task":
+            out.write(f"\n\n[{event.task} done]\n")
+            current.update(task=None, call=None)
+        out.flush()
+
+    return on_event
+
+
+def _print_result(name, result, inputs, seconds, run_id, as_json):
+    if not as_json:
+        print(result.raw)
+        return
+    usage = getattr(result, "token_usage", None)
+    print(json.dumps({
+        "run_id": run_id,
+        "crew": name,
+        "inputs": inputs,
+        "seconds": round(seconds, 3),
+        "result": result.raw,
+        "tasks": [{"name": task.name, "agent": task.agent, "output": task.raw} for task in result.tasks_output],
+        "token_usage": usage.model_dump() if usage is not None else None,
+    }, indent=2, default=str))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="run_crew", description="Run one of the example crews")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list the crews and their inputs")
+    _add_crew_commands(commands)
+    _add_serve_command(commands)
+    _add_batch_command(commands)
+    _add_show_command(commands)
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for name, (folder, inputs) in CREWS.items():
+            print(f"{name:<10}{folder:<26}inputs : {', '.join(inputs)}")
+        return 0
+    if args.command == "serve":
+        return _serve(args)
+    if args.command == "batch":
+        return _batch(args)
+    if args.command == "show":
+        return _show(args)
+
+    if args.incremental:
+        os.environ["CREW_TASK_CACHE"] = "1"
+    inputs = {key: getattr(args, key) for key in CREWS[args.command][1]}
+    if args.stream:
+        ## The answers are already printed : the result only as JSON, on demand
+        printer = _stream_printer(sys.stderr if args.json else sys.stdout)
+        result, inputs, seconds, run_id = run_crew(args.command, inputs, quiet=True, on_event=printer)
+        if args.json:
+            _print_result(args.command, result, inputs, seconds, run_id, True)
+    else:
+        result, inputs, seconds, run_id = run_crew(args.command, inputs, quiet=args.quiet)
+        _print_result(args.command, result, inputs, seconds, run_id, args.json)
+    if args.trace:
+        from crew_common.tracing import tracer
+
+        print(json.dumps(tracer.summary(), indent=2, default=str), file=sys.stderr)
+        print(tracer.export(args.command), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())